@@ -5,16 +5,31 @@ This module implements a research agent that can perform iterative web searches
 and synthesis to answer complex research questions.
 """
 
+import asyncio
+import time
+import uuid
+from typing import Optional
+
 from pydantic import BaseModel, Field
 from typing_extensions import Literal
 
 from langgraph.graph import StateGraph, START, END
-from langchain_core.messages import SystemMessage, HumanMessage, ToolMessage, filter_messages
-from langchain.chat_models import init_chat_model
-
-from state import ResearcherState, ResearcherOutputState
-from tools import tavily_search, get_today_str, think_tool
-from prompts import research_agent_prompt, compress_research_system_prompt, compress_research_human_message
+from langchain_core.messages import AIMessage, SystemMessage, HumanMessage, ToolMessage, filter_messages
+from langchain_core.runnables import RunnableConfig
+
+from blobs import blob_reference, get_blob_store, materialize_messages, note_content, offload_message
+from clients import get_chat_model, invoke_model, route_model, track_token_usage
+from configuration import Configuration
+from state import ResearcherState, ResearcherOutputState, initial_researcher_state
+from tools import tavily_search, get_today_str, think_tool, estimate_tokens
+from prompts import (
+    research_agent_prompt,
+    research_agent_fast_prompt,
+    compress_research_system_prompt,
+    compress_research_human_message,
+    fold_research_digest_prompt,
+    update_research_findings_prompt,
+)
 
 # ===== CONFIGURATION =====
 
@@ -22,89 +37,439 @@ from prompts import research_agent_prompt, compress_research_system_prompt, comp
 tools = [tavily_search, think_tool]
 tools_by_name = {tool.name: tool for tool in tools}
 
-# Initialize models
-model = init_chat_model(model="google_genai:gemini-2.5-pro")
-model_with_tools = model.bind_tools(tools)
-summarization_model = init_chat_model(model="google_genai:gemini-2.5-flash")
-compress_model = init_chat_model(model="google_genai:gemini-2.5-flash", max_tokens=32000)
+# Models are built lazily on first use, see clients.py
+_bound_research_models: dict[int, tuple] = {}
+
+def get_model_with_tools(tier: Optional[str] = None):
+    """Return a research model with the research tools bound, binding it on first use.
+
+    Args:
+        tier: Model tier selected with ``route_model``; defaults to the research role's default tier
+    """
+    research_model = get_chat_model("research", tier)
+    model, model_with_tools = _bound_research_models.get(id(research_model), (None, None))
+    if model is not research_model:
+        model_with_tools = research_model.bind_tools(tools)
+        _bound_research_models[id(research_model)] = (research_model, model_with_tools)
+    return model_with_tools
 
 # ===== AGENT NODES =====
 
-def llm_call(state: ResearcherState):
+async def llm_call(state: ResearcherState, config: RunnableConfig):
     """Analyze current state and decide on next actions.
 
     The model analyzes the current conversation state and decides whether to:
     1. Call search tools to gather more information
     2. Provide a final answer based on gathered information
 
-    Returns updated state with the model's response.
+    Once the history grows past ``context_compaction_tokens``, older turns are
+    folded into a running research digest and only the digest plus the recent
+    turns are sent to the model. The full history stays in state.
+
+    In fast mode, the model is asked to reflect with ``think_tool`` in the same
+    turn as its next search instead of in a turn of its own. The model is
+    chosen by the ``llm_call`` route from the tool rounds completed and the
+    size of the context.
+
+    In incremental compression mode, it also takes in the findings merge
+    that finished since the last turn and starts merging the latest tool
+    results in the background, see ``update_findings``.
+
+    Returns updated state with the model's response and the tokens it used.
     """
-    system_message = research_agent_prompt.format(date=get_today_str())
+    configurable = Configuration.from_runnable_config(config)
+    started_at = time.monotonic()
+    findings = update_findings(state) if configurable.incremental_compression else {}
+    prompt = research_agent_fast_prompt if configurable.fast_mode else research_agent_prompt
+    system_message = prompt.format(date=get_today_str())
+    with track_token_usage() as usage:
+        compaction = await compact_research_context(state, configurable)
+        messages = [SystemMessage(content=system_message)] + materialize_messages(build_research_context(state, compaction))
+        tier = route_model(
+            "research", "llm_call",
+            iteration=state.get("tool_call_iterations", 0), input_tokens=estimate_message_tokens(messages),
+        )
+        response = await invoke_model("research", messages, model=get_model_with_tools(tier), tier=tier)
     return {
-        "researcher_messages": [
-            model_with_tools.invoke(
-                [SystemMessage(content=system_message)] + state["researcher_messages"]
-            )
-        ]
+        **findings,
+        "researcher_messages": [response],
+        "tokens_used": usage.total + findings.get("tokens_used", 0),
+        "elapsed_seconds": time.monotonic() - started_at,
+        **compaction,
     }
 
-def tool_node(state: ResearcherState):
+async def tool_node(state: ResearcherState, config: RunnableConfig):
     """Execute all tool calls from the previous LLM response.
 
-    Executes all tool calls from the previous LLM responses.
-    Returns updated state with tool execution results.
+    Tool calls from a single turn run concurrently, bounded by
+    ``max_concurrent_tool_calls``. Results are returned in the order the calls
+    were made, and a failing call produces an error ToolMessage instead of
+    aborting the other calls. Search calls share the run's seen-URL and
+    seen-page indexes, so a page or a near-duplicate of it is summarized at
+    most once per run.
+
+    Searches beyond the run's ``max_search_calls`` budget are not executed,
+    and calls still running when the time budget runs out are cancelled.
+    Large outputs are moved to the blob store, leaving a stub in the state.
     """
+    configurable = Configuration.from_runnable_config(config)
+    started_at = time.monotonic()
     tool_calls = state["researcher_messages"][-1].tool_calls
-
-    # Execute all tool calls
-    observations = []
+    semaphore = asyncio.Semaphore(configurable.max_concurrent_tool_calls)
+    seen_urls = dict(state.get("seen_urls") or {})
+    seen_pages = dict(state.get("seen_pages") or {})
+    search_calls = state.get("search_calls", 0)
+    remaining_seconds = remaining_research_seconds(state, configurable)
+    deadline = None if remaining_seconds is None else started_at + remaining_seconds
+
+    # Admit searches in call order up to the remaining search budget
+    allowed_ids = set()
     for tool_call in tool_calls:
-        tool = tools_by_name[tool_call["name"]]
-        observations.append(tool.invoke(tool_call["args"]))
+        if tool_call["name"] == tavily_search.name:
+            if configurable.max_search_calls and search_calls >= configurable.max_search_calls:
+                continue
+            search_calls += 1
+        allowed_ids.add(tool_call["id"])
+
+    async def execute_tool_call(tool_call: dict) -> ToolMessage:
+        if tool_call["id"] not in allowed_ids:
+            return ToolMessage(
+                content="Search budget exhausted: this search was not run. Work with the information gathered so far.",
+                name=tool_call["name"],
+                tool_call_id=tool_call["id"],
+                status="error",
+            )
 
-    # Create tool message outputs
-    tool_outputs = [
-        ToolMessage(
+        async def invoke_tool() -> str:
+            async with semaphore:
+                tool = tools_by_name[tool_call["name"]]
+                args = tool_call["args"]
+                if tool_call["name"] == tavily_search.name:
+                    args = {
+                        **args,
+                        "seen_urls": seen_urls,
+                        "seen_pages": seen_pages,
+                        "research_topic": state.get("research_topic"),
+                    }
+                return await tool.ainvoke(args, config)
+
+        try:
+            # Time spent waiting for a free slot counts against the budget too
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            observation = await asyncio.wait_for(invoke_tool(), timeout=timeout)
+            status = "success"
+        except asyncio.TimeoutError:
+            observation = f"Research time budget exhausted before '{tool_call['name']}' finished."
+            status = "error"
+        except Exception as e:
+            observation = f"Error executing tool '{tool_call['name']}': {str(e)}"
+            status = "error"
+
+        return ToolMessage(
             content=observation,
             name=tool_call["name"],
-            tool_call_id=tool_call["id"]
-        ) for observation, tool_call in zip(observations, tool_calls)
-    ]
+            tool_call_id=tool_call["id"],
+            status=status,
+        )
+
+    # Execute all tool calls concurrently, gather preserves call order
+    with track_token_usage() as usage:
+        tool_outputs = await asyncio.gather(
+            *(execute_tool_call(tool_call) for tool_call in tool_calls)
+        )
 
-    return {"researcher_messages": tool_outputs}
+    # Keep large outputs out of the state, prompts load them back when needed
+    blob_store = get_blob_store()
+    if blob_store is not None:
+        tool_outputs = await asyncio.to_thread(lambda: [
+            offload_message(message, blob_store, configurable.blob_store_min_chars) for message in tool_outputs
+        ])
 
-def compress_research(state: ResearcherState) -> dict:
+    return {
+        "researcher_messages": list(tool_outputs),
+        "seen_urls": seen_urls,
+        "seen_pages": seen_pages,
+        "tool_call_iterations": state.get("tool_call_iterations", 0) + 1,
+        "search_calls": search_calls,
+        "tokens_used": usage.total,
+        "elapsed_seconds": time.monotonic() - started_at,
+    }
+
+async def compress_research(state: ResearcherState) -> dict:
     """Compress research findings into a concise summary.
 
     Takes all the research messages and tool outputs and creates
     a compressed summary suitable for the supervisor's decision-making.
-    """
 
-    system_message = compress_research_system_prompt.format(date=get_today_str())
-    human_message = compress_research_human_message.format(research_topic=state["research_topic"])
-    messages = [SystemMessage(content=system_message)] + state.get("researcher_messages", []) + [HumanMessage(content=human_message)]
-    response = compress_model.invoke(messages)
-
-    # Extract raw notes from tool and AI messages
+    When findings were compressed incrementally during the loop, a merge
+    still running is waited for, only the messages that arrived after it are
+    merged in, and no model call is made at all if there are no new search
+    results.
+    """
+    state = {**state, **await wait_for_findings_merge(state)}
+    messages = drop_unanswered_tool_calls(list(state.get("researcher_messages", [])))
+    compressed_research = None
+
+    if state.get("compressed_findings"):
+        new_messages = messages[state.get("findings_cursor", 0):]
+        if not has_search_results(new_messages):
+            compressed_research = state["compressed_findings"]
+        else:
+            try:
+                compressed_research = await merge_research_findings(state, new_messages)
+            except Exception as e:
+                print(f"Failed to merge incremental findings, compressing from scratch: {str(e)}")
+
+    if compressed_research is None:
+        system_message = compress_research_system_prompt.format(date=get_today_str())
+        human_message = compress_research_human_message.format(research_topic=state["research_topic"])
+        messages = [SystemMessage(content=system_message)] + materialize_messages(messages) + [HumanMessage(content=human_message)]
+        tier = route_model("compression", "compress_research", input_tokens=estimate_message_tokens(messages))
+        response = await invoke_model("compression", messages, tier=tier)
+        compressed_research = str(response.content)
+
+    # Extract raw notes from tool and AI messages; out-of-band contents stay
+    # in the blob store and are only loaded when the notes are written out
     raw_notes = [
-        str(m.content) for m in filter_messages(
-            state["researcher_messages"], 
+        note_content(m) for m in filter_messages(
+            state["researcher_messages"],
             include_types=["tool", "ai"]
         )
     ]
 
     return {
-        "compressed_research": str(response.content),
+        "compressed_research": compressed_research,
         "raw_notes": ["\n".join(raw_notes)]
     }
 
+# Incremental findings merges still running, by the id kept in ``findings_merge``
+_findings_merges: dict[str, asyncio.Task] = {}
+
+def update_findings(state: ResearcherState) -> dict:
+    """Take in the last finished findings merge and start merging the latest tool results.
+
+    Merges run as background tasks that outlive the node starting them, so
+    the research loop never waits for one: a merge that has not finished
+    by the next model turn is taken in at a later turn, or waited for by
+    ``compress_research``. One merge runs at a time; it covers the messages
+    from ``findings_cursor`` up to the end of the history when it starts.
+
+    Returns:
+        State update with the merged findings and cursor, the id of the
+        running merge, and the tokens the finished merge used
+    """
+    update = take_findings_merge(state)
+    if update.get("findings_merge"):
+        return update
+    merged_state = {**state, **update}
+    messages = list(state["researcher_messages"])
+    new_messages = messages[merged_state.get("findings_cursor", 0):]
+    if not has_search_results(new_messages):
+        return {**update, "findings_cursor": len(messages)}
+
+    async def merge() -> tuple[str, int, int]:
+        with track_token_usage() as usage:
+            findings = await merge_research_findings(merged_state, new_messages)
+        return findings, len(messages), usage.total
+
+    merge_id = uuid.uuid4().hex
+    _findings_merges[merge_id] = asyncio.create_task(merge())
+    return {**update, "findings_merge": merge_id}
+
+def take_findings_merge(state: ResearcherState) -> dict:
+    """Return the state update of the running findings merge if it has finished, without waiting.
+
+    A merge that failed, or that this process does not know because the run
+    was resumed from a checkpoint, leaves the cursor in place so its messages
+    are merged again.
+    """
+    merge_id = state.get("findings_merge")
+    if not merge_id:
+        return {}
+    task = _findings_merges.get(merge_id)
+    if task is not None and not task.done():
+        return {"findings_merge": merge_id}
+    _findings_merges.pop(merge_id, None)
+    try:
+        if task is None:
+            raise LookupError(f"merge {merge_id} is not running in this process")
+        findings, cursor, tokens = task.result()
+    except Exception as e:
+        print(f"Failed to update incremental findings: {str(e)}")
+        return {"findings_merge": ""}
+    return {"compressed_findings": findings, "findings_cursor": cursor, "findings_merge": "", "tokens_used": tokens}
+
+async def wait_for_findings_merge(state: ResearcherState) -> dict:
+    """Wait for the running findings merge, if any, and return its state update."""
+    task = _findings_merges.get(state.get("findings_merge") or "")
+    if task is not None:
+        await asyncio.wait([task])
+    return take_findings_merge(state)
+
+def has_search_results(messages: list) -> bool:
+    """Return whether any message is a result of a search tool rather than a reflection."""
+    return any(m.type == "tool" and m.name != think_tool.name for m in messages)
+
+async def merge_research_findings(state: ResearcherState, new_messages: list) -> str:
+    """Merge new research messages into the compressed findings document.
+
+    Args:
+        state: Current researcher state holding the findings so far
+        new_messages: Messages not yet reflected in the findings
+
+    Returns:
+        Updated findings document in the compressed research format
+    """
+    system_message = compress_research_system_prompt.format(date=get_today_str())
+    human_message = update_research_findings_prompt.format(
+        research_topic=state["research_topic"],
+        compressed_findings=state.get("compressed_findings") or "(no findings yet)",
+        research_messages=format_messages_for_digest(
+            filter_messages(new_messages, include_types=["tool", "ai"])
+        ),
+    )
+    tier = route_model(
+        "compression", "update_findings", input_tokens=estimate_tokens(system_message + human_message)
+    )
+    response = await invoke_model(
+        "compression", [SystemMessage(content=system_message), HumanMessage(content=human_message)], tier=tier
+    )
+    return str(response.content)
+
+# ===== CONTEXT COMPACTION =====
+
+def estimate_message_tokens(messages: list) -> int:
+    """Estimate the tokens of a message list, including tool call arguments and out-of-band contents."""
+    return sum(
+        (blob_reference(m) or {}).get("tokens", estimate_tokens(str(m.content)))
+        + estimate_tokens(str(getattr(m, "tool_calls", None) or ""))
+        for m in messages
+    )
+
+def format_messages_for_digest(messages: list) -> str:
+    """Render research turns as plain text for folding into the digest."""
+    parts = []
+    for message in materialize_messages(messages):
+        if message.type == "ai":
+            calls = ", ".join(f"{c['name']}({c['args']})" for c in message.tool_calls)
+            parts.append(f"[Researcher] {message.content}\nTool calls: {calls}".strip())
+        elif message.type == "tool":
+            parts.append(f"[{message.name} result]\n{message.content}")
+        else:
+            parts.append(f"[{message.type}] {message.content}")
+    return "\n\n".join(parts)
+
+def find_compaction_split(messages: list, cursor: int, keep_recent_turns: int) -> int:
+    """Return the index of the first message to keep verbatim.
+
+    A turn starts at an AI message, so the split always falls on a turn
+    boundary and tool results stay paired with the call that produced them.
+    """
+    turn_starts = [i for i, m in enumerate(messages) if i >= cursor and m.type == "ai"]
+    if len(turn_starts) <= keep_recent_turns:
+        return cursor
+    return turn_starts[len(turn_starts) - keep_recent_turns] if keep_recent_turns else len(messages)
+
+async def compact_research_context(state: ResearcherState, configurable: Configuration) -> dict:
+    """Fold older research turns into the running digest when over the token threshold.
+
+    Returns:
+        State update with the new ``research_digest`` and ``digest_cursor``, or
+        an empty dict when no compaction was needed or it failed
+    """
+    messages = list(state["researcher_messages"])
+    digest = state.get("research_digest", "")
+    cursor = state.get("digest_cursor") or 1  # The initial request is never folded
+    threshold = configurable.context_compaction_tokens
+
+    if not threshold or estimate_tokens(digest) + estimate_message_tokens(messages[cursor:]) <= threshold:
+        return {}
+
+    split = find_compaction_split(messages, cursor, configurable.context_keep_recent_turns)
+    if split <= cursor:
+        return {}
+
+    try:
+        prompt = fold_research_digest_prompt.format(
+            research_topic=state.get("research_topic", ""),
+            research_digest=digest or "(empty)",
+            research_messages=format_messages_for_digest(messages[cursor:split]),
+            date=get_today_str()
+        )
+        tier = route_model("summarization", "fold_research_digest", input_tokens=estimate_tokens(prompt))
+        response = await invoke_model("summarization", [HumanMessage(content=prompt)], tier=tier)
+    except Exception as e:
+        print(f"Failed to compact research context: {str(e)}")
+        return {}
+
+    return {"research_digest": str(response.content), "digest_cursor": split}
+
+def build_research_context(state: ResearcherState, compaction: dict) -> list:
+    """Build the message list sent to the research model.
+
+    Without a digest this is the full history. With a digest, the initial
+    request is followed by the digest and the turns that were not folded.
+    """
+    messages = list(state["researcher_messages"])
+    digest = compaction.get("research_digest", state.get("research_digest", ""))
+    cursor = compaction.get("digest_cursor", state.get("digest_cursor", 0))
+    if not digest or not cursor:
+        return messages
+
+    request = messages[0]
+    return [
+        HumanMessage(content=(
+            f"{request.content}\n\n"
+            "<research_digest>\n"
+            "Digest of the earlier research turns, which have been folded to save context:\n\n"
+            f"{digest}\n"
+            "</research_digest>"
+        )),
+        *messages[cursor:],
+    ]
+
+# ===== RESEARCH BUDGETS =====
+
+def remaining_research_seconds(state: ResearcherState, configurable: Configuration) -> Optional[float]:
+    """Return the seconds left in the run's time budget, or None if it has no time budget."""
+    if not configurable.max_research_seconds:
+        return None
+    return max(0.0, configurable.max_research_seconds - state.get("elapsed_seconds", 0.0))
+
+def exhausted_research_budget(state: ResearcherState, configurable: Configuration) -> Optional[str]:
+    """Return the name of the first research budget that is used up, or None.
+
+    Budgets set to 0 are unlimited.
+    """
+    if configurable.max_tool_call_iterations and state.get("tool_call_iterations", 0) >= configurable.max_tool_call_iterations:
+        return "max_tool_call_iterations"
+    if configurable.max_search_calls and state.get("search_calls", 0) >= configurable.max_search_calls:
+        return "max_search_calls"
+    if configurable.max_research_tokens and state.get("tokens_used", 0) >= configurable.max_research_tokens:
+        return "max_research_tokens"
+    if remaining_research_seconds(state, configurable) == 0:
+        return "max_research_seconds"
+    return None
+
+def drop_unanswered_tool_calls(messages: list) -> list:
+    """Strip the tool calls of a final AI message whose calls were never executed.
+
+    This happens when a budget ends the loop right after the model asked for
+    more tools; the compression model should not see dangling tool calls.
+    """
+    if messages and messages[-1].type == "ai" and messages[-1].tool_calls:
+        content = messages[-1].content
+        return messages[:-1] + ([AIMessage(content=content)] if content else [])
+    return messages
+
 # ===== ROUTING LOGIC =====
 
-def should_continue(state: ResearcherState) -> Literal["tool_node", "compress_research"]:
+def should_continue(state: ResearcherState, config: RunnableConfig) -> Literal["tool_node", "compress_research"]:
     """Determine whether to continue research or provide final answer.
 
     Determines whether the agent should continue the research loop or provide
-    a final answer based on whether the LLM made tool calls.
+    a final answer based on whether the LLM made tool calls and whether the
+    run still has room in its iteration, search, token and time budgets.
 
     Returns:
         "tool_node": Continue to tool execution
@@ -113,12 +478,27 @@ def should_continue(state: ResearcherState) -> Literal["tool_node", "compress_re
     messages = state["researcher_messages"]
     last_message = messages[-1]
 
-    # If the LLM makes a tool call, continue to tool execution
+    # If the LLM makes a tool call, continue to tool execution within budget
     if last_message.tool_calls:
-        return "tool_node"
+        budget = exhausted_research_budget(state, Configuration.from_runnable_config(config))
+        if budget is None:
+            return "tool_node"
+        print(f"Research budget {budget} exhausted, compressing findings")
     # Otherwise, we have a final answer
     return "compress_research"
 
+def route_after_tools(state: ResearcherState, config: RunnableConfig) -> Literal["llm_call", "compress_research"]:
+    """Return the next research step after a tool round.
+
+    Once a research budget is used up, the tool results go straight to
+    ``compress_research`` without another model turn.
+    """
+    budget = exhausted_research_budget(state, Configuration.from_runnable_config(config))
+    if budget is not None:
+        print(f"Research budget {budget} exhausted, compressing findings")
+        return "compress_research"
+    return "llm_call"
+
 # ===== GRAPH CONSTRUCTION =====
 
 # Build the agent workflow
@@ -139,8 +519,59 @@ agent_builder.add_conditional_edges(
         "compress_research": "compress_research", # Provide final answer
     },
 )
-agent_builder.add_edge("tool_node", "llm_call") # Loop back for more research
+agent_builder.add_conditional_edges(
+    "tool_node",
+    route_after_tools,
+    ["llm_call", "compress_research"], # Loop back, or stop once a budget is used up
+)
 agent_builder.add_edge("compress_research", END)
 
 # Compile the agent
-researcher_agent = agent_builder.compile()
\ No newline at end of file
+researcher_agent = agent_builder.compile()
+
+# ===== CHECKPOINTED RUNS =====
+
+_checkpointed_agent = None
+
+def get_researcher_agent():
+    """Return the research graph, compiled with the durable checkpointer when checkpointing is enabled."""
+    global _checkpointed_agent
+    from checkpoints import get_checkpointer
+
+    checkpointer = get_checkpointer()
+    if checkpointer is None:
+        return researcher_agent
+    if _checkpointed_agent is None or _checkpointed_agent.checkpointer is not checkpointer:
+        _checkpointed_agent = agent_builder.compile(checkpointer=checkpointer)
+    return _checkpointed_agent
+
+async def resumable_input(graph, topic: str, config: RunnableConfig) -> tuple[Optional[dict], Optional[dict]]:
+    """Return how to start the run of a topic on a possibly checkpointed thread.
+
+    Args:
+        graph: Research graph the run uses
+        topic: Research topic of the run, or empty to only resume a thread
+        config: Runnable config of the run, with ``thread_id`` when checkpointing
+
+    Returns:
+        Tuple of the graph input and the final state of an already finished
+        thread. The input is the initial state for a new run and None to
+        resume an interrupted one from its last completed node.
+
+    Raises:
+        ValueError: If there is no topic and no checkpoint of the thread to resume
+    """
+    if graph.checkpointer is None:
+        if not topic:
+            raise ValueError("A research topic is required when checkpointing is disabled")
+        return initial_researcher_state(topic), None
+
+    snapshot = await graph.aget_state(config)
+    if not snapshot.values:
+        if not topic:
+            thread_id = (config.get("configurable") or {}).get("thread_id")
+            raise ValueError(f"No checkpointed run found for thread '{thread_id}'")
+        return initial_researcher_state(topic), None
+    if snapshot.next:
+        return None, None
+    return None, snapshot.values
\ No newline at end of file
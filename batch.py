@@ -0,0 +1,194 @@
+"""Batch Research Runner.
+
+This module runs the research agent over many topics read from a JSONL file.
+Runs execute concurrently under a global limit and share the process-wide
+model and search clients. Each finished run is appended to an output JSONL
+file immediately, so an interrupted batch resumes where it stopped.
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+from pathlib import Path
+from typing import Optional, Union
+
+from langchain_core.runnables import RunnableConfig
+
+from agent import resumable_input
+from blobs import materialize_notes
+from clients import warm_clients
+from configuration import Configuration
+from search_backends import close_search_backend
+from supervisor import get_research_graph
+from tracing import Tracer, use_tracer
+
+# ===== INPUT AND OUTPUT =====
+
+def load_topics(input_path: Union[str, Path]) -> list[dict]:
+    """Load research topics from a JSONL file.
+
+    Each line is a JSON object with a ``topic`` field, or with ``title`` and
+    optional ``body`` fields that are joined into the topic. The record id is
+    taken from ``id`` or ``request_id`` and defaults to the line number.
+
+    Args:
+        input_path: Path to the JSONL file of topics
+
+    Returns:
+        List of dictionaries with ``id`` and ``topic`` keys
+
+    Raises:
+        ValueError: If a line is not a JSON object or has no topic
+    """
+    topics = []
+    with open(input_path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Line {line_number} of {input_path} is not valid JSON: {e}") from e
+            if not isinstance(record, dict):
+                raise ValueError(f"Line {line_number} of {input_path} is not a JSON object")
+            topic = record.get("topic") or "\n\n".join(
+                part for part in (record.get("title"), record.get("body")) if part
+            )
+            if not topic:
+                raise ValueError(f"Line {line_number} of {input_path} has no topic")
+            record_id = record.get("id", record.get("request_id", line_number))
+            topics.append({"id": str(record_id), "topic": topic})
+
+    return topics
+
+def load_completed_ids(output_path: Union[str, Path]) -> set[str]:
+    """Return the ids of topics that already finished successfully in an output file.
+
+    Args:
+        output_path: Path to the output JSONL file of a previous batch
+
+    Returns:
+        Set of record ids whose latest result has status ``ok``
+    """
+    statuses = {}
+    path = Path(output_path)
+    if not path.exists():
+        return set()
+
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Ignore a partially written last line
+            statuses[str(result["id"])] = result.get("status")
+
+    return {record_id for record_id, status in statuses.items() if status == "ok"}
+
+def ends_with_newline(path: Union[str, Path]) -> bool:
+    """Return whether a non-empty file ends with a newline."""
+    with open(path, "rb") as f:
+        f.seek(-1, 2)
+        return f.read(1) == b"\n"
+
+# ===== BATCH EXECUTION =====
+
+async def research_topic(record: dict, config: Optional[RunnableConfig] = None) -> dict:
+    """Run the research agent on a single topic record.
+
+    With checkpointing enabled, each record runs on a thread derived from its
+    id and topic, so a record interrupted in an earlier batch resumes from its
+    last completed node.
+
+    Args:
+        record: Dictionary with ``id`` and ``topic`` keys
+        config: Optional runnable config passed to the graph
+
+    Returns:
+        Result record with the research output or the error that stopped it
+    """
+    start = time.perf_counter()
+    configurable = Configuration.from_runnable_config(config)
+    tracer = Tracer(name=record["topic"])
+    callbacks = [*(config or {}).get("callbacks", []), tracer.callback_handler()]
+    traced_config = {**(config or {}), "callbacks": callbacks}
+    graph = get_research_graph(config)
+    if graph.checkpointer is not None:
+        topic_digest = hashlib.sha256(record["topic"].encode("utf-8")).hexdigest()[:12]
+        traced_config["configurable"] = {
+            **(traced_config.get("configurable") or {}),
+            "thread_id": f"batch-{record['id']}-{topic_digest}",
+        }
+    try:
+        graph_input, output = await resumable_input(graph, record["topic"], traced_config)
+        if output is None:
+            with use_tracer(tracer):
+                output = await graph.ainvoke(graph_input, traced_config)
+        result = {
+            "status": "ok",
+            "compressed_research": output.get("compressed_research", ""),
+            "raw_notes": materialize_notes(output.get("raw_notes", [])),
+        }
+    except Exception as e:
+        result = {"status": "error", "error": f"{type(e).__name__}: {str(e)}"}
+
+    if configurable.trace_dir:
+        result["trace"] = str(tracer.write_summary(configurable.trace_dir))
+
+    return {
+        "id": record["id"],
+        "topic": record["topic"],
+        **result,
+        "elapsed_seconds": round(time.perf_counter() - start, 3),
+    }
+
+async def run_batch(
+    input_path: Union[str, Path],
+    output_path: Union[str, Path],
+    max_concurrency: int = 4,
+    config: Optional[RunnableConfig] = None,
+) -> dict:
+    """Research every topic of a JSONL file concurrently.
+
+    Topics that already finished successfully in ``output_path`` are skipped,
+    so rerunning an interrupted batch with the same paths resumes it.
+
+    Args:
+        input_path: Path to the JSONL file of topics
+        output_path: Path to the JSONL file results are appended to
+        max_concurrency: Maximum number of research runs in flight
+        config: Optional runnable config passed to every run
+
+    Returns:
+        Counts of completed, failed and skipped topics
+    """
+    topics = load_topics(input_path)
+    completed_ids = load_completed_ids(output_path)
+    pending = [record for record in topics if record["id"] not in completed_ids]
+    semaphore = asyncio.Semaphore(max_concurrency)
+    if pending:
+        # Build the shared clients once before the runs start competing for them
+        warm_clients()
+
+    async def run_one(record: dict) -> dict:
+        async with semaphore:
+            return await research_topic(record, config)
+
+    counts = {"ok": 0, "error": 0, "skipped": len(topics) - len(pending)}
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    try:
+        with open(output_path, "a", encoding="utf-8") as f:
+            if f.tell() and not ends_with_newline(output_path):
+                # End a line left partial by an interrupted batch, so the next result is not appended to it
+                f.write("\n")
+            for finished in asyncio.as_completed([run_one(record) for record in pending]):
+                result = await finished
+                f.write(json.dumps(result, ensure_ascii=False) + "\n")
+                f.flush()
+                counts[result["status"]] += 1
+                print(f"[{result['status']}] {result['id']} ({result['elapsed_seconds']}s)")
+    finally:
+        await close_search_backend()
+
+    return counts
@@ -0,0 +1,118 @@
+"""Cold-start benchmark for the research agent entry points.
+
+Measures, in fresh interpreter processes, how long it takes to import the
+agent modules and to run ``main.py --help``. Each measurement is repeated and
+the median is reported.
+
+With ``--baseline``, the same commands are also timed in another version of
+the tree, given as a git ref (checked out into a temporary worktree) or as the
+path of an existing checkout, so a before/after comparison can be reproduced.
+Trees that build their chat models at import time need the provider API keys
+set; placeholder values are enough, as no request is made.
+
+Usage:
+    python -m benchmarks.cold_start --repeat 5
+    GOOGLE_API_KEY=x TAVILY_API_KEY=x python -m benchmarks.cold_start --repeat 5 --baseline beaa6f4
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+COMMANDS = {
+    "import tools": [sys.executable, "-c", "import tools"],
+    "import agent": [sys.executable, "-c", "import agent"],
+    "main.py --help": [sys.executable, "main.py", "--help"],
+}
+
+def time_command(command: list[str], repeat: int, root: Path = REPO_ROOT) -> dict:
+    """Run a command repeatedly in fresh processes and time it.
+
+    Args:
+        command: Command line to execute
+        repeat: Number of timed runs
+        root: Tree to run the command from
+
+    Returns:
+        Median, minimum and maximum wall time in seconds, and whether every run succeeded
+    """
+    timings, ok = [], True
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = subprocess.run(command, cwd=root, capture_output=True)
+        timings.append(time.perf_counter() - start)
+        ok = ok and result.returncode == 0
+
+    return {
+        "median_seconds": round(statistics.median(timings), 3),
+        "min_seconds": round(min(timings), 3),
+        "max_seconds": round(max(timings), 3),
+        "ok": ok,
+    }
+
+@contextmanager
+def checkout(baseline: str) -> Iterator[Path]:
+    """Yield the root of the baseline tree, checking a git ref out into a temporary worktree.
+
+    Args:
+        baseline: Path of an existing checkout, or a git ref of this repository
+    """
+    if Path(baseline).is_dir():
+        yield Path(baseline).resolve()
+        return
+
+    with tempfile.TemporaryDirectory(prefix="cold_start_") as tmp:
+        worktree = Path(tmp) / "tree"
+        subprocess.run(
+            ["git", "worktree", "add", "--detach", str(worktree), baseline],
+            cwd=REPO_ROOT, check=True, capture_output=True,
+        )
+        try:
+            yield worktree
+        finally:
+            subprocess.run(["git", "worktree", "remove", "--force", str(worktree)], cwd=REPO_ROOT, capture_output=True)
+
+def time_tree(root: Path, repeat: int) -> dict:
+    """Time every command in a tree."""
+    return {name: time_command(command, repeat, root) for name, command in COMMANDS.items()}
+
+def format_stats(stats: Optional[dict]) -> str:
+    if stats is None:
+        return "-"
+    return f"{stats['median_seconds']}s{'' if stats['ok'] else ' (failed)'}"
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start benchmark of the research agent")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of timed runs per command")
+    parser.add_argument("--baseline", type=str, metavar="REF_OR_PATH", help="Also time this git ref or checkout, for a before/after comparison")
+    parser.add_argument("--output", type=Path, help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = {"current": time_tree(REPO_ROOT, args.repeat)}
+    if args.baseline:
+        with checkout(args.baseline) as baseline_root:
+            report["baseline"] = time_tree(baseline_root, args.repeat)
+        report["baseline_ref"] = args.baseline
+
+        print(f"{'':<16} {'baseline':>12} {'current':>12}")
+        for name, stats in report["current"].items():
+            print(f"{name:<16} {format_stats(report['baseline'].get(name)):>12} {format_stats(stats):>12}")
+    else:
+        for name, stats in report["current"].items():
+            status = "" if stats["ok"] else "  (failed)"
+            print(f"{name:<16} median={stats['median_seconds']}s min={stats['min_seconds']}s max={stats['max_seconds']}s{status}")
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
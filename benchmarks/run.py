@@ -0,0 +1,294 @@
+"""Offline benchmark for the research graph.
+
+Runs ``researcher_agent`` over the topics of a fixture corpus with replayed or
+scripted models and a fixture search backend, so no network access is needed.
+Latencies of the stand-ins are injectable, which makes the reported wall time
+per node a meaningful regression signal in CI.
+
+With ``--broad``, the broad topics of the corpus are researched instead,
+either in one research loop or, with ``--set supervisor_enabled=true``, by
+the supervisor in parallel subtopics.
+
+Usage:
+    python -m benchmarks.run --llm-latency 0.5 --summary-latency 0.3 --search-latency 0.2
+    python -m benchmarks.run --broad --llm-latency 0.5 --set supervisor_enabled=true
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from agent import researcher_agent
+from cache import set_search_cache, set_summary_cache
+from configuration import Configuration
+from dedup import DedupStats, NearDuplicateIndex, get_dedup_stats, set_page_index
+from extraction import get_extraction_stats
+from replay import Cassette, CallLog, ReplayChatModel, install_replay
+from search_backends import FixtureSearchBackend
+from state import initial_researcher_state
+from supervisor import supervisor_agent
+from tracing import Tracer, use_tracer
+from benchmarks.scripted import compression_responder, make_research_responder, summarization_responder
+
+DEFAULT_CORPUS = Path(__file__).parent / "fixtures" / "corpus.json"
+
+# ===== MEASUREMENT =====
+
+class NodeTimer(BaseCallbackHandler):
+    """Callback handler that measures the wall time of every graph node run."""
+
+    def __init__(self):
+        self.starts: dict[Any, tuple[str, float]] = {}
+        self.runs: list[dict] = []
+
+    def on_chain_start(self, serialized, inputs, *, run_id, metadata=None, **kwargs):
+        node = (metadata or {}).get("langgraph_node")
+        if node is not None and kwargs.get("name") == node:
+            self.starts[run_id] = (node, time.perf_counter())
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        if run_id in self.starts:
+            node, start = self.starts.pop(run_id)
+            self.runs.append({"node": node, "seconds": time.perf_counter() - start})
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self.on_chain_end(None, run_id=run_id)
+
+def summarize_runs(timer: NodeTimer, call_log: CallLog, search_backend: FixtureSearchBackend) -> dict:
+    """Aggregate node timings and model calls into a report section."""
+    nodes: dict[str, dict] = defaultdict(lambda: {"runs": 0, "seconds": 0.0})
+    for run in timer.runs:
+        nodes[run["node"]]["runs"] += 1
+        nodes[run["node"]]["seconds"] += run["seconds"]
+
+    models: dict[str, dict] = defaultdict(
+        lambda: {"calls": 0, "input_tokens": 0, "output_tokens": 0, "seconds": 0.0}
+    )
+    for call in call_log.calls:
+        # Summarization runs inside tool_node but is reported on its own
+        bucket = "summarization" if call["model"] == "summarization" and call["node"] == "tool_node" else call["node"]
+        for key in ("input_tokens", "output_tokens", "seconds"):
+            models[bucket][key] += call[key]
+        models[bucket]["calls"] += 1
+
+    return {
+        "nodes": {name: {**stats, "seconds": round(stats["seconds"], 3)} for name, stats in nodes.items()},
+        "model_calls": {name: {**stats, "seconds": round(stats["seconds"], 3)} for name, stats in models.items()},
+        "search_calls": len(search_backend.calls),
+    }
+
+def fact_recall(key_facts: list[str], report: str) -> Optional[float]:
+    """Return the share of a topic's key facts found verbatim in the report, a proxy for its quality."""
+    if not key_facts:
+        return None
+    return round(sum(fact in report for fact in key_facts) / len(key_facts), 3)
+
+def summarize_duplicates(before: DedupStats, after: DedupStats) -> dict:
+    """Report the summarization calls duplicate detection avoided between two snapshots."""
+    return {
+        "url_duplicates": after.url_duplicates - before.url_duplicates,
+        "near_duplicates": after.near_duplicates - before.near_duplicates,
+        "reused_summaries": after.reused_summaries - before.reused_summaries,
+        "summaries_avoided": after.avoided_summaries - before.avoided_summaries,
+    }
+
+# ===== BENCHMARK =====
+
+async def run_benchmark(
+    corpus_path: Path = DEFAULT_CORPUS,
+    cassette_path: Optional[Path] = None,
+    llm_latency: float = 0.0,
+    summary_latency: float = 0.0,
+    compress_latency: float = 0.0,
+    latency_per_output_token: float = 0.0,
+    search_latency: float = 0.0,
+    configurable: Optional[dict] = None,
+    broad: bool = False,
+) -> dict:
+    """Run the research graph offline over every topic of a corpus.
+
+    Args:
+        corpus_path: Fixture corpus with topics and search responses
+        cassette_path: Optional cassette of recorded model responses to replay first
+        llm_latency: Simulated latency in seconds of each research model call
+        summary_latency: Simulated latency in seconds of each summarization call
+        compress_latency: Simulated latency in seconds of each compression call
+        latency_per_output_token: Simulated generation time per output token
+        search_latency: Simulated latency in seconds of each search request
+        configurable: Configuration overrides passed to the graph
+        broad: Research the corpus's broad topics instead of its topics
+
+    Returns:
+        Benchmark report with per-topic and total timings, calls and tokens
+    """
+    corpus = json.loads(Path(corpus_path).read_text())
+    cassette = Cassette(cassette_path)
+
+    def replay_model(role: str, latency: float, responder, call_log: CallLog) -> ReplayChatModel:
+        return ReplayChatModel(
+            model=role,
+            cassette=cassette,
+            responder=responder,
+            latency=latency,
+            latency_per_output_token=latency_per_output_token,
+            call_log=call_log,
+        )
+
+    # Caches would turn every repeated run into lookups, so they stay off
+    set_summary_cache(None)
+    set_search_cache(None)
+
+    # Near-duplicate summaries are shared across topics as across the runs of a batch
+    settings = Configuration.from_runnable_config({"configurable": configurable or {}})
+    set_page_index(
+        NearDuplicateIndex(threshold=settings.near_duplicate_threshold)
+        if settings.near_duplicate_scope == "batch" else None
+    )
+
+    graph = supervisor_agent if settings.supervisor_enabled else researcher_agent
+    report: dict[str, Any] = {"topics": []}
+    for topic in corpus["broad_topics" if broad else "topics"]:
+        call_log = CallLog()
+        search_backend = FixtureSearchBackend(corpus["search_responses"], latency=search_latency)
+        install_replay(
+            {
+                "research": replay_model("research", llm_latency, make_research_responder(corpus), call_log),
+                "summarization": replay_model("summarization", summary_latency, summarization_responder, call_log),
+                "compression": replay_model("compression", compress_latency, compression_responder, call_log),
+            },
+            search_backend=search_backend,
+        )
+        timer = NodeTimer()
+        duplicates_before = get_dedup_stats()
+        extraction_before = get_extraction_stats()
+
+        tracer = Tracer(name=topic["id"])
+
+        start = time.perf_counter()
+        with use_tracer(tracer):
+            result = await graph.ainvoke(
+                initial_researcher_state(topic["topic"]),
+                {"configurable": configurable or {}, "callbacks": [timer]},
+            )
+        wall_seconds = time.perf_counter() - start
+        trace_totals = tracer.summary()["totals"]
+
+        report["topics"].append({
+            "id": topic["id"],
+            "wall_seconds": round(wall_seconds, 3),
+            **summarize_runs(timer, call_log, search_backend),
+            "duplicates": summarize_duplicates(duplicates_before, get_dedup_stats()),
+            "extraction_tokens_saved": get_extraction_stats().tokens_saved - extraction_before.tokens_saved,
+            "fallbacks": trace_totals["fallbacks"],
+            "hedged_calls": trace_totals["hedged_calls"],
+            "fact_recall": fact_recall(topic.get("key_facts", []), result["compressed_research"]),
+        })
+
+    report["total_wall_seconds"] = round(sum(topic["wall_seconds"] for topic in report["topics"]), 3)
+    report["total_model_calls"] = sum(
+        stats["calls"] for topic in report["topics"] for stats in topic["model_calls"].values()
+    )
+    report["total_summaries_avoided"] = sum(
+        topic["duplicates"]["summaries_avoided"] for topic in report["topics"]
+    )
+    report["total_extraction_tokens_saved"] = sum(topic["extraction_tokens_saved"] for topic in report["topics"])
+    report["total_fallbacks"] = sum(topic["fallbacks"] for topic in report["topics"])
+    recalls = [topic["fact_recall"] for topic in report["topics"] if topic["fact_recall"] is not None]
+    report["mean_fact_recall"] = round(sum(recalls) / len(recalls), 3) if recalls else None
+    report["total_tokens"] = sum(
+        stats["input_tokens"] + stats["output_tokens"]
+        for topic in report["topics"] for stats in topic["model_calls"].values()
+    )
+    return report
+
+def print_report(report: dict) -> None:
+    """Print a compact per-topic table of node timings and model calls."""
+    for topic in report["topics"]:
+        print(
+            f"\n{topic['id']}: {topic['wall_seconds']}s wall, {topic['search_calls']} searches, "
+            f"fact recall {topic['fact_recall']}"
+        )
+        for name, stats in sorted(topic["nodes"].items()):
+            print(f"  node  {name:<20} runs={stats['runs']:<3} seconds={stats['seconds']}")
+        for name, stats in sorted(topic["model_calls"].items()):
+            print(
+                f"  model {name:<20} calls={stats['calls']:<3} "
+                f"in={stats['input_tokens']:<7} out={stats['output_tokens']:<7} seconds={stats['seconds']}"
+            )
+        duplicates = topic["duplicates"]
+        print(
+            f"  dedup summaries avoided={duplicates['summaries_avoided']} (url={duplicates['url_duplicates']} "
+            f"near={duplicates['near_duplicates']} reused={duplicates['reused_summaries']})"
+        )
+        print(f"  extraction tokens saved={topic['extraction_tokens_saved']}")
+        print(f"  deadline fallbacks={topic['fallbacks']} hedged calls={topic['hedged_calls']}")
+    print(
+        f"\nTotal: {report['total_wall_seconds']}s wall, "
+        f"{report['total_model_calls']} model calls, {report['total_tokens']} simulated tokens, "
+        f"{report['total_summaries_avoided']} summarization calls avoided by duplicate detection, "
+        f"{report['total_extraction_tokens_saved']} page tokens removed by content extraction, "
+        f"{report['total_fallbacks']} fallbacks, "
+        f"mean fact recall {report['mean_fact_recall']}"
+    )
+
+def parse_overrides(values: list[str]) -> dict:
+    """Parse ``key=value`` configuration overrides, decoding JSON values where possible."""
+    overrides = {}
+    for item in values:
+        key, _, value = item.partition("=")
+        try:
+            overrides[key] = json.loads(value)
+        except json.JSONDecodeError:
+            overrides[key] = value
+    return overrides
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark of the research graph")
+    parser.add_argument("--corpus", type=Path, default=DEFAULT_CORPUS, help="Fixture corpus JSON file")
+    parser.add_argument("--cassette", type=Path, help="Cassette of recorded model responses to replay")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Seconds per research model call")
+    parser.add_argument("--summary-latency", type=float, default=0.0, help="Seconds per summarization call")
+    parser.add_argument("--compress-latency", type=float, default=0.0, help="Seconds per compression call")
+    parser.add_argument("--latency-per-output-token", type=float, default=0.0, help="Seconds per simulated output token")
+    parser.add_argument("--search-latency", type=float, default=0.0, help="Seconds per search request")
+    parser.add_argument("--broad", action="store_true", help="Research the broad topics of the corpus")
+    parser.add_argument("--set", dest="overrides", action="append", default=[], metavar="KEY=VALUE", help="Configuration override")
+    parser.add_argument("--output", type=Path, help="Write the JSON report to this file")
+    parser.add_argument("--max-wall-seconds", type=float, help="Exit with an error if total wall time exceeds this")
+    args = parser.parse_args()
+    configurable = parse_overrides(args.overrides)
+    process_wide = sorted(Configuration.process_wide_fields() & set(configurable))
+    if process_wide:
+        parser.error(
+            f"--set cannot change process-wide settings ({', '.join(process_wide)}); "
+            f"set {', '.join(name.upper() for name in process_wide)} in the environment instead"
+        )
+
+    report = asyncio.run(run_benchmark(
+        corpus_path=args.corpus,
+        cassette_path=args.cassette,
+        llm_latency=args.llm_latency,
+        summary_latency=args.summary_latency,
+        compress_latency=args.compress_latency,
+        latency_per_output_token=args.latency_per_output_token,
+        search_latency=args.search_latency,
+        configurable=configurable,
+        broad=args.broad,
+    ))
+    print_report(report)
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+    if args.max_wall_seconds is not None and report["total_wall_seconds"] > args.max_wall_seconds:
+        print(f"Wall time {report['total_wall_seconds']}s exceeds the {args.max_wall_seconds}s budget")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
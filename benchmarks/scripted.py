@@ -0,0 +1,101 @@
+"""Scripted model responders for offline benchmarks.
+
+These responders produce deterministic synthetic responses from the fixture
+corpus, so the research graph can run end to end without recordings. The
+research responder follows the research prompt: it searches the topic's
+queries in order, reflects with think_tool after each search, and stops once
+the queries are exhausted.
+"""
+
+import re
+
+from langchain_core.messages import AIMessage, BaseMessage
+
+from state import Subtopics, Summary
+
+def message_text(messages: list[BaseMessage]) -> str:
+    """Concatenate message contents and tool call arguments into one string."""
+    return "\n".join(
+        f"{m.content}\n{getattr(m, 'tool_calls', None) or ''}" for m in messages
+    )
+
+def make_research_responder(corpus: dict):
+    """Build a responder for the research model that walks the corpus queries.
+
+    Asked for subtopics by the supervisor, it returns the ``subtopics`` of a
+    broad topic, or the topic itself. Under the fast mode prompt, it reflects
+    in the same turn as its next search but runs the same queries, so fast
+    mode cannot change its fact recall; only call counts and latency are
+    measured.
+
+    Args:
+        corpus: Fixture corpus with ``topics`` (and optionally ``broad_topics``)
+            entries listing their ``queries``
+
+    Returns:
+        Responder function for ``ReplayChatModel``
+    """
+    def respond(messages: list[BaseMessage], **kwargs) -> AIMessage:
+        text = message_text(messages)
+        # The topic is named in the first request, later results may mention other topics
+        request = next((str(m.content) for m in messages if m.type == "human"), "")
+        topic = next((t for t in corpus["topics"] + corpus.get("broad_topics", []) if t["topic"] in request), None)
+        queries = topic["queries"] if topic else []
+
+        if kwargs.get("structured_output") is Subtopics:
+            subtopics = topic.get("subtopics") or [topic["topic"]] if topic else []
+            return AIMessage(content=Subtopics(subtopics=subtopics).model_dump_json())
+
+        # Queries already searched, including ones folded into a digest
+        searched = [query for query in queries if query in text]
+        last = messages[-1]
+        step = len([m for m in messages if m.type == "ai"])
+        fast = "in the same response as your next tavily_search" in str(messages[0].content)
+        reflection = f"Searched {len(searched)} of {len(queries)} planned queries; assessing gaps."
+        think_call = {"name": "think_tool", "args": {"reflection": reflection}, "id": f"call_{step}_think"}
+        after_search = last.type == "tool" and last.name == "tavily_search"
+
+        if after_search and not fast:
+            return AIMessage(content="", tool_calls=[think_call])
+
+        remaining = [query for query in queries if query not in searched]
+        if remaining:
+            search_call = {"name": "tavily_search", "args": {"query": remaining[0]}, "id": f"call_{step}_search"}
+            return AIMessage(content="", tool_calls=[think_call, search_call] if after_search else [search_call])
+
+        return AIMessage(content="I have gathered enough information to answer the question.")
+
+    return respond
+
+def summarization_responder(messages: list[BaseMessage], **kwargs) -> AIMessage:
+    """Summarize a page by keeping its leading quarter and first sentence.
+
+    Unstructured calls are digest folds; they keep the tool call lines so the
+    research responder still sees which queries were searched.
+    """
+    prompt = str(messages[-1].content)
+    if kwargs.get("structured_output") is None:
+        kept = [line for line in prompt.splitlines() if line.startswith(("Tool calls:", "URL:"))]
+        return AIMessage(content="\n".join(kept))
+
+    match = re.search(r"<(webpage_content|partial_summaries)>\n(.*?)\n</\1>", prompt, re.S)
+    content = match.group(2).strip() if match else prompt
+    first_sentence = content.split(". ")[0]
+    summary = Summary(summary=content[: max(200, len(content) // 4)], key_excerpts=first_sentence)
+    return AIMessage(content=summary.model_dump_json())
+
+def compression_responder(messages: list[BaseMessage], **kwargs) -> AIMessage:
+    """Compress research by keeping earlier findings and the summaries in tool results.
+
+    Merges of subtopic findings keep the findings of every subtopic.
+    """
+    text = message_text(messages)
+    previous = re.search(r"<compressed_findings>\n(.*?)\n</compressed_findings>", text, re.S)
+    summaries = re.findall(r"<summary>\n(.*?)\n</summary>", text, re.S) or [
+        findings.split("### Sources")[0].strip()
+        for findings in re.findall(r"<subtopic_research>\n(.*?)\n</subtopic_research>", text, re.S)
+    ]
+    sources = sorted(set(re.findall(r"(?:URL: |^\[\d+\] )(\S+)", text, re.M)))
+    findings = "\n\n".join(([previous.group(1)] if previous else []) + summaries) or "No findings."
+    source_list = "\n".join(f"[{i}] {url}" for i, url in enumerate(sources, 1))
+    return AIMessage(content=f"**Fully Comprehensive Findings**\n\n{findings}\n\n### Sources\n{source_list}")
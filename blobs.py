@@ -0,0 +1,252 @@
+"""Out-of-Band Blob Store.
+
+This module keeps large tool outputs, such as the summarized search results,
+out of the graph state. ``tool_node`` writes each large output once to a
+content-addressed store on disk and keeps only a short stub in the
+ToolMessage, with the blob reference in the message's ``artifact``. Prompts
+and the final output call ``materialize_messages`` to swap the stubs back for
+the full text right before they need it, so the state, and every checkpoint
+of it, stays small however many pages a run reads.
+
+The ``researcher_messages`` a run returns hold the stubs as well; callers
+that want the full tool outputs pass them through ``materialize_messages``.
+Likewise, the ``raw_notes`` of a run refer to out-of-band outputs by
+placeholder, and ``materialize_notes`` expands them when output is written.
+
+The store exists to keep checkpoints small, so it is only used by processes
+with checkpointing enabled.
+
+Blobs that no run has written for ``blob_store_max_age_days`` are pruned in
+a background thread when the store is first used, except those that stored
+checkpoints still reference.
+"""
+
+import hashlib
+import os
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Union
+
+from langchain_core.messages import BaseMessage
+
+from configuration import Configuration
+
+# ===== BLOB STORE =====
+
+class BlobStore:
+    """Content-addressed store of text blobs in zlib-compressed files.
+
+    Blobs are named by the SHA-256 of their text and sharded into
+    subdirectories by the first two hex digits. Writing the same text again
+    only refreshes the file's modification time, which ``prune`` uses to
+    expire blobs no run has written for a while. Recently read blobs are
+    kept decoded in memory.
+    """
+
+    def __init__(self, directory: Union[str, Path], memory_entries: int = 64):
+        self.directory = Path(directory)
+        self.memory_entries = memory_entries
+        self._memory: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, digest: str) -> Path:
+        return self.directory / digest[:2] / digest[2:]
+
+    def _remember(self, digest: str, text: str) -> None:
+        with self._lock:
+            self._memory[digest] = text
+            self._memory.move_to_end(digest)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def put(self, text: str) -> str:
+        """Store a text blob and return its digest."""
+        data = text.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+        if path.exists():
+            os.utime(path)
+        else:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Write to a temporary file first so readers never see a partial blob
+            temp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            temp_path.write_bytes(zlib.compress(data, 1))
+            os.replace(temp_path, path)
+        return digest
+
+    def get(self, digest: str) -> Optional[str]:
+        """Return the text of a blob, or None if it is not in the store."""
+        with self._lock:
+            text = self._memory.get(digest)
+        if text is not None:
+            return text
+        try:
+            text = zlib.decompress(self._path(digest).read_bytes()).decode("utf-8")
+        except FileNotFoundError:
+            return None
+        self._remember(digest, text)
+        return text
+
+    def prune(self, max_age: float, keep: Optional[set[str]] = None) -> int:
+        """Delete blobs not written for ``max_age`` seconds and return how many were deleted.
+
+        Args:
+            max_age: Age in seconds after which a blob is deleted
+            keep: Digests of blobs never to delete, e.g. those checkpoints reference
+        """
+        cutoff = time.time() - max_age
+        deleted = 0
+        for path in self.directory.glob("*/*"):
+            if path.name.endswith(".tmp") or (keep and path.parent.name + path.name in keep):
+                continue
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    deleted += 1
+            except FileNotFoundError:
+                continue
+        return deleted
+
+# ===== MESSAGE REFERENCES =====
+
+def blob_reference(message: BaseMessage) -> Optional[dict]:
+    """Return the blob reference of a message whose content is stored out of band, if any."""
+    artifact = getattr(message, "artifact", None)
+    if isinstance(artifact, dict) and "blob" in artifact:
+        return artifact
+    return None
+
+def offload_message(message: BaseMessage, store: BlobStore, min_chars: int) -> BaseMessage:
+    """Move the content of a large message into the blob store.
+
+    Args:
+        message: Message to offload, typically a ToolMessage
+        store: Blob store to write the content to
+        min_chars: Minimum content length worth storing out of band
+
+    Returns:
+        The message with a stub as content and the blob reference as
+        ``artifact``, or the message unchanged if it is small
+    """
+    content = message.content
+    if not isinstance(content, str) or len(content) < min_chars or blob_reference(message):
+        return message
+
+    from tools import estimate_tokens
+
+    digest = store.put(content)
+    return message.model_copy(update={
+        "content": f"[Output stored out of band: {len(content)} characters, blob {digest[:16]}]",
+        "artifact": {"blob": digest, "tokens": estimate_tokens(content)},
+    })
+
+def materialize_messages(messages: list) -> list:
+    """Return the messages with out-of-band contents loaded back from the blob store.
+
+    A blob that can no longer be found leaves the stub in place, with a warning.
+    """
+    if not any(blob_reference(message) for message in messages):
+        return messages
+    store = get_blob_store()
+    materialized = []
+    for message in messages:
+        reference = blob_reference(message)
+        content = store.get(reference["blob"]) if reference and store is not None else None
+        if reference and content is None:
+            print(f"Warning: blob {reference['blob'][:16]} is missing, the message keeps its stub")
+        materialized.append(message if content is None else message.model_copy(update={"content": content}))
+    return materialized
+
+# ===== RAW NOTES =====
+
+# Placeholder standing for the content of an out-of-band message in raw notes
+NOTE_REFERENCE_PATTERN = re.compile(r"\[\[blob:([0-9a-f]{64})\]\]")
+
+def note_content(message: BaseMessage) -> str:
+    """Return a message's content for the raw notes, as a placeholder if it is stored out of band."""
+    reference = blob_reference(message)
+    return f"[[blob:{reference['blob']}]]" if reference else str(message.content)
+
+def materialize_notes(notes: list[str]) -> list[str]:
+    """Return raw notes with the placeholders of out-of-band contents replaced by the contents.
+
+    A blob that can no longer be found leaves its placeholder in place, with a warning.
+    """
+    if not any(NOTE_REFERENCE_PATTERN.search(note) for note in notes):
+        return notes
+    store = get_blob_store()
+
+    def load(match: re.Match) -> str:
+        content = store.get(match.group(1)) if store is not None else None
+        if content is None:
+            print(f"Warning: blob {match.group(1)[:16]} is missing, the raw notes keep its placeholder")
+            return match.group(0)
+        return content
+
+    return [NOTE_REFERENCE_PATTERN.sub(load, note) for note in notes]
+
+# ===== BLOB STORE REGISTRY =====
+
+_blob_store: Optional[BlobStore] = None
+_blob_store_initialized = False
+
+def get_blob_store() -> Optional[BlobStore]:
+    """Return the process-wide blob store, or None if out-of-band storage or checkpointing is disabled."""
+    global _blob_store, _blob_store_initialized
+    if not _blob_store_initialized:
+        configurable = Configuration.from_runnable_config()
+        if configurable.blob_store_enabled and configurable.checkpoint_enabled:
+            _blob_store = BlobStore(Path(configurable.cache_dir) / "blobs")
+            # Pruning walks the whole store, so it must not hold up the run that triggered it
+            threading.Thread(
+                target=prune_blob_store,
+                args=(_blob_store, configurable.blob_store_max_age_days * 86400),
+                name="blob-store-prune",
+                daemon=True,
+            ).start()
+        _blob_store_initialized = True
+    return _blob_store
+
+def prune_blob_store(store: BlobStore, max_age: float) -> int:
+    """Delete expired blobs that no stored checkpoint references.
+
+    The references are read from the configured checkpointer, or from the
+    checkpoint database directly, so threads checkpointed earlier stay
+    resumable. With a checkpointer that cannot list its references, nothing
+    is deleted.
+
+    Args:
+        store: Blob store to prune
+        max_age: Age in seconds after which an unreferenced blob is deleted
+
+    Returns:
+        Number of deleted blobs
+    """
+    from checkpoints import SQLiteCheckpointSaver, checkpoint_database_path, get_checkpointer
+
+    try:
+        checkpointer = get_checkpointer()
+        if checkpointer is None and checkpoint_database_path().exists():
+            checkpointer = SQLiteCheckpointSaver(checkpoint_database_path())
+        if checkpointer is not None and not hasattr(checkpointer, "referenced_blobs"):
+            return 0
+        keep = checkpointer.referenced_blobs() if checkpointer is not None else set()
+        return store.prune(max_age, keep=keep)
+    except Exception as e:
+        print(f"Failed to prune blob store: {str(e)}")
+        return 0
+
+def set_blob_store(store: Optional[BlobStore]) -> None:
+    """Install a blob store for the whole process.
+
+    Args:
+        store: Blob store to use, or None to keep tool outputs inline
+    """
+    global _blob_store, _blob_store_initialized
+    _blob_store = store
+    _blob_store_initialized = True
@@ -0,0 +1,407 @@
+"""Persistent Caches.
+
+This module provides the on-disk caches used to avoid repeating expensive
+external calls across research runs. Entries live in a SQLite database in WAL
+mode, so a single cache file can be shared by concurrent runs and processes.
+"""
+
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import closing
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Union
+
+from configuration import Configuration
+
+# ===== CACHE STATISTICS =====
+
+@dataclass
+class CacheStats:
+    """Hit, miss and eviction counters for a cache in this process."""
+    hits: int = 0
+    misses: int = 0
+    writes: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups that were served from the cache."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+# ===== SQLITE STORE =====
+
+class SQLiteCache:
+    """String key/value cache stored in a SQLite table with LRU eviction.
+
+    Entries older than ``max_age`` seconds are treated as misses and removed.
+    When the table grows beyond ``max_entries`` rows or ``max_bytes`` of
+    stored values, the least recently used entries are evicted.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        table: str,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        max_age: Optional[float] = None,
+    ):
+        self.path = Path(path)
+        self.table = table
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS {table}_accessed_at ON {table} (accessed_at)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection; short-lived connections keep the cache process- and thread-safe."""
+        return sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+
+    def _record(self, **counts: int) -> None:
+        with self._lock:
+            for name, value in counts.items():
+                setattr(self.stats, name, getattr(self.stats, name) + value)
+
+    def get(self, key: str, max_age: Optional[float] = None) -> Optional[str]:
+        """Look up a cached value and mark it as recently used.
+
+        Args:
+            key: Cache key
+            max_age: Optional maximum entry age in seconds, overriding the cache default
+
+        Returns:
+            The cached value, or None on a miss or an expired entry
+        """
+        entry = self.get_entry(key, max_age=max_age)
+        return entry[0] if entry is not None else None
+
+    def get_entry(self, key: str, max_age: Optional[float] = None) -> Optional[tuple[str, float]]:
+        """Look up a cached value together with the time it was stored.
+
+        Args:
+            key: Cache key
+            max_age: Optional maximum entry age in seconds, overriding the cache default
+
+        Returns:
+            Tuple of the cached value and its creation timestamp, or None on a
+            miss or an expired entry
+        """
+        max_age = max_age if max_age is not None else self.max_age
+        now = time.time()
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                f"SELECT value, created_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self._record(misses=1)
+                return None
+
+            value, created_at = row
+            if max_age is not None and now - created_at > max_age:
+                conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                self._record(misses=1, evictions=1)
+                return None
+
+            conn.execute(
+                f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+
+        self._record(hits=1)
+        return value, created_at
+
+    def set(self, key: str, value: str) -> None:
+        """Store a value and evict old or least recently used entries if needed.
+
+        Args:
+            key: Cache key
+            value: Value to store
+        """
+        now = time.time()
+        with closing(self._connect()) as conn:
+            conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} "
+                "(key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value.encode("utf-8")), now, now),
+            )
+            evicted = self._evict(conn, now)
+
+        self._record(writes=1, evictions=evicted)
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> int:
+        """Remove expired entries, then least recently used ones until within limits."""
+        evicted = 0
+        if self.max_age is not None:
+            evicted += conn.execute(
+                f"DELETE FROM {self.table} WHERE created_at < ?", (now - self.max_age,)
+            ).rowcount
+
+        if self.max_entries is None and self.max_bytes is None:
+            return evicted
+
+        count, total_bytes = conn.execute(
+            f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self.table}"
+        ).fetchone()
+        over_entries = self.max_entries is not None and count > self.max_entries
+        over_bytes = self.max_bytes is not None and total_bytes > self.max_bytes
+        if not (over_entries or over_bytes):
+            return evicted
+
+        # Walk entries from least to most recently used until both limits hold
+        victims = []
+        for key, size in conn.execute(
+            f"SELECT key, size FROM {self.table} ORDER BY accessed_at ASC"
+        ):
+            if not over_entries and not over_bytes:
+                break
+            victims.append((key,))
+            count -= 1
+            total_bytes -= size
+            over_entries = self.max_entries is not None and count > self.max_entries
+            over_bytes = self.max_bytes is not None and total_bytes > self.max_bytes
+
+        conn.executemany(f"DELETE FROM {self.table} WHERE key = ?", victims)
+        return evicted + len(victims)
+
+    def clear(self) -> None:
+        """Remove every entry from the cache."""
+        with closing(self._connect()) as conn:
+            conn.execute(f"DELETE FROM {self.table}")
+
+    def __len__(self) -> int:
+        with closing(self._connect()) as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+# ===== SUMMARY CACHE =====
+
+class SummaryCache(SQLiteCache):
+    """Content-addressed cache of webpage summaries.
+
+    Keys combine a hash of the page content, a hash of the summarization prompt
+    template and the model name, so editing the prompt or switching models
+    never serves a stale summary.
+    """
+
+    def __init__(self, path: Union[str, Path], **kwargs):
+        super().__init__(path, table="webpage_summaries", **kwargs)
+
+    @staticmethod
+    def make_key(webpage_content: str, prompt: str, model: str) -> str:
+        """Build the cache key for a page summarized with a given prompt and model.
+
+        Args:
+            webpage_content: Raw webpage content being summarized
+            prompt: Summarization prompt template
+            model: Name of the summarization model
+
+        Returns:
+            Hex digest identifying the summary
+        """
+        content_hash = hashlib.sha256(webpage_content.encode("utf-8")).hexdigest()
+        prompt_version = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:16]
+        return hashlib.sha256(
+            f"{content_hash}:{prompt_version}:{model}".encode("utf-8")
+        ).hexdigest()
+
+# ===== SEARCH CACHE =====
+
+class SearchCache:
+    """Two-tier TTL cache of search responses.
+
+    A bounded in-memory LRU tier answers repeated queries within a process, and
+    a SQLite tier shares responses across runs and processes. Entries expire
+    after a per-topic TTL, so fast-moving ``news`` and ``finance`` results are
+    refreshed much sooner than ``general`` ones.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        ttls: dict[str, float],
+        default_ttl: float = 3600,
+        memory_entries: int = 256,
+        max_entries: Optional[int] = None,
+    ):
+        self.ttls = ttls
+        self.default_ttl = default_ttl
+        self.memory_entries = memory_entries
+        self.stats = CacheStats()
+        self._memory: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.disk = SQLiteCache(
+            path,
+            table="search_results",
+            max_entries=max_entries,
+            max_age=max([default_ttl, *ttls.values()]),
+        )
+
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        """Normalize a query so that case and whitespace differences share an entry."""
+        return re.sub(r"\s+", " ", query).strip().casefold()
+
+    @classmethod
+    def make_key(
+        cls,
+        query: str,
+        max_results: int,
+        topic: str,
+        include_raw_content: bool,
+    ) -> str:
+        """Build the cache key for a search request.
+
+        Args:
+            query: Search query
+            max_results: Maximum number of results requested
+            topic: Topic filter of the search
+            include_raw_content: Whether raw webpage content was requested
+
+        Returns:
+            Hex digest identifying the request
+        """
+        payload = json.dumps(
+            [cls.normalize_query(query), max_results, topic, include_raw_content]
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def ttl_for(self, topic: str) -> float:
+        """Return the time-to-live in seconds for responses of a topic."""
+        return self.ttls.get(topic, self.default_ttl)
+
+    def get(self, key: str, topic: str) -> Optional[dict]:
+        """Look up a search response in the memory tier, then the disk tier.
+
+        Args:
+            key: Key built with ``make_key``
+            topic: Topic filter of the search, selecting the TTL
+
+        Returns:
+            The cached response, or None on a miss or an expired entry
+        """
+        ttl = self.ttl_for(topic)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                stored_at, response = entry
+                if now - stored_at <= ttl:
+                    self._memory.move_to_end(key)
+                    self.stats.hits += 1
+                    return response
+                del self._memory[key]
+
+        disk_entry = self.disk.get_entry(key, max_age=ttl)
+        if disk_entry is None:
+            with self._lock:
+                self.stats.misses += 1
+            return None
+
+        # Promote disk hits to the memory tier, keeping their original age
+        value, stored_at = disk_entry
+        response = json.loads(value)
+        self._remember(key, response, stored_at)
+        with self._lock:
+            self.stats.hits += 1
+        return response
+
+    def set(self, key: str, response: dict) -> None:
+        """Store a search response in both tiers.
+
+        Args:
+            key: Key built with ``make_key``
+            response: Search response returned by the backend
+        """
+        self._remember(key, response, time.time())
+        self.disk.set(key, json.dumps(response))
+        with self._lock:
+            self.stats.writes += 1
+
+    def _remember(self, key: str, response: dict, stored_at: float) -> None:
+        with self._lock:
+            self._memory[key] = (stored_at, response)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+                self.stats.evictions += 1
+
+# ===== CACHE REGISTRY =====
+
+_summary_cache: Optional[SummaryCache] = None
+_summary_cache_initialized = False
+
+def get_summary_cache() -> Optional[SummaryCache]:
+    """Return the process-wide summary cache, or None if caching is disabled."""
+    global _summary_cache, _summary_cache_initialized
+    if not _summary_cache_initialized:
+        configurable = Configuration.from_runnable_config()
+        if configurable.summary_cache_enabled:
+            _summary_cache = SummaryCache(
+                Path(configurable.cache_dir) / "cache.sqlite3",
+                max_entries=configurable.summary_cache_max_entries,
+                max_bytes=configurable.summary_cache_max_bytes,
+                max_age=configurable.summary_cache_max_age_days * 86400,
+            )
+        _summary_cache_initialized = True
+    return _summary_cache
+
+def set_summary_cache(cache: Optional[SummaryCache]) -> None:
+    """Install a summary cache for the whole process.
+
+    Args:
+        cache: Cache to use, or None to disable summary caching
+    """
+    global _summary_cache, _summary_cache_initialized
+    _summary_cache = cache
+    _summary_cache_initialized = True
+
+_search_cache: Optional[SearchCache] = None
+_search_cache_initialized = False
+
+def get_search_cache() -> Optional[SearchCache]:
+    """Return the process-wide search cache, or None if caching is disabled."""
+    global _search_cache, _search_cache_initialized
+    if not _search_cache_initialized:
+        configurable = Configuration.from_runnable_config()
+        if configurable.search_cache_enabled:
+            _search_cache = SearchCache(
+                Path(configurable.cache_dir) / "cache.sqlite3",
+                ttls={
+                    "general": configurable.search_cache_ttl_general,
+                    "news": configurable.search_cache_ttl_news,
+                    "finance": configurable.search_cache_ttl_finance,
+                },
+                default_ttl=configurable.search_cache_ttl_general,
+                memory_entries=configurable.search_cache_memory_entries,
+                max_entries=configurable.search_cache_max_entries,
+            )
+        _search_cache_initialized = True
+    return _search_cache
+
+def set_search_cache(cache: Optional[SearchCache]) -> None:
+    """Install a search cache for the whole process.
+
+    Args:
+        cache: Cache to use, or None to disable search caching
+    """
+    global _search_cache, _search_cache_initialized
+    _search_cache = cache
+    _search_cache_initialized = True
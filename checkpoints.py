@@ -0,0 +1,392 @@
+"""Durable Checkpoints.
+
+This module provides the SQLite checkpointer that makes research runs
+resumable. With checkpointing enabled, LangGraph saves a checkpoint after
+every step of a run under the run's thread id, together with the writes of
+nodes that finished within a step. Invoking the graph again with the same
+thread id and no input resumes from the last completed node, so searches and
+summaries that were already paid for are not repeated.
+
+Checkpoints are kept compact so that writing one per step stays cheap: a
+channel value is only stored when its version changes, large values are
+zlib-compressed, and message lists are stored as references to messages that
+are written once per thread instead of once per step.
+"""
+
+import asyncio
+import hashlib
+import json
+import random
+import re
+import sqlite3
+import threading
+import zlib
+from contextlib import closing
+from pathlib import Path
+from typing import Any, AsyncIterator, Iterator, Optional, Sequence, Union
+
+from langchain_core.messages import BaseMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+
+from configuration import Configuration
+
+# Serialized values larger than this many bytes are stored zlib-compressed
+COMPRESSION_THRESHOLD = 512
+
+# Blob type of a message list stored as references to the messages table
+MESSAGE_REFS_TYPE = "message_refs"
+
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS checkpoints ("
+    "thread_id TEXT NOT NULL, checkpoint_ns TEXT NOT NULL, checkpoint_id TEXT NOT NULL, "
+    "parent_checkpoint_id TEXT, type TEXT NOT NULL, compressed INTEGER NOT NULL, checkpoint BLOB NOT NULL, "
+    "metadata_type TEXT NOT NULL, metadata BLOB NOT NULL, "
+    "PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id))",
+    "CREATE TABLE IF NOT EXISTS checkpoint_blobs ("
+    "thread_id TEXT NOT NULL, checkpoint_ns TEXT NOT NULL, channel TEXT NOT NULL, version TEXT NOT NULL, "
+    "type TEXT NOT NULL, compressed INTEGER NOT NULL, value BLOB, "
+    "PRIMARY KEY (thread_id, checkpoint_ns, channel, version))",
+    "CREATE TABLE IF NOT EXISTS checkpoint_writes ("
+    "thread_id TEXT NOT NULL, checkpoint_ns TEXT NOT NULL, checkpoint_id TEXT NOT NULL, "
+    "task_id TEXT NOT NULL, idx INTEGER NOT NULL, channel TEXT NOT NULL, task_path TEXT NOT NULL, "
+    "type TEXT NOT NULL, compressed INTEGER NOT NULL, value BLOB, "
+    "PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx))",
+    "CREATE TABLE IF NOT EXISTS checkpoint_messages ("
+    "thread_id TEXT NOT NULL, digest TEXT NOT NULL, type TEXT NOT NULL, compressed INTEGER NOT NULL, "
+    "value BLOB NOT NULL, PRIMARY KEY (thread_id, digest))",
+]
+
+class SQLiteCheckpointSaver(BaseCheckpointSaver[str]):
+    """LangGraph checkpointer storing checkpoints in a SQLite database in WAL mode.
+
+    Like the caches, it opens a short-lived connection per operation, so one
+    database file can be shared by concurrent runs, threads and processes.
+    The async methods run the same operations in a worker thread.
+    """
+
+    def __init__(self, path: Union[str, Path], **kwargs: Any):
+        super().__init__(**kwargs)
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            for statement in SCHEMA:
+                conn.execute(statement)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30.0)
+
+    # Serialization
+
+    def _dump(self, value: Any) -> tuple[str, int, bytes]:
+        type_, data = self.serde.dumps_typed(value)
+        if len(data) > COMPRESSION_THRESHOLD:
+            return type_, 1, zlib.compress(data, 1)
+        return type_, 0, data
+
+    def _load(self, type_: str, compressed: int, data: bytes) -> Any:
+        return self.serde.loads_typed((type_, zlib.decompress(data) if compressed else data))
+
+    def _dump_channel_value(self, conn: sqlite3.Connection, thread_id: str, value: Any) -> tuple[str, int, bytes]:
+        """Serialize a channel value, storing the messages of message lists once per thread."""
+        if not (isinstance(value, list) and value and all(isinstance(m, BaseMessage) for m in value)):
+            return self._dump(value)
+
+        serialized = [self.serde.dumps_typed(message) for message in value]
+        digests = [
+            hashlib.sha256(type_.encode() + b"\0" + data).hexdigest()[:32] for type_, data in serialized
+        ]
+        stored = {
+            row[0] for row in conn.execute(
+                f"SELECT digest FROM checkpoint_messages WHERE thread_id = ? AND digest IN ({','.join('?' * len(digests))})",
+                (thread_id, *digests),
+            )
+        }
+        for digest, (type_, data) in zip(digests, serialized):
+            if digest in stored:
+                continue
+            compressed = len(data) > COMPRESSION_THRESHOLD
+            conn.execute(
+                "INSERT OR IGNORE INTO checkpoint_messages VALUES (?, ?, ?, ?, ?)",
+                (thread_id, digest, type_, int(compressed), zlib.compress(data, 1) if compressed else data),
+            )
+            stored.add(digest)
+        return MESSAGE_REFS_TYPE, 0, json.dumps(digests).encode()
+
+    def _load_channel_values(self, conn: sqlite3.Connection, thread_id: str, checkpoint_ns: str, versions: ChannelVersions) -> dict[str, Any]:
+        values: dict[str, Any] = {}
+        for channel, version in versions.items():
+            row = conn.execute(
+                "SELECT type, compressed, value FROM checkpoint_blobs "
+                "WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?",
+                (thread_id, checkpoint_ns, channel, str(version)),
+            ).fetchone()
+            if row is None or row[0] == "empty":
+                continue
+            if row[0] == MESSAGE_REFS_TYPE:
+                digests = json.loads(row[2])
+                messages = {
+                    digest: self._load(type_, compressed, data)
+                    for digest, type_, compressed, data in conn.execute(
+                        "SELECT digest, type, compressed, value FROM checkpoint_messages "
+                        f"WHERE thread_id = ? AND digest IN ({','.join('?' * len(digests))})",
+                        (thread_id, *digests),
+                    )
+                }
+                values[channel] = [messages[digest] for digest in digests]
+            else:
+                values[channel] = self._load(*row)
+        return values
+
+    def _tuple_from_row(self, conn: sqlite3.Connection, row: tuple) -> CheckpointTuple:
+        thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, *checkpoint_blob, metadata_type, metadata_data = row
+        checkpoint = self._load(*checkpoint_blob)
+        writes = conn.execute(
+            "SELECT task_id, idx, channel, task_path, type, compressed, value FROM checkpoint_writes "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        ).fetchall()
+        # Pending writes are applied in task order, with each task's writes in
+        # the order it made them; idx already holds WRITES_IDX_MAP for special ones
+        writes.sort(key=lambda w: (w[0], w[1]))
+
+        return CheckpointTuple(
+            config={"configurable": {
+                "thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint_id,
+            }},
+            checkpoint={
+                **checkpoint,
+                "channel_values": self._load_channel_values(
+                    conn, thread_id, checkpoint_ns, checkpoint["channel_versions"]
+                ),
+            },
+            metadata=self.serde.loads_typed((metadata_type, metadata_data)),
+            parent_config=(
+                {"configurable": {
+                    "thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": parent_checkpoint_id,
+                }}
+                if parent_checkpoint_id else None
+            ),
+            pending_writes=[
+                (task_id, channel, self._load(type_, compressed, value))
+                for task_id, _, channel, _, type_, compressed, value in writes
+            ],
+        )
+
+    # Checkpointer interface
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        """Return the checkpoint of ``config``, or the thread's latest one if it names none."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        query = "SELECT * FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?"
+        params: tuple = (thread_id, checkpoint_ns)
+        if checkpoint_id := get_checkpoint_id(config):
+            query += " AND checkpoint_id = ?"
+            params += (checkpoint_id,)
+        with closing(self._connect()) as conn:
+            row = conn.execute(query + " ORDER BY checkpoint_id DESC LIMIT 1", params).fetchone()
+            return self._tuple_from_row(conn, row) if row is not None else None
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        """List checkpoints, newest first, matching the thread, metadata filter and bounds given."""
+        clauses, params = [], []
+        if config is not None:
+            clauses.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            if (checkpoint_ns := config["configurable"].get("checkpoint_ns")) is not None:
+                clauses.append("checkpoint_ns = ?")
+                params.append(checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                clauses.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before is not None and (before_id := get_checkpoint_id(before)):
+            clauses.append("checkpoint_id < ?")
+            params.append(before_id)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        with closing(self._connect()) as conn:
+            rows = conn.execute(f"SELECT * FROM checkpoints {where} ORDER BY checkpoint_id DESC", params).fetchall()
+            tuples = []
+            for row in rows:
+                if limit is not None and len(tuples) >= limit:
+                    break
+                if filter:
+                    metadata = self.serde.loads_typed((row[7], row[8]))
+                    if not all(metadata.get(key) == value for key, value in filter.items()):
+                        continue
+                tuples.append(self._tuple_from_row(conn, row))
+        yield from tuples
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """Store a checkpoint and the channel values whose versions changed with it."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint = checkpoint.copy()
+        values = checkpoint.pop("channel_values")  # type: ignore[misc]
+        metadata_type, metadata_data = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+
+        with self._lock, closing(self._connect()) as conn, conn:
+            for channel, version in new_versions.items():
+                blob = self._dump_channel_value(conn, thread_id, values[channel]) if channel in values else ("empty", 0, None)
+                conn.execute(
+                    "INSERT OR REPLACE INTO checkpoint_blobs VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (thread_id, checkpoint_ns, channel, str(version), *blob),
+                )
+            conn.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    thread_id, checkpoint_ns, checkpoint["id"], config["configurable"].get("checkpoint_id"),
+                    *self._dump(checkpoint), metadata_type, metadata_data,
+                ),
+            )
+
+        return {"configurable": {
+            "thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint["id"],
+        }}
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        """Store the writes of a task that finished within the current step."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        # Regular writes are never overwritten; special ones (errors, interrupts) are
+        replace = all(channel in WRITES_IDX_MAP for channel, _ in writes)
+        with self._lock, closing(self._connect()) as conn, conn:
+            conn.executemany(
+                f"INSERT OR {'REPLACE' if replace else 'IGNORE'} INTO checkpoint_writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        thread_id, checkpoint_ns, checkpoint_id, task_id, WRITES_IDX_MAP.get(channel, idx),
+                        channel, task_path, *self._dump(value),
+                    )
+                    for idx, (channel, value) in enumerate(writes)
+                ],
+            )
+
+    def delete_thread(self, thread_id: str) -> None:
+        """Delete every checkpoint, write and stored message of a thread."""
+        with self._lock, closing(self._connect()) as conn, conn:
+            for table in ("checkpoints", "checkpoint_blobs", "checkpoint_writes", "checkpoint_messages"):
+                conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+
+    def referenced_blobs(self) -> set[str]:
+        """Return the blob store digests that stored checkpoints may still reference.
+
+        Every stored message, channel value and pending write of every thread
+        is scanned for SHA-256 digests in its serialized form, so nothing a
+        checkpointed run can load is missed; unrelated digests only keep a
+        few extra blobs alive.
+        """
+        digests: set[str] = set()
+        with closing(self._connect()) as conn:
+            for table in ("checkpoint_messages", "checkpoint_blobs", "checkpoint_writes"):
+                for compressed, data in conn.execute(f"SELECT compressed, value FROM {table} WHERE value IS NOT NULL"):
+                    text = zlib.decompress(data) if compressed else data
+                    digests.update(match.decode() for match in re.findall(rb"[0-9a-f]{64}", text))
+        return digests
+
+    def get_next_version(self, current: Optional[str], channel: None = None) -> str:
+        """Return a version string that sorts after ``current``."""
+        current_version = 0 if current is None else int(str(current).split(".")[0])
+        return f"{current_version + 1:032}.{random.random():016}"
+
+    # Async interface
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        tuples = await asyncio.to_thread(
+            lambda: [*self.list(config, filter=filter, before=before, limit=limit)]
+        )
+        for checkpoint_tuple in tuples:
+            yield checkpoint_tuple
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+# ===== CHECKPOINTER REGISTRY =====
+
+_checkpointer: Optional[BaseCheckpointSaver] = None
+_checkpointer_initialized = False
+
+def checkpoint_database_path() -> Path:
+    """Return the path of the SQLite checkpoint database in the cache directory."""
+    return Path(Configuration.from_runnable_config().cache_dir) / "checkpoints.sqlite3"
+
+def get_checkpointer() -> Optional[BaseCheckpointSaver]:
+    """Return the process-wide checkpointer, or None if checkpointing is disabled."""
+    global _checkpointer, _checkpointer_initialized
+    if not _checkpointer_initialized:
+        configurable = Configuration.from_runnable_config()
+        if configurable.checkpoint_enabled:
+            _checkpointer = SQLiteCheckpointSaver(checkpoint_database_path())
+        _checkpointer_initialized = True
+    return _checkpointer
+
+def set_checkpointer(checkpointer: Optional[BaseCheckpointSaver]) -> None:
+    """Install a checkpointer for the whole process.
+
+    Args:
+        checkpointer: Checkpointer to use, or None to disable checkpointing
+    """
+    global _checkpointer, _checkpointer_initialized
+    _checkpointer = checkpointer
+    _checkpointer_initialized = True
@@ -0,0 +1,171 @@
+"""Lazy Client Factories.
+
+This module builds the chat models used by the agent and its tools on first
+use instead of at import time, so importing the agent is cheap and a missing
+API key only fails the first call that needs it. Which model serves a call is
+decided by the model routing (see routing.py); each model is built once per
+process and shared by the graph and the tools. ``warm_clients`` builds
+everything up front for long-lived processes, and ``set_chat_model`` installs
+stand-ins such as replay models. ``invoke_model`` calls a model through the
+rate limiter of its provider model and records the tokens it consumed in the
+usage tracked with ``track_token_usage``.
+"""
+
+import json
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Iterator, Optional
+
+# ===== CHAT MODELS =====
+
+_chat_models: dict[str, Any] = {}
+_overrides: dict[str, Any] = {}
+_lock = threading.Lock()
+
+def route_model(role: str, node: Optional[str] = None, **situation: Any) -> str:
+    """Return the model tier the routing configuration selects for a call.
+
+    Args:
+        role: Model role, one of ``research``, ``summarization`` or ``compression``
+        node: Graph node or tool step making the call, which may have a route of its own
+        **situation: Attributes of the call the routing rules can test, e.g.
+            ``iteration`` and ``input_tokens``
+
+    Returns:
+        Name of the model tier
+    """
+    from routing import get_model_routing
+
+    return get_model_routing().select(role, node, **situation)
+
+def model_spec(role: str, tier: Optional[str] = None) -> dict[str, Any]:
+    """Return the ``init_chat_model`` arguments of a tier, by default the role's default tier."""
+    from routing import get_model_routing
+
+    return get_model_routing().tiers[tier or route_model(role)]
+
+def model_name(role: str, tier: Optional[str] = None) -> str:
+    """Return the model name of a tier, by default the role's default tier."""
+    return model_spec(role, tier)["model"]
+
+def get_chat_model(role: str, tier: Optional[str] = None):
+    """Return the shared chat model for a role, building it on first use.
+
+    Tiers with the same specification share one model instance, whichever
+    roles use them. A model installed for the role with ``set_chat_model``
+    takes precedence over the routing.
+
+    Args:
+        role: Model role, one of ``research``, ``summarization`` or ``compression``
+        tier: Model tier selected with ``route_model``; defaults to the role's default tier
+
+    Returns:
+        Chat model instance for the role
+    """
+    model = _overrides.get(role)
+    if model is not None:
+        return model
+
+    spec = model_spec(role, tier)
+    key = json.dumps(spec, sort_keys=True)
+    model = _chat_models.get(key)
+    if model is not None:
+        return model
+
+    with _lock:
+        if key not in _chat_models:
+            # Deferred so that importing the agent does not load provider SDKs
+            from langchain.chat_models import init_chat_model
+
+            _chat_models[key] = init_chat_model(**spec)
+        return _chat_models[key]
+
+def set_chat_model(role: str, model: Optional[Any]) -> None:
+    """Install a chat model for a role for the whole process, bypassing the routing.
+
+    Args:
+        role: Model role to override
+        model: Chat model to use, or None to use the routed models again
+    """
+    with _lock:
+        if model is None:
+            _overrides.pop(role, None)
+        else:
+            _overrides[role] = model
+
+# ===== TOKEN USAGE =====
+
+@dataclass
+class TokenUsage:
+    """Tokens consumed by the model calls made within a ``track_token_usage`` block."""
+    input_tokens: int = 0
+    output_tokens: int = 0
+
+    @property
+    def total(self) -> int:
+        """Input and output tokens together."""
+        return self.input_tokens + self.output_tokens
+
+_token_usage: ContextVar[Optional[TokenUsage]] = ContextVar("token_usage", default=None)
+
+@contextmanager
+def track_token_usage() -> Iterator[TokenUsage]:
+    """Count the tokens of every ``invoke_model`` call made inside the block, including spawned tasks."""
+    usage = TokenUsage()
+    token = _token_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _token_usage.reset(token)
+
+def record_token_usage(messages: list, response: Any) -> None:
+    """Add a model call to the tracked usage, estimating counts the provider did not report."""
+    usage = _token_usage.get()
+    if usage is None:
+        return
+    from tools import estimate_tokens
+
+    metadata = getattr(response, "usage_metadata", None) or {}
+    usage.input_tokens += metadata.get("input_tokens") or sum(
+        estimate_tokens(str(getattr(message, "content", message))) for message in messages
+    )
+    usage.output_tokens += metadata.get("output_tokens") or estimate_tokens(
+        str(getattr(response, "content", response))
+    )
+
+# ===== MODEL CALLS =====
+
+async def invoke_model(role: str, messages: list, model: Optional[Any] = None, tier: Optional[str] = None):
+    """Call the model of a role under the shared rate limiter of its provider model.
+
+    Args:
+        role: Model role
+        messages: Messages sent to the model
+        model: Variant of the tier's model to call, e.g. with tools bound or
+            structured output; defaults to the tier's model itself
+        tier: Model tier selected with ``route_model``, which also selects the
+            rate limiter; defaults to the role's default tier
+
+    Returns:
+        Model response
+    """
+    from ratelimit import call_with_rate_limit
+
+    runnable = model if model is not None else get_chat_model(role, tier)
+    response = await call_with_rate_limit(model_name(role, tier), lambda: runnable.ainvoke(messages))
+    record_token_usage(messages, response)
+    return response
+
+def warm_clients() -> None:
+    """Build the chat model of every routed tier and the search backend ahead of the first run."""
+    from routing import ROLES, get_model_routing
+    from search_backends import get_search_backend
+
+    routing = get_model_routing()
+    tiers = {rule["tier"] for rules in routing.routes.values() for rule in rules}
+    for role in ROLES:
+        for tier in tiers:
+            get_chat_model(role, tier)
+    get_search_backend()
@@ -0,0 +1,277 @@
+"""Runtime Configuration.
+
+This module defines the tunable settings of the research agent. Values are read
+from the ``configurable`` section of a LangGraph ``RunnableConfig`` and fall back
+to environment variables and then to the defaults declared here.
+
+Settings marked ``process_wide`` configure shared resources such as caches,
+rate limiters and the model routing, which are created once per process on
+first use. They are read from the environment only; passing one in a
+runnable config has no effect and prints a warning.
+"""
+
+import os
+from typing import Any, Literal, Optional
+
+from pydantic import BaseModel, Field
+from langchain_core.runnables import RunnableConfig
+
+# Process-wide settings already warned about when passed in a runnable config
+_ignored_fields: set[str] = set()
+
+class Configuration(BaseModel):
+    """Configurable settings for the research agent and its tools."""
+
+    max_tool_call_iterations: int = Field(
+        default=10,
+        description="Maximum number of tool rounds in a research run before findings are compressed (0 disables)",
+    )
+    max_search_calls: int = Field(
+        default=8,
+        description="Maximum number of search tool calls in a research run (0 disables)",
+    )
+    max_research_seconds: float = Field(
+        default=600.0,
+        description="Wall-clock budget in seconds of the research loop of a run (0 disables)",
+    )
+    max_research_tokens: int = Field(
+        default=500000,
+        description="Budget of model tokens consumed by the research loop of a run, summarization included (0 disables)",
+    )
+    context_compaction_tokens: int = Field(
+        default=60000,
+        description="Estimated history size in tokens above which older research turns are folded into a digest (0 disables)",
+    )
+    context_keep_recent_turns: int = Field(
+        default=2,
+        description="Number of most recent research turns always sent to the model verbatim",
+    )
+    incremental_compression: bool = Field(
+        default=False,
+        description="Whether research findings are compressed after each tool round instead of only at the end",
+    )
+    fast_mode: bool = Field(
+        default=False,
+        description="Whether the research model reflects with think_tool in the same turn as its next search, saving a model call per search",
+    )
+    supervisor_enabled: bool = Field(
+        default=False,
+        description="Whether research runs split the topic into subtopics that are researched in parallel and merged",
+    )
+    max_subtopics: int = Field(
+        default=4,
+        description="Maximum number of subtopics the supervisor splits a research topic into",
+    )
+    max_concurrent_subtopics: int = Field(
+        default=3,
+        description="Maximum number of subtopics researched concurrently in a supervised run",
+    )
+    model_routing: str = Field(
+        default="",
+        description="Path to a JSON model routing file, or inline JSON, merged over the default routing, see routing.py (process-wide, set in the environment)",
+        json_schema_extra={"process_wide": True},
+    )
+    max_concurrent_tool_calls: int = Field(
+        default=4,
+        description="Maximum number of tool calls from one LLM turn executed concurrently",
+    )
+    max_concurrent_summaries: int = Field(
+        default=5,
+        description="Maximum number of webpage summarization calls in flight per search",
+    )
+    summarization_chunk_tokens: int = Field(
+        default=32000,
+        description="Estimated token size above which a page is summarized in chunks",
+    )
+    max_concurrent_chunk_summaries: int = Field(
+        default=4,
+        description="Maximum number of chunk summarization calls in flight per page",
+    )
+    content_extraction_enabled: bool = Field(
+        default=True,
+        description="Whether navigation, cookie banners, footers and link lists are stripped from page content locally before it is summarized",
+    )
+    near_duplicate_enabled: bool = Field(
+        default=True,
+        description="Whether near-duplicate pages are detected by content fingerprint and summarized only once",
+    )
+    near_duplicate_threshold: float = Field(
+        default=0.9,
+        description="Minimum estimated Jaccard similarity of the word shingles of two pages for them to count as near-duplicates",
+    )
+    near_duplicate_min_chars: int = Field(
+        default=500,
+        description="Minimum raw content length in characters of a page checked for near-duplicates",
+    )
+    near_duplicate_scope: Literal["run", "batch"] = Field(
+        default="run",
+        description="Whether summaries of near-duplicate pages are only shared within a run or across all runs of the process (process-wide, set in the environment)",
+        json_schema_extra={"process_wide": True},
+    )
+    near_duplicate_index_entries: int = Field(
+        default=10000,
+        description="Maximum number of page fingerprints kept in the process-wide index (process-wide, set in the environment)",
+        json_schema_extra={"process_wide": True},
+    )
+    relevance_ranking_enabled: bool = Field(
+        default=True,
+        description="Whether search results are ranked against the query and topic so only relevant pages are summarized",
+    )
+    summarize_top_k: int = Field(
+        default=0,
+        description="Maximum number of pages per search sent to the summarization model, most relevant first (0 disables)",
+    )
+    summarize_min_relevance: float = Field(
+        default=0.25,
+        description="Minimum BM25 score of a page, relative to the best page of the same search, for it to be summarized",
+    )
+    search_max_concurrency: int = Field(
+        default=8,
+        description="Maximum number of concurrent requests to the search backend (process-wide, set in the environment)",
+        json_schema_extra={"process_wide": True},
+    )
+    search_timeout: float = Field(
+        default=30.0,
+        description="Timeout in seconds for a single search request (process-wide, set in the environment)",
+        json_schema_extra={"process_wide": True},
+    )
+    search_deadline: float = Field(
+        default=60.0,
+        description="Seconds a search may take, including queueing and throttling retries, before it returns no results (0 disables)",
+    )
+    summarization_deadline: float = Field(
+        default=120.0,
+        description="Seconds a page summarization may take before the page falls back to its search snippet (0 disables)",
+    )
+    hedge_requests: bool = Field(
+        default=False,
+        description="Whether a slow search or summarization call gets a second request after the p95 latency of recent calls",
+    )
+    rate_limit_enabled: bool = Field(
+        default=True,
+        description="Whether model and search calls go through the shared per-provider rate limiters (process-wide, set in the environment)",
+        json_schema_extra={"process_wide": True},
+    )
+    rate_limit_max_retries: int = Field(
+        default=5,
+        description="Maximum number of retries of a call throttled by the provider (process-wide, set in the environment)",
+        json_schema_extra={"process_wide": True},
+    )
+    rate_limit_max_backoff: float = Field(
+        default=60.0,
+        description="Upper bound in seconds of the jittered backoff before retrying a throttled call (process-wide, set in the environment)",
+        json_schema_extra={"process_wide": True},
+    )
+    trace_dir: str = Field(
+        default="traces",
+        description="Directory the JSON trace summary of each run is written to (empty disables)",
+    )
+    cache_dir: str = Field(
+        default=".cache",
+        description="Directory holding the persistent cache database (process-wide, set in the environment)",
+        json_schema_extra={"process_wide": True},
+    )
+    blob_store_enabled: bool = Field(
+        default=True,
+        description="Whether large tool outputs of checkpointed runs are kept in the on-disk blob store instead of inline in the graph state; only used with checkpoint_enabled (process-wide, set in the environment)",
+        json_schema_extra={"process_wide": True},
+    )
+    blob_store_min_chars: int = Field(
+        default=2000,
+        description="Minimum length in characters of a tool output stored out of band",
+    )
+    blob_store_max_age_days: float = Field(
+        default=30,
+        description="Age in days after which blobs that were not written again are deleted (process-wide, set in the environment)",
+        json_schema_extra={"process_wide": True},
+    )
+    checkpoint_enabled: bool = Field(
+        default=False,
+        description="Whether research runs save a durable checkpoint after every step so they can be resumed (process-wide, set in the environment)",
+        json_schema_extra={"process_wide": True},
+    )
+    summary_cache_enabled: bool = Field(
+        default=True,
+        description="Whether webpage summaries are cached on disk (process-wide, set in the environment)",
+        json_schema_extra={"process_wide": True},
+    )
+    summary_cache_max_entries: int = Field(
+        default=20000,
+        description="Maximum number of cached webpage summaries (process-wide, set in the environment)",
+        json_schema_extra={"process_wide": True},
+    )
+    summary_cache_max_bytes: int = Field(
+        default=256 * 1024 * 1024,
+        description="Maximum total size in bytes of cached webpage summaries (process-wide, set in the environment)",
+        json_schema_extra={"process_wide": True},
+    )
+    summary_cache_max_age_days: float = Field(
+        default=30,
+        description="Age in days after which a cached webpage summary expires (process-wide, set in the environment)",
+        json_schema_extra={"process_wide": True},
+    )
+    search_cache_enabled: bool = Field(
+        default=True,
+        description="Whether search responses are cached (process-wide, set in the environment)",
+        json_schema_extra={"process_wide": True},
+    )
+    search_cache_ttl_general: float = Field(
+        default=24 * 3600,
+        description="Time-to-live in seconds of cached 'general' search responses (process-wide, set in the environment)",
+        json_schema_extra={"process_wide": True},
+    )
+    search_cache_ttl_news: float = Field(
+        default=15 * 60,
+        description="Time-to-live in seconds of cached 'news' search responses (process-wide, set in the environment)",
+        json_schema_extra={"process_wide": True},
+    )
+    search_cache_ttl_finance: float = Field(
+        default=5 * 60,
+        description="Time-to-live in seconds of cached 'finance' search responses (process-wide, set in the environment)",
+        json_schema_extra={"process_wide": True},
+    )
+    search_cache_memory_entries: int = Field(
+        default=256,
+        description="Maximum number of search responses held in the in-memory tier (process-wide, set in the environment)",
+        json_schema_extra={"process_wide": True},
+    )
+    search_cache_max_entries: int = Field(
+        default=10000,
+        description="Maximum number of search responses held in the disk tier (process-wide, set in the environment)",
+        json_schema_extra={"process_wide": True},
+    )
+
+    @classmethod
+    def from_runnable_config(cls, config: Optional[RunnableConfig] = None) -> "Configuration":
+        """Create a Configuration from a RunnableConfig.
+
+        Each field is resolved from ``config["configurable"]`` first, then from an
+        upper-cased environment variable of the same name, then from its default.
+        Process-wide fields skip the runnable config, with a warning the first
+        time each one is found there.
+
+        Args:
+            config: Optional runnable config passed to a graph node or tool
+
+        Returns:
+            Configuration instance with resolved values
+        """
+        configurable = (config or {}).get("configurable", {}) or {}
+        process_wide = cls.process_wide_fields()
+        values: dict[str, Any] = {}
+        for name in cls.model_fields:
+            if name in process_wide and name in configurable and name not in _ignored_fields:
+                _ignored_fields.add(name)
+                print(f"Warning: '{name}' is process-wide and ignored in the runnable config; set {name.upper()} in the environment")
+            value = os.environ.get(name.upper()) if name in process_wide else configurable.get(name, os.environ.get(name.upper()))
+            if value is not None:
+                values[name] = value
+        return cls(**values)
+
+    @classmethod
+    def process_wide_fields(cls) -> set[str]:
+        """Return the names of the fields only read from the environment."""
+        return {
+            name for name, field in cls.model_fields.items()
+            if isinstance(field.json_schema_extra, dict) and field.json_schema_extra.get("process_wide")
+        }
@@ -0,0 +1,150 @@
+"""Call Deadlines and Hedged Requests.
+
+This module bounds how long a single provider call may hold up a research
+step. A call gets a deadline after which it is cancelled and the caller falls
+back to a cheaper answer, such as the search snippet of a page. A slow call
+can also be hedged: when it has not answered after the 95th percentile
+latency of recent calls of its kind, a second, identical request is started
+and whichever answers first is used. Tail latency then follows the typical
+call instead of the slowest one, for a few percent of extra requests.
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from tracing import annotate_span
+
+T = TypeVar("T")
+
+# Successful calls kept per kind to estimate the hedging delay
+LATENCY_WINDOW = 200
+# Calls of a kind observed before it is hedged
+HEDGE_MIN_SAMPLES = 20
+HEDGE_PERCENTILE = 0.95
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a call does not answer within its deadline."""
+
+# ===== LATENCY TRACKING =====
+
+class LatencyTracker:
+    """Sliding window of the latencies of recent successful calls of one kind."""
+
+    def __init__(self, window: int = LATENCY_WINDOW, min_samples: int = HEDGE_MIN_SAMPLES):
+        self.min_samples = min_samples
+        self._samples: deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        """Add the latency of a successful call."""
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Return the ``q`` quantile of the recorded latencies, or None until ``min_samples`` calls were seen."""
+        with self._lock:
+            if len(self._samples) < max(1, self.min_samples):
+                return None
+            samples = sorted(self._samples)
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+_latency_trackers: dict[str, LatencyTracker] = {}
+_registry_lock = threading.Lock()
+
+def get_latency_tracker(name: str) -> LatencyTracker:
+    """Return the process-wide latency tracker of a kind of call, e.g. ``summarization`` or ``search``."""
+    with _registry_lock:
+        if name not in _latency_trackers:
+            _latency_trackers[name] = LatencyTracker()
+        return _latency_trackers[name]
+
+def set_latency_tracker(name: str, tracker: Optional[LatencyTracker]) -> None:
+    """Install a latency tracker for a kind of call, or None to start a new one on next use."""
+    with _registry_lock:
+        if tracker is None:
+            _latency_trackers.pop(name, None)
+        else:
+            _latency_trackers[name] = tracker
+
+# ===== CALLS =====
+
+async def call_with_deadline(
+    name: str,
+    call: Callable[[], Awaitable[T]],
+    deadline: Optional[float] = None,
+    hedge: bool = False,
+    track_latency: bool = True,
+) -> T:
+    """Run a call within a deadline, hedging it with a second request if it is slow.
+
+    The hedge starts once the call has run for the p95 latency of recent
+    successful calls of the same kind; the first attempt to succeed wins and
+    the other is cancelled. An attempt that fails leaves the other one
+    running, and a call that fails before it is hedged is not hedged at all:
+    retrying errors is the job of the rate limiter.
+
+    Args:
+        name: Kind of call whose latencies set the hedging delay, e.g. ``summarization``
+        call: Function starting the call; invoked again for the hedge
+        deadline: Seconds until the call is cancelled, or None or 0 for no deadline
+        hedge: Whether a slow call gets a second request
+        track_latency: Whether successful attempts count towards the hedging
+            delay of ``name``; off for calls that wrap hedged calls of their own
+
+    Returns:
+        Result of the first attempt that succeeds
+
+    Raises:
+        DeadlineExceeded: If no attempt succeeds within the deadline
+        Exception: The error of the last attempt, if all attempts fail
+    """
+    tracker = get_latency_tracker(name) if hedge or track_latency else None
+    hedge_delay = tracker.percentile(HEDGE_PERCENTILE) if hedge else None
+    if deadline and hedge_delay is not None and hedge_delay >= deadline:
+        hedge_delay = None
+    started_at = time.monotonic()
+
+    async def attempt() -> T:
+        attempt_started_at = time.monotonic()
+        result = await call()
+        if track_latency:
+            tracker.record(time.monotonic() - attempt_started_at)
+        return result
+
+    pending = {asyncio.ensure_future(attempt())}
+    hedge_task = None
+    try:
+        while True:
+            elapsed = time.monotonic() - started_at
+            timeouts = [deadline - elapsed] if deadline else []
+            if hedge_delay is not None:
+                timeouts.append(hedge_delay - elapsed)
+            done, pending = await asyncio.wait(
+                pending,
+                timeout=max(0.0, min(timeouts)) if timeouts else None,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            for task in done:
+                if task.exception() is None:
+                    if hedge_task is not None:
+                        annotate_span(hedge_won=task is hedge_task)
+                    return task.result()
+                error = task.exception()
+            if not pending:
+                raise error
+
+            elapsed = time.monotonic() - started_at
+            if deadline and elapsed >= deadline:
+                raise DeadlineExceeded(f"{name} call did not answer within {deadline:g}s")
+            if hedge_delay is not None and elapsed >= hedge_delay:
+                # Hedge once, only while the first attempt is still running
+                annotate_span(hedged=True, hedge_delay=round(hedge_delay, 3))
+                hedge_delay = None
+                hedge_task = asyncio.ensure_future(attempt())
+                pending.add(hedge_task)
+    finally:
+        for task in pending:
+            task.cancel()
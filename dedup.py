@@ -0,0 +1,253 @@
+"""Duplicate Page Detection.
+
+This module finds search results that are the same page before they are
+summarized. URLs are canonicalized, so tracking parameters, ``www.``, AMP
+variants and trailing slashes do not make a page look new. Page contents are
+fingerprinted with MinHash signatures over word shingles, and a
+locality-sensitive index finds pages whose estimated Jaccard similarity is
+above a threshold: syndicated copies and mirrors that differ only in
+boilerplate, bylines or timestamps.
+
+The research tools keep one index per run to refer near-duplicates back to
+the page summarized first, and a process-wide index shared by all runs of a
+batch lets a near-duplicate reuse a summary made for another topic.
+"""
+
+import hashlib
+import random
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from configuration import Configuration
+
+# ===== URL CANONICALIZATION =====
+
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "gbraid", "wbraid", "msclkid", "yclid", "igshid", "mc_cid", "mc_eid",
+    "_hsenc", "_hsmi", "cmpid", "ref", "ref_src", "ref_url", "spm", "share", "ito", "ncid",
+}
+TRACKING_PREFIXES = ("utm_", "pk_", "mtm_")
+
+def canonicalize_url(url: str) -> str:
+    """Return a canonical form of a URL for duplicate detection.
+
+    The scheme becomes https, the host is lower-cased without ``www.``,
+    ``m.`` or ``amp.`` prefixes and default ports, tracking parameters and
+    fragments are dropped, the remaining query parameters are sorted, and
+    trailing slashes and ``/amp`` suffixes are removed from the path.
+
+    Args:
+        url: URL as returned by the search backend
+
+    Returns:
+        Canonical URL; unparseable input is returned stripped
+    """
+    try:
+        parts = urlsplit(url.strip())
+        host = (parts.hostname or "").lower()
+        port = parts.port
+    except ValueError:
+        return url.strip()
+    if not host:
+        return url.strip()
+
+    host = re.sub(r"^(www\d*|m|amp)\.", "", host)
+    if port and port not in (80, 443):
+        host = f"{host}:{port}"
+    path = re.sub(r"/{2,}", "/", parts.path)
+    path = re.sub(r"(/amp)?/*$", "", path) or "/"
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)
+    )
+    return urlunsplit(("https", host, path, urlencode(query), ""))
+
+# ===== MINHASH =====
+
+NUM_PERMUTATIONS = 128
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+
+_random = random.Random(1)
+PERMUTATIONS = [
+    (_random.randrange(1, MERSENNE_PRIME), _random.randrange(0, MERSENNE_PRIME)) for _ in range(NUM_PERMUTATIONS)
+]
+
+def shingles(text: str, shingle_words: int = 3, max_words: int = 5000) -> set[str]:
+    """Return the set of overlapping word shingles of a text.
+
+    Args:
+        text: Page content
+        shingle_words: Number of consecutive words per shingle
+        max_words: Only the first ``max_words`` words are used
+
+    Returns:
+        Set of lower-cased shingles
+    """
+    words = re.findall(r"\w+", text.lower())[:max_words]
+    return {" ".join(words[i:i + shingle_words]) for i in range(max(1, len(words) - shingle_words + 1))}
+
+def minhash(text: str) -> tuple[int, ...]:
+    """Compute the MinHash signature of a text's word shingles.
+
+    The fraction of positions in which two signatures agree estimates the
+    Jaccard similarity of the two shingle sets.
+
+    Args:
+        text: Page content
+
+    Returns:
+        Signature of ``NUM_PERMUTATIONS`` 32-bit values
+    """
+    hashes = [
+        int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=4).digest(), "big")
+        for shingle in shingles(text)
+    ]
+    return tuple(
+        min((a * value + b) % MERSENNE_PRIME & MAX_HASH for value in hashes) for a, b in PERMUTATIONS
+    )
+
+def estimate_similarity(a: tuple[int, ...], b: tuple[int, ...]) -> float:
+    """Estimate the Jaccard similarity of the texts behind two signatures."""
+    return sum(x == y for x, y in zip(a, b)) / len(a)
+
+def signature_to_hex(signature: tuple[int, ...]) -> str:
+    """Encode a signature as a hex string, as kept in the graph state."""
+    return "".join(f"{value:08x}" for value in signature)
+
+def signature_from_hex(text: str) -> tuple[int, ...]:
+    """Decode a signature encoded with ``signature_to_hex``."""
+    return tuple(int(text[i:i + 8], 16) for i in range(0, len(text), 8))
+
+# ===== NEAR-DUPLICATE INDEX =====
+
+def band_rows(threshold: float, num_permutations: int = NUM_PERMUTATIONS) -> int:
+    """Choose the rows per LSH band for a similarity threshold.
+
+    Returns the largest divisor ``r`` of ``num_permutations`` for which two
+    texts at the threshold still share at least one band with 99%
+    probability, keeping the candidates to compare as few as possible.
+    """
+    rows = 1
+    for r in range(1, num_permutations + 1):
+        if num_permutations % r == 0 and 1 - (1 - threshold ** r) ** (num_permutations // r) >= 0.99:
+            rows = r
+    return rows
+
+class NearDuplicateIndex:
+    """Index of MinHash signatures answering "is there a text at least ``threshold`` similar?".
+
+    Signatures are split into bands, and a lookup only compares the
+    signatures sharing at least one band with the query, which is all of them
+    with near certainty for texts above the threshold. Entries added under a
+    ``namespace``, e.g. the model that produced a summary, are only found by
+    lookups in the same namespace. With ``max_entries``, the least recently
+    added entries are dropped.
+    """
+
+    def __init__(self, threshold: float = 0.9, max_entries: Optional[int] = None):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.rows = band_rows(threshold)
+        self._buckets: dict[tuple, set[tuple[int, ...]]] = {}
+        self._entries: OrderedDict[tuple[Optional[str], tuple[int, ...]], Any] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _keys(self, signature: tuple[int, ...], namespace: Optional[str]) -> list[tuple]:
+        return [(namespace, i, signature[i:i + self.rows]) for i in range(0, len(signature), self.rows)]
+
+    def find(self, signature: tuple[int, ...], namespace: Optional[str] = None) -> Optional[Any]:
+        """Return the value of the most similar signature above the threshold in a namespace, if any."""
+        with self._lock:
+            candidates = set()
+            for key in self._keys(signature, namespace):
+                candidates |= self._buckets.get(key, set())
+            matches = [
+                (similarity, candidate) for candidate in candidates
+                if (similarity := estimate_similarity(signature, candidate)) >= self.threshold
+            ]
+            return self._entries[(namespace, max(matches)[1])] if matches else None
+
+    def add(self, signature: tuple[int, ...], value: Any, namespace: Optional[str] = None) -> None:
+        """Index a signature with an associated value, e.g. its URL or summary."""
+        with self._lock:
+            entry = (namespace, signature)
+            self._entries[entry] = value
+            self._entries.move_to_end(entry)
+            for key in self._keys(signature, namespace):
+                self._buckets.setdefault(key, set()).add(signature)
+            while self.max_entries is not None and len(self._entries) > self.max_entries:
+                (oldest_namespace, oldest), _ = self._entries.popitem(last=False)
+                for key in self._keys(oldest, oldest_namespace):
+                    self._buckets[key].discard(oldest)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @classmethod
+    def from_hex(cls, signatures: dict[str, Any], threshold: float = 0.9) -> "NearDuplicateIndex":
+        """Build an index from a mapping of hex-encoded signatures, as kept in the graph state."""
+        index = cls(threshold=threshold)
+        for signature, value in signatures.items():
+            index.add(signature_from_hex(signature), value)
+        return index
+
+# ===== STATISTICS =====
+
+@dataclass
+class DedupStats:
+    """Counters of summarizations avoided by duplicate detection in this process."""
+    url_duplicates: int = 0
+    near_duplicates: int = 0
+    reused_summaries: int = 0
+
+    @property
+    def avoided_summaries(self) -> int:
+        """Summarization calls that duplicate detection made unnecessary."""
+        return self.url_duplicates + self.near_duplicates + self.reused_summaries
+
+_stats = DedupStats()
+_stats_lock = threading.Lock()
+
+def record_duplicates(**counts: int) -> None:
+    """Add to the process-wide duplicate detection counters."""
+    with _stats_lock:
+        for name, value in counts.items():
+            setattr(_stats, name, getattr(_stats, name) + value)
+
+def get_dedup_stats() -> DedupStats:
+    """Return a snapshot of the process-wide duplicate detection counters."""
+    with _stats_lock:
+        return DedupStats(**vars(_stats))
+
+# ===== PAGE INDEX REGISTRY =====
+
+_page_index: Optional[NearDuplicateIndex] = None
+_page_index_initialized = False
+
+def get_page_index() -> Optional[NearDuplicateIndex]:
+    """Return the process-wide index of summarized pages, or None unless the scope is ``batch``."""
+    global _page_index, _page_index_initialized
+    if not _page_index_initialized:
+        configurable = Configuration.from_runnable_config()
+        if configurable.near_duplicate_scope == "batch":
+            _page_index = NearDuplicateIndex(
+                threshold=configurable.near_duplicate_threshold,
+                max_entries=configurable.near_duplicate_index_entries,
+            )
+        _page_index_initialized = True
+    return _page_index
+
+def set_page_index(index: Optional[NearDuplicateIndex]) -> None:
+    """Install the process-wide index of summarized pages.
+
+    Args:
+        index: Index to use, or None to only detect near-duplicates within a run
+    """
+    global _page_index, _page_index_initialized
+    _page_index = index
+    _page_index_initialized = True
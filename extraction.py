@@ -0,0 +1,276 @@
+"""Local Content Extraction.
+
+This module cleans the raw page content returned by the search backend before
+it is fingerprinted, ranked and summarized. HTML is reduced to its text,
+markdown links and images to their text, and navigation bars, cookie banners,
+share and newsletter prompts, footers and repeated link lists are dropped.
+Tables are flattened to one line per row, and whitespace is normalized outside
+code blocks, which are kept exactly as they are. It works on the content the
+backend already returned, so it costs no network call, and every token it
+drops is a token the summarization model does not have to read.
+"""
+
+import re
+import threading
+from dataclasses import dataclass
+from html.parser import HTMLParser
+
+# ===== HTML =====
+
+# Elements whose text is never main content
+SKIPPED_TAGS = {"script", "style", "noscript", "template", "svg", "iframe", "nav", "header", "footer", "aside", "form"}
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+BLOCK_TAGS = {
+    "address", "article", "blockquote", "dd", "div", "dl", "dt", "figcaption", "figure", "h1", "h2", "h3", "h4",
+    "h5", "h6", "li", "main", "ol", "p", "pre", "section", "table", "tbody", "thead", "tr", "ul",
+}
+
+class _TextExtractor(HTMLParser):
+    """Collect the text of an HTML page as markdown-like lines."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: list[str] = []
+        self.skipped_depth = 0
+        self.pre_depth = 0
+        self.href: str = ""
+
+    def handle_starttag(self, tag, attrs):
+        if tag in VOID_TAGS:
+            if tag == "br" and not self.skipped_depth:
+                self.parts.append("\n")
+            return
+        if tag in SKIPPED_TAGS or self.skipped_depth:
+            self.skipped_depth += 1
+            return
+        if tag == "pre":
+            # Preformatted text keeps its layout as a fenced code block
+            self.pre_depth += 1
+            self.parts.append("\n\n```\n")
+            return
+        if tag in BLOCK_TAGS:
+            self.parts.append("\n\n")
+        if tag in ("h1", "h2", "h3", "h4", "h5", "h6"):
+            self.parts.append("#" * int(tag[1]) + " ")
+        elif tag == "li":
+            self.parts.append("- ")
+        elif tag in ("td", "th"):
+            self.parts.append(" | ")
+        elif tag == "a" and not self.pre_depth:
+            self.href = dict(attrs).get("href") or ""
+            self.parts.append("[")
+
+    def handle_endtag(self, tag):
+        if tag in VOID_TAGS:
+            return
+        if self.skipped_depth:
+            self.skipped_depth -= 1
+            return
+        if tag == "pre":
+            self.pre_depth -= 1
+            self.parts.append("\n```\n\n")
+        elif tag == "a" and not self.pre_depth:
+            self.parts.append(f"]({self.href})")
+        elif tag in BLOCK_TAGS:
+            self.parts.append("\n\n")
+
+    def handle_data(self, data):
+        if not self.skipped_depth:
+            self.parts.append(data)
+
+def looks_like_html(text: str) -> bool:
+    """Return whether raw content is an HTML document or fragment rather than text or markdown."""
+    return len(re.findall(r"<(?:html|body|div|p|article|section|span|a|li)\b[^>]*>", text[:20000], re.I)) >= 3
+
+def html_to_text(html: str) -> str:
+    """Convert HTML to markdown-like text, leaving out scripts, styles and page chrome elements."""
+    parser = _TextExtractor()
+    parser.feed(html)
+    parser.close()
+    return "".join(parser.parts)
+
+# ===== BOILERPLATE =====
+
+# Phrases of short lines that are page chrome rather than content
+BOILERPLATE_PATTERN = re.compile(
+    r"\b(?:accept (?:all )?cookies|cookie (?:policy|settings|preferences)|we use cookies|this (?:site|website) uses cookies"
+    r"|subscribe to (?:our|the) newsletter|sign up (?:for|to) (?:our|the) newsletter|newsletter sign[- ]?up"
+    r"|sign in|log in|create (?:an )?account|skip to (?:main )?content|all rights reserved|terms of (?:use|service)"
+    r"|privacy policy|follow us|share (?:this|on)|related (?:articles|stories|posts)|recommended for you"
+    r"|read more|advertisement|sponsored content|back to top)\b",
+    re.I,
+)
+LINK_PATTERN = re.compile(r"(?<!!)\[([^\]]*)\]\([^)]*\)")
+IMAGE_PATTERN = re.compile(r"!\[[^\]]*\]\([^)]*\)")
+BARE_URL_PATTERN = re.compile(r"https?://\S+")
+NAVIGATION_SEPARATORS = re.compile(r"\s+[|•·»]\s+")
+LIST_MARKER_PATTERN = re.compile(r"^(?:[-*+]|\d+[.)])\s+")
+TABLE_SEPARATOR_PATTERN = re.compile(r"^\|?\s*:?-{3,}:?\s*(?:\|\s*:?-{3,}:?\s*)*\|?$")
+CODE_FENCE_PATTERN = re.compile(r"^\s{0,3}(`{3,}|~{3,})")
+INDENTED_CODE_PATTERN = re.compile(r"^(?: {4}|\t)")
+
+# Lines up to this many words may be dropped by link density
+SHORT_LINE_WORDS = 25
+# Repeated lines up to this many words are dropped as chrome unless they end a sentence
+REPEATED_LINE_WORDS = 3
+# Lines up to this many words are dropped when they contain a boilerplate phrase
+BOILERPLATE_LINE_WORDS = 6
+# Longer lines are dropped only when boilerplate phrases make up this share of them
+BOILERPLATE_COVERAGE = 0.5
+
+def link_density(line: str) -> float:
+    """Return the share of a line's visible text that is link text."""
+    link_chars = sum(len(text) for text in LINK_PATTERN.findall(line))
+    visible = LINK_PATTERN.sub(lambda match: match.group(1), line)
+    visible = LIST_MARKER_PATTERN.sub("", BARE_URL_PATTERN.sub("", visible)).strip()
+    return link_chars / len(visible) if visible else 1.0
+
+def is_navigation(line: str) -> bool:
+    """Return whether a line is a bar of short menu entries such as ``Home | About | Contact``."""
+    entries = [entry for entry in NAVIGATION_SEPARATORS.split(line) if entry.strip()]
+    return len(entries) >= 3 and all(len(entry.split()) <= 3 for entry in entries)
+
+def is_boilerplate(line: str) -> bool:
+    """Return whether a markdown line is page chrome rather than content.
+
+    Link lists and menu bars are chrome at any length up to twice
+    ``SHORT_LINE_WORDS``. A boilerplate phrase such as "sign in" only marks a
+    line as chrome when the line is very short or mostly made of such
+    phrases, so sentences that merely mention one are kept.
+    """
+    words = len(line.split())
+    if words > SHORT_LINE_WORDS * 2:
+        return False
+    if link_density(line) >= 0.7 or (not line.startswith("|") and is_navigation(line)):
+        return True
+    text = line.lstrip("#").strip()
+    if words <= BOILERPLATE_LINE_WORDS and text.startswith("©"):
+        return True
+    matched = sum(len(match.group(0)) for match in BOILERPLATE_PATTERN.finditer(text))
+    if not matched:
+        return False
+    return words <= BOILERPLATE_LINE_WORDS or matched >= BOILERPLATE_COVERAGE * len(text)
+
+def is_repeated_chrome(line: str) -> bool:
+    """Return whether a line seen earlier in the page looks like page chrome, such as a repeated menu or byline.
+
+    Mostly-link lines and very short labels count as chrome; repeated
+    sentences and longer lines are content, e.g. the same step in two lists.
+    """
+    if link_density(line) >= 0.5:
+        return True
+    text = clean_line(line)
+    return len(text.split()) <= REPEATED_LINE_WORDS and not text.endswith((".", "!", "?", ":", ";"))
+
+def clean_line(line: str) -> str:
+    """Reduce links and images to their text, flatten a table row and normalize the spacing of a line."""
+    line = LINK_PATTERN.sub(lambda match: match.group(1), IMAGE_PATTERN.sub("", line)).strip()
+    if line.startswith("|"):
+        line = " | ".join(cell.strip() for cell in line.strip("|").split("|") if cell.strip())
+    return re.sub(r"[ \t]+", " ", line).strip()
+
+# ===== EXTRACTION =====
+
+def extract_main_content(raw_content: str) -> str:
+    """Extract the main content of a page from its raw content.
+
+    Boilerplate lines, table separator rows and chrome-like lines repeated
+    from earlier in the page are dropped, as are headings left without
+    content. Fenced and indented code blocks are kept exactly as they are.
+    Pages the rules would empty completely are returned with normalized
+    whitespace only.
+
+    Args:
+        raw_content: Raw page content as text, markdown or HTML
+
+    Returns:
+        Cleaned page content
+    """
+    text = raw_content.replace("\r\n", "\n").replace("\xa0", " ")
+    text = re.sub(r"[\u200b-\u200d\ufeff]", "", text)
+    if looks_like_html(text):
+        text = html_to_text(text)
+
+    lines, seen_lines, code_lines = [], set(), set()
+    fence = None
+    for raw_line in text.split("\n"):
+        # Code passes through untouched: indentation and repeated lines are meaningful there
+        fence_match = CODE_FENCE_PATTERN.match(raw_line)
+        if fence is None and fence_match:
+            fence, is_code = fence_match.group(1), True
+        elif fence is not None:
+            if fence_match and fence_match.group(1).startswith(fence) and not raw_line.strip().strip(fence[0]):
+                fence = None
+            is_code = True
+        else:
+            # An indented block starts after a blank line and runs while lines stay indented
+            previous = len(lines) - 1
+            is_code = (
+                previous >= 0 and (not lines[previous] or (previous in code_lines and bool(INDENTED_CODE_PATTERN.match(lines[previous]))))
+                and bool(INDENTED_CODE_PATTERN.match(raw_line)) and bool(raw_line.strip())
+            )
+        if is_code:
+            code_lines.add(len(lines))
+            lines.append(raw_line.rstrip())
+            continue
+
+        if not raw_line.strip():
+            lines.append("")
+            continue
+        if TABLE_SEPARATOR_PATTERN.match(raw_line.strip()) or is_boilerplate(raw_line.strip()):
+            continue
+        line = clean_line(raw_line)
+        if not line:
+            continue
+        key = line.lower()
+        if key in seen_lines and is_repeated_chrome(raw_line.strip()):
+            continue
+        seen_lines.add(key)
+        lines.append(line)
+
+    # Drop headings that are followed by another heading of the same or a higher level, or by nothing
+    content = [i for i, line in enumerate(lines) if line]
+    for position, i in reversed(list(enumerate(content))):
+        level = heading_level(lines[i]) if i not in code_lines else 0
+        if level:
+            following = next((j for j in content[position + 1:] if lines[j]), None)
+            if following is None or (following not in code_lines and 0 < heading_level(lines[following]) <= level):
+                lines[i] = ""
+
+    cleaned = re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip("\n")
+    if not cleaned:
+        return re.sub(r"\n{3,}", "\n\n", "\n".join(clean_line(line) for line in text.split("\n"))).strip()
+    return cleaned
+
+def heading_level(line: str) -> int:
+    """Return the level of a markdown heading line, or 0 for other lines."""
+    match = re.match(r"^(#{1,6}) ", line)
+    return len(match.group(1)) if match else 0
+
+# ===== STATISTICS =====
+
+@dataclass
+class ExtractionStats:
+    """Counters of the page content removed by extraction in this process."""
+    pages: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+
+    @property
+    def tokens_saved(self) -> int:
+        """Estimated tokens of raw content that were not sent to the summarization model."""
+        return self.input_tokens - self.output_tokens
+
+_stats = ExtractionStats()
+_stats_lock = threading.Lock()
+
+def record_extraction(**counts: int) -> None:
+    """Add to the process-wide extraction counters."""
+    with _stats_lock:
+        for name, value in counts.items():
+            setattr(_stats, name, getattr(_stats, name) + value)
+
+def get_extraction_stats() -> ExtractionStats:
+    """Return a snapshot of the process-wide extraction counters."""
+    with _stats_lock:
+        return ExtractionStats(**vars(_stats))
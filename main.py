@@ -6,29 +6,59 @@ from dotenv import load_dotenv
 # Load environment variables from .env file
 load_dotenv()
 
-from agent import researcher_agent
-from langchain_core.messages import HumanMessage
+async def run_research(topic: str, thread_id: str = None):
+    """Run the research agent on a given topic.
 
-async def run_research(topic: str):
-    """Run the research agent on a given topic."""
-    print(f"\n[bold blue]Starting research on:[/bold blue] {topic}\n")
-    
-    # Initial state for the researcher agent
-    initial_state = {
-        "research_topic": topic,
-        "researcher_messages": [HumanMessage(content=f"Please research the following topic: {topic}")],
-        "tool_call_iterations": 0,
-        "raw_notes": []
-    }
+    With checkpointing enabled the run is saved under ``thread_id``, and
+    running again with the same id resumes it if it was interrupted.
+    """
+    # Imported here so that argument parsing and --help stay fast
+    import uuid
+    from configuration import Configuration
+    from search_backends import close_search_backend
+    from streaming import stream_research
+    from tracing import Tracer, use_tracer
+
+    print(f"\n[bold blue]Starting research on:[/bold blue] {topic or thread_id}\n")
+
+    # Record spans for every node and external call of this run
+    configurable = Configuration.from_runnable_config()
+    tracer = Tracer(name=topic)
+    config = {"callbacks": [tracer.callback_handler()]}
+    if configurable.checkpoint_enabled:
+        thread_id = thread_id or str(uuid.uuid4())
+        config["configurable"] = {"thread_id": thread_id}
+        print(f"Checkpointing run {thread_id}; resume it with --resume {thread_id}")
+
+    def print_report_header():
+        print("\n" + "="*50)
+        print("FINAL RESEARCH REPORT")
+        print("="*50)
     
     try:
-        # We use astream to see the progress of the agent
-        # stream_mode="updates" allows us to see when nodes complete
-        async for event in researcher_agent.astream(initial_state, stream_mode="updates"):
-            for node_name, output in event.items():
-                if node_name == "llm_call":
+        # Node updates show the agent's progress, and the report is printed
+        # token by token while it is being generated
+        report_started = False
+        with use_tracer(tracer):
+            async for event in stream_research(topic, config):
+                if event.type == "report_token":
+                    if not report_started:
+                        print_report_header()
+                        report_started = True
+                    print(event.content, end="", flush=True)
+
+                elif event.type == "report":
+                    if not event.streamed:
+                        if report_started:
+                            print("\n\n[Report revised after streaming, full version follows]")
+                        else:
+                            print_report_header()
+                        print(event.content, end="")
+                    print("\n" + "="*50 + "\n")
+
+                elif event.node == "llm_call":
                     # Check if the LLM made tool calls
-                    last_message = output["researcher_messages"][-1]
+                    last_message = event.output["researcher_messages"][-1]
                     if last_message.tool_calls:
                         for tool_call in last_message.tool_calls:
                             print(f"[yellow]Agent is using tool:[/yellow] {tool_call['name']}")
@@ -38,31 +68,56 @@ async def run_research(topic: str):
                                 print(f"  [italic]Query:[/italic] {tool_call['args'].get('query', '')}")
                     else:
                         print("[green]Agent has finished gathering information.[/green]")
-                
-                elif node_name == "tool_node":
+
+                elif event.node == "tool_node":
                     print("[blue]Tool execution complete.[/blue]")
-                
-                elif node_name == "compress_research":
-                    print("\n" + "="*50)
-                    print("FINAL RESEARCH REPORT")
-                    print("="*50)
-                    print(output["compressed_research"])
-                    print("="*50 + "\n")
+
+                elif event.node == "plan_subtopics":
+                    print(f"[yellow]Researching {len(event.output['subtopics'])} subtopics in parallel:[/yellow]")
+                    for subtopic in event.output["subtopics"]:
+                        print(f"  [italic]Subtopic:[/italic] {subtopic}")
+
+                elif event.node == "research_subtopics":
+                    print("[green]Subtopic research complete, merging findings.[/green]")
                     
     except Exception as e:
         print(f"[red]An error occurred during research:[/red] {e}")
         import traceback
         traceback.print_exc()
+    finally:
+        await close_search_backend()
+
+    if configurable.trace_dir:
+        trace_path = tracer.write_summary(configurable.trace_dir)
+        print(f"Trace summary written to {trace_path}")
 
 def main():
     parser = argparse.ArgumentParser(description="Run the Autonomus Brief Research Agent")
-    parser.add_argument("topic", type=str, help="The research topic to investigate")
+    parser.add_argument("topic", type=str, nargs="?", help="The research topic to investigate")
+    parser.add_argument("--batch", type=str, metavar="INPUT", help="JSONL file of topics to research in batch mode")
+    parser.add_argument("--output", type=str, default="batch_results.jsonl", help="JSONL file batch results are appended to")
+    parser.add_argument("--concurrency", type=int, default=4, help="Maximum number of concurrent research runs in batch mode")
+    parser.add_argument("--checkpoint", action="store_true", help="Save a checkpoint after every step so an interrupted run can be resumed")
+    parser.add_argument("--resume", type=str, metavar="THREAD_ID", help="Resume the checkpointed run with this id (implies --checkpoint)")
+    parser.add_argument("--supervisor", action="store_true", help="Split the topic into subtopics researched in parallel, then merge the findings")
+    parser.add_argument("--fast", action="store_true", help="Reflect in the same model turn as the next search instead of a turn of its own")
+    parser.add_argument("--routing", type=str, metavar="PATH_OR_JSON", help="JSON model routing file, or inline JSON, choosing the model of each node")
     
     args = parser.parse_args()
+    if not args.topic and not args.batch and not args.resume:
+        parser.error("either a topic, --batch or --resume is required")
     
     # Check for required API keys
     # These are used by the agent and its tools
     import os
+    if args.checkpoint or args.resume:
+        os.environ["CHECKPOINT_ENABLED"] = "true"
+    if args.supervisor:
+        os.environ["SUPERVISOR_ENABLED"] = "true"
+    if args.fast:
+        os.environ["FAST_MODE"] = "true"
+    if args.routing:
+        os.environ["MODEL_ROUTING"] = args.routing
     missing_keys = []
     if not os.getenv("GOOGLE_API_KEY"):
         missing_keys.append("GOOGLE_API_KEY")
@@ -80,7 +135,13 @@ def main():
         # Define a simple print if rich is not available
         pass
 
-    asyncio.run(run_research(args.topic))
+    if args.batch:
+        from batch import run_batch
+
+        counts = asyncio.run(run_batch(args.batch, args.output, max_concurrency=args.concurrency))
+        print(f"Batch finished: {counts['ok']} succeeded, {counts['error']} failed, {counts['skipped']} skipped")
+    else:
+        asyncio.run(run_research(args.topic or "", thread_id=args.resume))
 
 if __name__ == "__main__":
     main()
@@ -1,4 +1,4 @@
-research_agent_prompt =  """You are a research assistant conducting research on the user's input topic. For context, today's date is {date}.
+research_agent_prompt_template = """You are a research assistant conducting research on the user's input topic. For context, today's date is {date}.
 
 <Task>
 Your job is to use tools to gather information about the user's input topic.
@@ -10,7 +10,7 @@ You have access to two main tools:
 1. **tavily_search**: For conducting web searches to gather information
 2. **think_tool**: For reflection and strategic planning during research
 
-**CRITICAL: Use think_tool after each search to reflect on results and plan next steps**
+**CRITICAL: Use think_tool after each search to {reflection_rule}**
 </Available Tools>
 
 <Instructions>
@@ -18,8 +18,8 @@ Think like a human researcher with limited time. Follow these steps:
 
 1. **Read the question carefully** - What specific information does the user need?
 2. **Start with broader searches** - Use broad, comprehensive queries first
-3. **After each search, pause and assess** - Do I have enough to answer? What's still missing?
-4. **Execute narrower searches as you gather information** - Fill in the gaps
+3. **After each search, {assess_step}** - Do I have enough to answer? What's still missing?
+4. **Execute narrower searches as you gather information** - Fill in the gaps{narrow_step}
 5. **Stop when you can answer confidently** - Don't keep searching for perfection
 </Instructions>
 
@@ -36,13 +36,34 @@ Think like a human researcher with limited time. Follow these steps:
 </Hard Limits>
 
 <Show Your Thinking>
-After each search tool call, use think_tool to analyze the results:
+After each search tool call, use think_tool to analyze the results{thinking_timing}:
 - What key information did I find?
 - What's missing?
 - Do I have enough to answer the question comprehensively?
-- Should I search more or provide my answer?
+{thinking_outro}
 </Show Your Thinking>
 """
+research_agent_prompt = research_agent_prompt_template.format(
+    date="{date}",
+    reflection_rule="reflect on results and plan next steps",
+    assess_step="pause and assess",
+    narrow_step="",
+    thinking_timing="",
+    thinking_outro="- Should I search more or provide my answer?",
+)
+# Fast mode folds each reflection into the turn of the next search, saving a model call per search
+research_agent_fast_prompt = research_agent_prompt_template.format(
+    date="{date}",
+    reflection_rule="reflect on results, in the same response as your next search - never in a response of its own",
+    assess_step="assess while you act",
+    narrow_step=", calling think_tool and the next tavily_search together",
+    thinking_timing=", and call it in the same response as your next tavily_search so that reflecting costs no extra turn",
+    thinking_outro=(
+        "- Which search fills the most important gap?\n\n"
+        "When your reflection shows you have enough to answer, give your answer directly instead of calling think_tool on its own."
+    ),
+)
+
 compress_research_system_prompt = """You are a research assistant that has conducted research on a topic by calling several tools and web searches. Your job is now to clean up the findings, but preserve all of the relevant statements and information that the researcher has gathered. For context, today's date is {date}.
 
 <Task>
@@ -163,4 +184,120 @@ Example 2 (for a scientific article):
 Remember, your goal is to create a summary that can be easily understood and utilized by a downstream research agent while preserving the most critical information from the original webpage.
 
 Today's date is {date}.
-"""
\ No newline at end of file
+"""
+
+merge_webpage_summaries_prompt = """You are tasked with merging partial summaries of a single long webpage into one summary. The webpage was too long to summarize at once, so it was split into consecutive parts and each part was summarized separately.
+
+Here are the partial summaries, in the order the parts appear on the page:
+
+<partial_summaries>
+{partial_summaries}
+</partial_summaries>
+
+Please follow these guidelines to create the merged summary:
+
+1. Identify the main topic or purpose of the webpage as a whole.
+2. Combine the partial summaries into one coherent summary, removing repetition between parts.
+3. Retain all key facts, statistics, data points, dates, names and locations from every part.
+4. Maintain the order in which information appears on the page when it matters.
+5. Select the most important quotes and excerpts across all parts, up to a maximum of 5.
+
+Present your summary in the following format:
+
+```
+{{
+   "summary": "Your merged summary here, structured with appropriate paragraphs or bullet points as needed",
+   "key_excerpts": "First important quote or excerpt, Second important quote or excerpt, Third important quote or excerpt, ...Add more excerpts as needed, up to a maximum of 5"
+}}
+```
+
+Today's date is {date}.
+"""
+
+fold_research_digest_prompt = """You are maintaining a running digest of research conducted by an AI researcher on the following topic:
+
+RESEARCH TOPIC: {research_topic}
+
+The researcher's history has grown too long to send in full, so older research turns are folded into this digest. The researcher will continue its work from the digest and its most recent turns only.
+
+Here is the current digest:
+
+<research_digest>
+{research_digest}
+</research_digest>
+
+Here are the research turns to fold into the digest:
+
+<research_messages>
+{research_messages}
+</research_messages>
+
+Please update the digest following these guidelines:
+
+1. Keep every concrete fact, statistic, date and name that is relevant to the research topic.
+2. Keep the title and URL of each source next to the information taken from it.
+3. List the search queries that have already been run, so they are not repeated.
+4. Note open questions and gaps the researcher identified in its reflections.
+5. Remove repetition and irrelevant content, and keep the digest compact.
+
+Return only the updated digest. Today's date is {date}.
+"""
+
+update_research_findings_prompt = """You are keeping a compressed findings document up to date while an AI researcher is still working on the following research topic:
+
+RESEARCH TOPIC: {research_topic}
+
+Here is the findings document compressed from the research so far:
+
+<compressed_findings>
+{compressed_findings}
+</compressed_findings>
+
+Here are the research messages that arrived since the document was last updated:
+
+<research_messages>
+{research_messages}
+</research_messages>
+
+Your task is to return the complete, updated findings document with the new research merged in.
+
+CRITICAL REQUIREMENTS:
+- Keep ALL information and sources already in the document - DO NOT drop anything
+- Add ALL new information that is relevant to the research topic, preserved verbatim
+- Add new queries and tool calls to the list of queries
+- Assign new sources the next citation numbers and add them to the Sources section, keeping numbering sequential without gaps
+- Follow the output format and citation rules from your instructions
+
+Return only the updated findings document."""
+
+plan_subtopics_prompt = """You are the supervisor of a team of research assistants. Your job is to split the following research topic into independent subtopics, so that each assistant can research one of them on its own and in parallel with the others.
+
+RESEARCH TOPIC: {research_topic}
+
+Please follow these guidelines to plan the subtopics:
+
+1. Return between 1 and {max_subtopics} subtopics. Use fewer subtopics for narrow topics; a topic that is already focused should be returned as a single subtopic.
+2. Each subtopic must be a self-contained research question that makes sense without the original topic, naming the entities, places and time frame it is about.
+3. Subtopics must not overlap, so that no two assistants search for the same information.
+4. Together, the subtopics must cover everything the research topic asks for.
+
+For context, today's date is {date}."""
+
+merge_subtopic_research_prompt = """Your research team has researched the following research topic by splitting it into subtopics:
+
+RESEARCH TOPIC: {research_topic}
+
+Here are the cleaned findings for each subtopic, each with its own citations and sources list:
+
+{subtopic_research}
+
+Your task is to merge these findings into one findings document about the research topic.
+
+CRITICAL REQUIREMENTS:
+- Keep ALL information and sources from every subtopic - DO NOT summarize or paraphrase the information
+- Remove only information that is duplicated between subtopics
+- Renumber the citations so that each unique URL has a single citation number across the whole document, numbered sequentially without gaps
+- End with one ### Sources section listing every source with its new number
+- Follow the output format and citation rules from your instructions
+
+Return only the merged findings document."""
@@ -0,0 +1,91 @@
+"""Local Relevance Ranking.
+
+This module scores search results against the search query and the research
+topic with Okapi BM25, computed locally over the pages of one search. The
+research tools use the scores to send only the most relevant pages to the
+summarization model; the others keep the short snippet returned by the search
+backend, which costs no model call.
+"""
+
+import math
+import re
+from collections import Counter
+
+# Words too common to say anything about relevance
+STOPWORDS = {
+    "a", "about", "after", "all", "also", "an", "and", "any", "are", "as", "at", "be", "been", "but", "by",
+    "can", "could", "did", "do", "does", "for", "from", "had", "has", "have", "how", "if", "in", "into",
+    "is", "it", "its", "may", "more", "most", "new", "not", "of", "on", "or", "other", "our", "over",
+    "should", "so", "such", "than", "that", "the", "their", "them", "then", "there", "these", "they",
+    "this", "to", "under", "up", "vs", "was", "we", "were", "what", "when", "where", "which", "while",
+    "who", "why", "will", "with", "would", "you", "your",
+}
+
+# Scripts written without spaces between words
+UNSPACED_SCRIPT_PATTERN = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]")
+
+def tokenize(text: str) -> list[str]:
+    """Split text into lower-cased word terms without stopwords.
+
+    Words of any script are kept. Plural endings of English words are
+    removed, so "batteries" matches "battery" and "rates" matches "rate".
+    Runs of Chinese or Japanese characters, which are written without spaces,
+    are split into overlapping character pairs.
+
+    Args:
+        text: Text to tokenize
+
+    Returns:
+        List of terms in text order
+    """
+    terms = []
+    for word in re.findall(r"[^\W_]+", text.lower()):
+        if UNSPACED_SCRIPT_PATTERN.search(word):
+            terms.extend(word[i:i + 2] for i in range(max(1, len(word) - 1)))
+            continue
+        if word in STOPWORDS or len(word) < 2:
+            continue
+        if word.isascii():
+            if word.endswith("ies") and len(word) > 4:
+                word = word[:-3] + "y"
+            elif word.endswith("s") and not word.endswith("ss") and len(word) > 3:
+                word = word[:-1]
+        terms.append(word)
+    return terms
+
+def bm25_scores(query: str, documents: list[str], k1: float = 1.5, b: float = 0.75) -> list[float]:
+    """Score documents against a query with Okapi BM25.
+
+    Document frequencies and the average length are taken from ``documents``
+    themselves, so the scores rank the documents against each other and are
+    not comparable across calls.
+
+    Args:
+        query: Query text; repeated terms weigh more
+        documents: Texts to score
+        k1: Term frequency saturation
+        b: Strength of the document length normalization
+
+    Returns:
+        One score per document, in input order
+    """
+    if not documents:
+        return []
+    term_counts = [Counter(tokenize(document)) for document in documents]
+    lengths = [sum(counts.values()) for counts in term_counts]
+    average_length = sum(lengths) / len(lengths) or 1.0
+    document_frequency = Counter(term for counts in term_counts for term in counts)
+
+    scores = []
+    for counts, length in zip(term_counts, lengths):
+        score = 0.0
+        for term, query_count in Counter(tokenize(query)).items():
+            frequency = counts.get(term, 0)
+            if not frequency:
+                continue
+            # The "+ 1" variant of IDF stays positive for terms found in every document
+            n = document_frequency[term]
+            idf = math.log(1 + (len(documents) - n + 0.5) / (n + 0.5))
+            score += query_count * idf * frequency * (k1 + 1) / (frequency + k1 * (1 - b + b * length / average_length))
+        scores.append(score)
+    return scores
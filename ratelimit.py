@@ -0,0 +1,279 @@
+"""Provider Rate Limiting.
+
+This module keeps model and search calls within the providers' quotas. Every
+provider model (Gemini Pro, Gemini Flash) and the search API get one
+process-wide limiter, shared by all graph nodes, tools and concurrent runs.
+A limiter combines a token bucket, which spaces requests to the configured
+requests per minute, with an adaptive concurrency limit: the number of calls in
+flight grows by about one per round of successful calls and is halved when the
+provider answers with a throttling error (AIMD). Throttled calls are retried
+after a jittered exponential backoff instead of failing into a fallback path.
+"""
+
+import asyncio
+import random
+import re
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from configuration import Configuration
+from tracing import annotate_span
+
+T = TypeVar("T")
+
+# ===== LIMITS =====
+
+@dataclass(frozen=True)
+class RateLimit:
+    """Quota of one provider model or API."""
+    requests_per_minute: float
+    max_concurrency: int
+
+# Limits per model name (as in the tiers of routing.DEFAULT_ROUTING) and for the search API
+RATE_LIMITS: dict[str, RateLimit] = {
+    "google_genai:gemini-2.5-pro": RateLimit(requests_per_minute=150, max_concurrency=16),
+    "google_genai:gemini-2.5-flash": RateLimit(requests_per_minute=1000, max_concurrency=32),
+    "tavily": RateLimit(requests_per_minute=1000, max_concurrency=16),
+}
+
+# Limit used for models without an entry in RATE_LIMITS
+DEFAULT_RATE_LIMIT = RateLimit(requests_per_minute=60, max_concurrency=8)
+
+THROTTLING_STATUS_CODES = {429, 503}
+THROTTLING_ERROR_NAMES = {"ResourceExhausted", "TooManyRequests", "RateLimitError", "UsageLimitExceededError"}
+# Fallback for errors without a status code or a known type; whole phrases only,
+# so e.g. "429 documents" or "overloaded function" do not count
+THROTTLING_MESSAGE_PATTERN = re.compile(
+    r"\b(?:(?:http|status|code|error)\W{0,3}429|resource[_ ]exhausted|resource has been exhausted|too many requests"
+    r"|rate[- ]limit(?:ed|s? exceeded|s? reached)|quota exceeded"
+    r"|(?:server|model|service|api|engine) (?:is )?(?:currently |temporarily )?overloaded|overloaded_error)\b",
+    re.I,
+)
+
+def error_status_code(error: BaseException) -> Optional[int]:
+    """Return the HTTP status code carried by an error or its response, if any."""
+    response = getattr(error, "response", None)
+    for status in (getattr(error, "status_code", None), getattr(error, "code", None), getattr(response, "status_code", None)):
+        if isinstance(status, int) and not isinstance(status, bool) and 100 <= status < 600:
+            return status
+    return None
+
+def is_throttling_error(error: BaseException) -> bool:
+    """Return whether an error means the provider is throttling us.
+
+    The HTTP status code decides when the error carries one, then the
+    exception type or its bases. Only errors without either are classified
+    by their message.
+
+    Args:
+        error: Exception raised by a model or search call
+
+    Returns:
+        True for HTTP 429/503 responses and the providers' quota errors
+    """
+    status = error_status_code(error)
+    if status is not None:
+        return status in THROTTLING_STATUS_CODES
+    if any(cls.__name__ in THROTTLING_ERROR_NAMES for cls in type(error).__mro__):
+        return True
+    return bool(THROTTLING_MESSAGE_PATTERN.search(str(error)))
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """Return the delay requested by a ``Retry-After`` header on the error's response, if any."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+# ===== LIMITER =====
+
+class AdaptiveRateLimiter:
+    """Token bucket plus AIMD concurrency limit for one provider model or API.
+
+    The limiter does not hold asyncio primitives, so one instance can be shared
+    by runs on different event loops.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        requests_per_minute: float,
+        max_concurrency: int,
+        min_concurrency: int = 1,
+        max_retries: int = 5,
+        base_backoff: float = 1.0,
+        max_backoff: float = 60.0,
+    ):
+        self.name = name
+        self.rate = requests_per_minute / 60.0
+        self.capacity = float(max(1, max_concurrency))
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+
+        self.concurrency_limit = float(max_concurrency)
+        self.in_flight = 0
+        self.throttled = 0
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._decreased_at = 0.0
+        self._waiters: deque[asyncio.Future] = deque()
+        self._lock = threading.Lock()
+
+    # Token bucket
+
+    def _reserve_token(self) -> float:
+        """Take a token and return how long to wait until it is available."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    # Concurrency limit
+
+    async def _acquire_slot(self) -> None:
+        while True:
+            with self._lock:
+                if self.in_flight < int(self.concurrency_limit):
+                    self.in_flight += 1
+                    return
+                waiter = asyncio.get_running_loop().create_future()
+                self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                with self._lock:
+                    if waiter in self._waiters:
+                        self._waiters.remove(waiter)
+                # Pass on a wake-up this waiter may have received
+                self._wake_waiters()
+                raise
+
+    def _release_slot(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+        self._wake_waiters()
+
+    def _wake_waiters(self) -> None:
+        with self._lock:
+            free_slots = int(self.concurrency_limit) - self.in_flight
+            waiters = [self._waiters.popleft() for _ in range(min(free_slots, len(self._waiters)))]
+        for waiter in waiters:
+            waiter.get_loop().call_soon_threadsafe(_wake, waiter)
+
+    def _on_success(self) -> None:
+        # Additive increase: about one more slot per round of successful calls
+        with self._lock:
+            self.concurrency_limit = min(
+                float(self.max_concurrency), self.concurrency_limit + 1.0 / self.concurrency_limit
+            )
+
+    def _on_throttled(self, started_at: float) -> None:
+        # Multiplicative decrease, once per congestion event: calls that were
+        # already in flight when the limit was last cut do not cut it again
+        with self._lock:
+            self.throttled += 1
+            self._tokens = min(self._tokens, 0.0)
+            if started_at >= self._decreased_at:
+                self.concurrency_limit = max(float(self.min_concurrency), self.concurrency_limit / 2)
+                self._decreased_at = time.monotonic()
+
+    def _backoff(self, attempt: int, error: BaseException) -> float:
+        # Full jitter, but never shorter than the provider asked for
+        delay = random.uniform(0, min(self.max_backoff, self.base_backoff * 2 ** attempt))
+        return max(delay, retry_after_seconds(error) or 0.0)
+
+    async def run(self, call: Callable[[], Awaitable[T]]) -> T:
+        """Run a provider call within the limits, retrying it while throttled.
+
+        Args:
+            call: Function starting the call; invoked again for every retry
+
+        Returns:
+            Result of the first call that is not throttled
+
+        Raises:
+            Exception: Errors other than throttling, or the last throttling
+                error once ``max_retries`` retries are used up
+        """
+        attempt = 0
+        while True:
+            delay = self._reserve_token()
+            if delay:
+                await asyncio.sleep(delay)
+            await self._acquire_slot()
+            started_at = time.monotonic()
+            try:
+                result = await call()
+            except Exception as e:
+                if not is_throttling_error(e):
+                    raise
+                self._on_throttled(started_at)
+                if attempt >= self.max_retries:
+                    raise
+                annotate_span(throttle_retries=attempt + 1)
+                backoff = self._backoff(attempt, e)
+                attempt += 1
+            else:
+                self._on_success()
+                return result
+            finally:
+                self._release_slot()
+
+            await asyncio.sleep(backoff)
+
+def _wake(waiter: asyncio.Future) -> None:
+    if not waiter.done():
+        waiter.set_result(None)
+
+# ===== LIMITER REGISTRY =====
+
+_rate_limiters: dict[str, Optional[AdaptiveRateLimiter]] = {}
+_registry_lock = threading.Lock()
+
+def get_rate_limiter(name: str) -> Optional[AdaptiveRateLimiter]:
+    """Return the process-wide limiter of a model or API, or None if rate limiting is disabled.
+
+    Args:
+        name: Model name such as ``google_genai:gemini-2.5-flash``, or ``tavily``
+
+    Returns:
+        Shared limiter for the name
+    """
+    with _registry_lock:
+        if name not in _rate_limiters:
+            configurable = Configuration.from_runnable_config()
+            limit = RATE_LIMITS.get(name, DEFAULT_RATE_LIMIT)
+            _rate_limiters[name] = AdaptiveRateLimiter(
+                name,
+                requests_per_minute=limit.requests_per_minute,
+                max_concurrency=limit.max_concurrency,
+                max_retries=configurable.rate_limit_max_retries,
+                max_backoff=configurable.rate_limit_max_backoff,
+            ) if configurable.rate_limit_enabled else None
+        return _rate_limiters[name]
+
+def set_rate_limiter(name: str, limiter: Optional[AdaptiveRateLimiter]) -> None:
+    """Install a limiter for a model or API for the whole process.
+
+    Args:
+        name: Model name or ``tavily``
+        limiter: Limiter to use, or None to call the provider without limits
+    """
+    with _registry_lock:
+        _rate_limiters[name] = limiter
+
+async def call_with_rate_limit(name: str, call: Callable[[], Awaitable[T]]) -> T:
+    """Run a provider call through the limiter of a model or API, if rate limiting is enabled."""
+    limiter = get_rate_limiter(name)
+    if limiter is None:
+        return await call()
+    return await limiter.run(call)
@@ -0,0 +1,294 @@
+"""Recording and Replay of External Calls.
+
+This module lets the research graph run deterministically without network
+access. ``ReplayChatModel`` stands in for the chat models and either records
+the responses of a real model into a cassette or replays them from one.
+``RecordingSearchBackend`` captures search responses in the fixture format
+served by ``FixtureSearchBackend``. ``install_replay`` wires both into the
+agent and its tools.
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Optional, Union
+
+from pydantic import ConfigDict
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, message_to_dict, messages_from_dict
+from langchain_core.messages.tool import tool_call_chunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import RunnableLambda
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from clients import set_chat_model
+from search_backends import FixtureSearchBackend, SearchBackend, set_search_backend
+from tools import estimate_tokens, get_today_str
+
+# Characters per streamed piece of a replayed text response (about 16 tokens)
+STREAM_PIECE_CHARS = 64
+
+# ===== CASSETTES =====
+
+class ReplayMissError(KeyError):
+    """Raised when a replayed call has no recorded response."""
+
+class Cassette:
+    """Store of recorded model responses keyed by a hash of the request."""
+
+    def __init__(self, path: Optional[Union[str, Path]] = None):
+        self.path = Path(path) if path else None
+        self.responses: dict[str, dict] = {}
+        if self.path and self.path.exists():
+            self.responses = json.loads(self.path.read_text())
+
+    def get(self, key: str) -> Optional[AIMessage]:
+        """Return the recorded response for a request key, if any."""
+        data = self.responses.get(key)
+        return messages_from_dict([data])[0] if data else None  # type: ignore
+
+    def put(self, key: str, message: AIMessage) -> None:
+        """Record the response for a request key."""
+        self.responses[key] = message_to_dict(message)
+
+    def save(self) -> None:
+        """Write the recorded responses to the cassette file."""
+        if self.path:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.write_text(json.dumps(self.responses, indent=2, sort_keys=True))
+
+def request_key(model: str, messages: list[BaseMessage], **kwargs: Any) -> str:
+    """Hash a model request into a stable cassette key.
+
+    Message ids are ignored and today's date is masked, so the same research
+    path produces the same keys on every run and on every day.
+    """
+    today = get_today_str()
+    payload = {
+        "model": model,
+        "messages": [
+            {
+                "type": m.type,
+                "content": str(m.content).replace(today, "<date>"),
+                "tool_calls": getattr(m, "tool_calls", None) or [],
+                "tool_call_id": getattr(m, "tool_call_id", None),
+            }
+            for m in messages
+        ],
+        **kwargs,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+# ===== CALL LOG =====
+
+class CallLog:
+    """Log of model calls with their node, simulated token counts and duration."""
+
+    def __init__(self):
+        self.calls: list[dict] = []
+
+    def record(self, **call: Any) -> None:
+        self.calls.append(call)
+
+# ===== REPLAY MODEL =====
+
+class ReplayChatModel(BaseChatModel):
+    """Chat model that replays recorded responses, recording them first if needed.
+
+    Lookup order for each request is: the cassette, then ``delegate`` (a real
+    model whose response is recorded), then ``responder`` (a function building
+    a synthetic response). A request none of them can answer raises
+    ``ReplayMissError``. Replayed and synthetic responses are delayed by
+    ``latency`` seconds plus ``latency_per_output_token`` per simulated output
+    token, to model provider latency.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    model: str
+    cassette: Cassette
+    delegate: Optional[Any] = None
+    responder: Optional[Callable[..., AIMessage]] = None
+    latency: float = 0.0
+    latency_per_output_token: float = 0.0
+    call_log: Optional[CallLog] = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "replay"
+
+    def bind_tools(self, tools: list, **kwargs: Any):
+        """Bind tools so their schemas are part of the request key."""
+        return self.bind(tools=[convert_to_openai_tool(tool) for tool in tools], **kwargs)
+
+    def with_structured_output(self, schema: Any, *, include_raw: bool = False, **kwargs: Any):
+        """Return a runnable that parses replayed JSON content into ``schema``."""
+        return self.bind(structured_output=schema) | RunnableLambda(
+            lambda message: schema.model_validate_json(message.content)
+        )
+
+    async def _respond(self, messages: list[BaseMessage], **kwargs: Any) -> tuple[AIMessage, str]:
+        """Return the response to a request and where it came from.
+
+        The source is ``cassette``, ``delegate`` or ``responder``.
+        """
+        schema = kwargs.get("structured_output")
+        tools = kwargs.get("tools")
+        key = request_key(
+            self.model,
+            messages,
+            tools=[t["function"]["name"] for t in tools or []],
+            structured_output=schema.__name__ if schema else None,
+        )
+
+        message = self.cassette.get(key)
+        if message is not None:
+            return message, "cassette"
+
+        if self.delegate is not None:
+            if schema is not None:
+                parsed = await self.delegate.with_structured_output(schema).ainvoke(messages)
+                message = AIMessage(content=parsed.model_dump_json())
+            elif tools:
+                message = await self.delegate.bind_tools(tools).ainvoke(messages)
+            else:
+                message = await self.delegate.ainvoke(messages)
+            message = AIMessage(content=message.content, tool_calls=message.tool_calls)
+            self.cassette.put(key, message)
+            return message, "delegate"
+
+        if self.responder is not None:
+            return self.responder(messages, **kwargs), "responder"
+
+        raise ReplayMissError(f"No recorded response for {self.model} request {key[:12]}")
+
+    async def _replay(self, messages: list[BaseMessage], **kwargs: Any) -> tuple[AIMessage, str]:
+        """Return the response with simulated token usage, and where it came from."""
+        message, source = await self._respond(messages, **kwargs)
+
+        input_tokens = sum(estimate_tokens(str(m.content)) for m in messages)
+        output_tokens = estimate_tokens(str(message.content)) + estimate_tokens(str(message.tool_calls or ""))
+        message = AIMessage(
+            content=message.content,
+            tool_calls=message.tool_calls,
+            usage_metadata={
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens,
+            },
+        )
+        return message, source
+
+    def _log_call(self, message: AIMessage, start: float, run_manager=None) -> None:
+        if self.call_log is not None:
+            metadata = run_manager.metadata if run_manager else {}
+            self.call_log.record(
+                model=self.model,
+                node=metadata.get("langgraph_node"),
+                input_tokens=message.usage_metadata["input_tokens"],
+                output_tokens=message.usage_metadata["output_tokens"],
+                seconds=time.perf_counter() - start,
+            )
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        start = time.perf_counter()
+        message, source = await self._replay(messages, **kwargs)
+
+        # Simulate provider latency for responses that did not come from a real model
+        if source != "delegate":
+            delay = self.latency + self.latency_per_output_token * message.usage_metadata["output_tokens"]
+            if delay:
+                await asyncio.sleep(delay)
+
+        self._log_call(message, start, run_manager)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        """Stream text responses in pieces, paced like a provider generating them.
+
+        The first piece arrives after ``latency`` and every piece after that
+        takes ``latency_per_output_token`` per token. Responses with tool calls
+        arrive as a single chunk.
+        """
+        start = time.perf_counter()
+        message, source = await self._replay(messages, **kwargs)
+        paced = source != "delegate"
+        if paced and self.latency:
+            await asyncio.sleep(self.latency)
+
+        text = message.content if isinstance(message.content, str) else ""
+        if message.tool_calls or not text:
+            pieces = [message.content]
+        else:
+            pieces = [text[i:i + STREAM_PIECE_CHARS] for i in range(0, len(text), STREAM_PIECE_CHARS)]
+
+        for index, piece in enumerate(pieces):
+            if paced and self.latency_per_output_token:
+                await asyncio.sleep(self.latency_per_output_token * estimate_tokens(str(piece)))
+            chunk = AIMessageChunk(
+                content=piece,
+                tool_call_chunks=[
+                    tool_call_chunk(name=call["name"], args=json.dumps(call["args"]), id=call["id"], index=i)
+                    for i, call in enumerate(message.tool_calls)
+                ] if index == 0 else [],
+                usage_metadata=message.usage_metadata if index == 0 else None,
+            )
+            generation = ChatGenerationChunk(message=chunk)
+            if run_manager is not None and isinstance(piece, str):
+                await run_manager.on_llm_new_token(piece, chunk=generation)
+            yield generation
+
+        self._log_call(message, start, run_manager)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        return asyncio.run(self._agenerate(messages, stop=stop, **kwargs))
+
+# ===== SEARCH RECORDING =====
+
+class RecordingSearchBackend(SearchBackend):
+    """Search backend that records another backend's responses as fixtures.
+
+    The recorded responses are saved in the format read by
+    ``FixtureSearchBackend.from_file``.
+    """
+
+    def __init__(self, backend: SearchBackend, path: Union[str, Path]):
+        super().__init__(max_concurrency=backend.max_concurrency, timeout=backend.timeout)
+        self.backend = backend
+        self.path = Path(path)
+        self.responses: dict[str, dict] = (
+            json.loads(self.path.read_text()) if self.path.exists() else {}
+        )
+
+    async def _search(self, query, max_results, topic, include_raw_content) -> dict:
+        response = await self.backend._search(query, max_results, topic, include_raw_content)
+        self.responses[query] = response
+        return response
+
+    def save(self) -> None:
+        """Write the recorded responses to the fixture file."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps(self.responses, indent=2, sort_keys=True))
+
+# ===== INSTALLATION =====
+
+def install_replay(
+    models: dict[str, ReplayChatModel],
+    search_backend: Optional[SearchBackend] = None,
+) -> None:
+    """Replace the agent's models and search backend with replay stand-ins.
+
+    Args:
+        models: Replay models by role: ``research``, ``summarization`` and ``compression``
+        search_backend: Backend to install, typically a ``FixtureSearchBackend``
+    """
+    for role, model in models.items():
+        set_chat_model(role, model)
+    if search_backend is not None:
+        set_search_backend(search_backend)
+
+def load_fixture_backend(path: Union[str, Path], latency: float = 0.0) -> FixtureSearchBackend:
+    """Load a fixture search backend from a JSON file of recorded responses."""
+    return FixtureSearchBackend.from_file(path, latency=latency)
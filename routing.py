@@ -0,0 +1,153 @@
+"""Model Routing.
+
+This module decides which model handles each model call. Models are defined
+once as named tiers and shared by the graph and the tools. Routes map a graph
+node or a model role to an ordered list of rules, and the first rule whose
+conditions match the situation of the call picks the tier. A node without a
+route of its own falls back to the route of its role (``research``,
+``summarization`` or ``compression``), so a deployment can send early
+research turns or short pages to a cheaper model and escalate to a stronger
+one only when needed, without code changes.
+
+The process-wide ``model_routing`` setting (CLI ``--routing``, environment
+``MODEL_ROUTING``; a runnable config cannot change it) names a JSON file, or holds
+inline JSON, that is merged over the default routing: tiers are added or
+replaced by name and routes replace the routes of the same name. For example::
+
+    {
+      "tiers": {"flash-lite": {"model": "google_genai:gemini-2.5-flash-lite"}},
+      "routes": {
+        "llm_call": [{"when": {"max_iteration": 2}, "tier": "flash"}],
+        "summarize_webpage": [{"when": {"max_input_tokens": 2000}, "tier": "flash-lite"}]
+      }
+    }
+
+Rules can test the ``iteration`` (tool rounds completed) and the estimated
+``input_tokens`` of a call with ``min_``/``max_`` bounds; a rule without
+``when`` always matches.
+"""
+
+import copy
+import json
+import operator
+from pathlib import Path
+from typing import Any, Optional
+
+from configuration import Configuration
+
+# ===== MODEL ROUTING =====
+
+# Model roles every routing must be able to serve
+ROLES = ("research", "summarization", "compression")
+
+DEFAULT_ROUTING: dict[str, Any] = {
+    "tiers": {
+        "pro": {"model": "google_genai:gemini-2.5-pro"},
+        "flash": {"model": "google_genai:gemini-2.5-flash"},
+        "flash-long-output": {"model": "google_genai:gemini-2.5-flash", "max_tokens": 32000},
+    },
+    "routes": {
+        "research": [{"tier": "pro"}],
+        "summarization": [{"tier": "flash"}],
+        "compression": [{"tier": "flash-long-output"}],
+    },
+}
+
+# Rule conditions as the situation attribute they test and how
+CONDITIONS = {
+    "min_iteration": ("iteration", operator.ge),
+    "max_iteration": ("iteration", operator.le),
+    "min_input_tokens": ("input_tokens", operator.ge),
+    "max_input_tokens": ("input_tokens", operator.le),
+}
+
+class ModelRouting:
+    """Tiers of models and the routes that choose between them.
+
+    Args:
+        tiers: Mapping of tier names to ``init_chat_model`` arguments
+        routes: Mapping of node or role names to ordered lists of rules, each
+            with a ``tier`` and optional ``when`` conditions
+
+    Raises:
+        ValueError: If a rule names an unknown tier or condition, or a role
+            has no rule that always matches
+    """
+
+    def __init__(self, tiers: dict[str, dict[str, Any]], routes: dict[str, list[dict[str, Any]]]):
+        self.tiers = tiers
+        self.routes = routes
+
+        for name, rules in routes.items():
+            for rule in rules:
+                if rule.get("tier") not in tiers:
+                    raise ValueError(f"Route '{name}' uses unknown model tier '{rule.get('tier')}'")
+                unknown = set(rule.get("when", {})) - set(CONDITIONS)
+                if unknown:
+                    raise ValueError(f"Route '{name}' uses unknown conditions: {', '.join(sorted(unknown))}")
+        for role in ROLES:
+            if not any(not rule.get("when") for rule in routes.get(role, [])):
+                raise ValueError(f"Route '{role}' needs a rule without conditions")
+
+    @classmethod
+    def from_config(cls, source: str = "") -> "ModelRouting":
+        """Build the routing from the defaults and an optional override.
+
+        Args:
+            source: Path to a JSON routing file, inline JSON, or empty for the defaults
+
+        Returns:
+            ModelRouting with the override merged over the defaults
+        """
+        routing = copy.deepcopy(DEFAULT_ROUTING)
+        if source.strip():
+            text = source if source.lstrip().startswith("{") else Path(source).read_text(encoding="utf-8")
+            override = json.loads(text)
+            routing["tiers"].update(override.get("tiers", {}))
+            routing["routes"].update(override.get("routes", {}))
+        return cls(routing["tiers"], routing["routes"])
+
+    def select(self, role: str, node: Optional[str] = None, **situation: Any) -> str:
+        """Return the tier for a model call.
+
+        The node's rules are tried first, then the role's. A condition on a
+        situation attribute that was not given does not match.
+
+        Args:
+            role: Model role of the call
+            node: Graph node or tool step making the call
+            **situation: Attributes of the call, e.g. ``iteration`` and ``input_tokens``
+
+        Returns:
+            Name of the selected tier
+        """
+        rules = (self.routes.get(node, []) if node else []) + self.routes[role]
+        for rule in rules:
+            if all(self._matches(condition, bound, situation) for condition, bound in rule.get("when", {}).items()):
+                return rule["tier"]
+        raise ValueError(f"No model route matches role '{role}'")
+
+    @staticmethod
+    def _matches(condition: str, bound: Any, situation: dict[str, Any]) -> bool:
+        attribute, compare = CONDITIONS[condition]
+        return situation.get(attribute) is not None and compare(situation[attribute], bound)
+
+# ===== ROUTING REGISTRY =====
+
+_model_routing: Optional[ModelRouting] = None
+
+def get_model_routing() -> ModelRouting:
+    """Return the process-wide model routing, loading it from the configuration on first use."""
+    global _model_routing
+    if _model_routing is None:
+        _model_routing = ModelRouting.from_config(Configuration.from_runnable_config().model_routing)
+    return _model_routing
+
+def set_model_routing(routing: Optional[ModelRouting]) -> None:
+    """Install a model routing for the whole process.
+
+    Args:
+        routing: Routing to use, or None to load it from the configuration again on next use
+    """
+    global _model_routing
+    _model_routing = routing
@@ -0,0 +1,266 @@
+"""Search Backends.
+
+This module defines the pluggable search backend used by the research tools.
+The default backend talks to the Tavily API through a single, process-wide
+keep-alive HTTP connection pool per event loop. Alternative backends (a local stand-in server,
+canned fixtures) can be installed with ``set_search_backend`` for tests and
+benchmarks.
+"""
+
+import asyncio
+import json
+import os
+import weakref
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Optional, Union
+
+import httpx
+from typing_extensions import Literal
+
+from configuration import Configuration
+from ratelimit import AdaptiveRateLimiter, get_rate_limiter
+
+SearchTopic = Literal["general", "news", "finance"]
+
+# ===== BACKEND INTERFACE =====
+
+class SearchBackend(ABC):
+    """Base class for asynchronous search backends.
+
+    Subclasses implement ``_search``. Calls made through ``search`` are limited
+    to ``max_concurrency`` in flight per event loop and cancelled after
+    ``timeout`` seconds.
+    With a ``rate_limiter``, requests also stay within the provider's quota
+    and throttled requests are retried.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 8,
+        timeout: Optional[float] = 30.0,
+        rate_limiter: Optional[AdaptiveRateLimiter] = None,
+    ):
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter
+        self._semaphores: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """Return the concurrency limit of the running event loop, creating it on first use.
+
+        asyncio primitives are bound to the loop that first waits on them, so
+        a backend shared by runs on different loops keeps one per loop.
+        """
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        return semaphore
+
+    async def search(
+        self,
+        query: str,
+        max_results: int = 3,
+        topic: SearchTopic = "general",
+        include_raw_content: bool = True,
+    ) -> dict:
+        """Run a single search query under the backend's concurrency limit.
+
+        Args:
+            query: Search query to execute
+            max_results: Maximum number of results to return
+            topic: Topic filter for search results
+            include_raw_content: Whether to include raw webpage content
+
+        Returns:
+            Search response dictionary with a ``results`` list
+
+        Raises:
+            asyncio.TimeoutError: If the backend does not answer within ``timeout``
+        """
+        async def attempt() -> dict:
+            async with self._get_semaphore():
+                return await asyncio.wait_for(
+                    self._search(
+                        query,
+                        max_results=max_results,
+                        topic=topic,
+                        include_raw_content=include_raw_content,
+                    ),
+                    timeout=self.timeout,
+                )
+
+        if self.rate_limiter is None:
+            return await attempt()
+        return await self.rate_limiter.run(attempt)
+
+    @abstractmethod
+    async def _search(
+        self,
+        query: str,
+        max_results: int,
+        topic: SearchTopic,
+        include_raw_content: bool,
+    ) -> dict:
+        """Execute the search request against the underlying provider."""
+
+    async def aclose(self) -> None:
+        """Release any resources held by the backend."""
+
+# ===== TAVILY BACKEND =====
+
+class TavilySearchBackend(SearchBackend):
+    """Search backend for the Tavily API using a shared keep-alive connection pool.
+
+    An HTTP connection pool can only be used on the event loop it was created
+    on, so the backend keeps one pool per running loop. Pools of loops that
+    have been closed are dropped, and ``aclose`` closes the pool of the
+    running loop.
+
+    Set ``base_url`` (or the ``TAVILY_API_BASE_URL`` environment variable) to
+    point the backend at a local stand-in server speaking the Tavily protocol.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        max_concurrency: int = 8,
+        timeout: Optional[float] = 30.0,
+        rate_limiter: Optional[AdaptiveRateLimiter] = None,
+    ):
+        super().__init__(max_concurrency=max_concurrency, timeout=timeout, rate_limiter=rate_limiter)
+        self.api_key = api_key or os.getenv("TAVILY_API_KEY")
+        self.base_url = base_url or os.getenv("TAVILY_API_BASE_URL", "https://api.tavily.com")
+        self._clients: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+    def _get_client(self):
+        """Return the Tavily client of the running event loop, creating it and its connection pool on first use."""
+        loop = asyncio.get_running_loop()
+        for other_loop in [other for other in self._clients if other.is_closed()]:
+            # Their connections cannot be closed any more, only dropped
+            del self._clients[other_loop]
+
+        if loop not in self._clients:
+            from tavily import AsyncTavilyClient
+
+            http_client = httpx.AsyncClient(
+                base_url=self.base_url,
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency,
+                ),
+                timeout=self.timeout,
+            )
+            self._clients[loop] = (AsyncTavilyClient(api_key=self.api_key, client=http_client), http_client)
+        return self._clients[loop][0]
+
+    async def _search(
+        self,
+        query: str,
+        max_results: int,
+        topic: SearchTopic,
+        include_raw_content: bool,
+    ) -> dict:
+        return await self._get_client().search(
+            query,
+            max_results=max_results,
+            include_raw_content=include_raw_content,
+            topic=topic,
+            timeout=self.timeout,
+        )
+
+    async def aclose(self) -> None:
+        """Close the HTTP connection pool of the running event loop."""
+        entry = self._clients.pop(asyncio.get_running_loop(), None)
+        if entry is not None:
+            await entry[1].aclose()
+
+# ===== FIXTURE BACKEND =====
+
+class FixtureSearchBackend(SearchBackend):
+    """Search backend that serves canned responses, for tests and benchmarks.
+
+    Responses are looked up by exact query. Unknown queries return an empty
+    result list, mirroring a search that found nothing.
+    """
+
+    def __init__(
+        self,
+        responses: dict[str, dict],
+        latency: float = 0.0,
+        max_concurrency: int = 8,
+        timeout: Optional[float] = 30.0,
+    ):
+        super().__init__(max_concurrency=max_concurrency, timeout=timeout)
+        self.responses = responses
+        self.latency = latency
+        self.calls: list[str] = []
+
+    @classmethod
+    def from_file(cls, path: Union[str, Path], **kwargs) -> "FixtureSearchBackend":
+        """Load fixture responses from a JSON file mapping queries to responses.
+
+        Args:
+            path: Path to the JSON fixture file
+            **kwargs: Extra arguments forwarded to the constructor
+
+        Returns:
+            FixtureSearchBackend serving the loaded responses
+        """
+        return cls(json.loads(Path(path).read_text()), **kwargs)
+
+    async def _search(
+        self,
+        query: str,
+        max_results: int,
+        topic: SearchTopic,
+        include_raw_content: bool,
+    ) -> dict:
+        self.calls.append(query)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        response = self.responses.get(query, {"query": query, "results": []})
+        results = []
+        for result in response.get("results", [])[:max_results]:
+            result = dict(result)
+            if not include_raw_content:
+                result.pop("raw_content", None)
+            results.append(result)
+        return {**response, "query": query, "results": results}
+
+# ===== BACKEND REGISTRY =====
+
+_search_backend: Optional[SearchBackend] = None
+
+def get_search_backend() -> SearchBackend:
+    """Return the process-wide search backend, creating the Tavily backend on first use."""
+    global _search_backend
+    if _search_backend is None:
+        configurable = Configuration.from_runnable_config()
+        _search_backend = TavilySearchBackend(
+            max_concurrency=configurable.search_max_concurrency,
+            timeout=configurable.search_timeout,
+            rate_limiter=get_rate_limiter("tavily"),
+        )
+    return _search_backend
+
+async def close_search_backend() -> None:
+    """Release the resources the search backend holds on the running event loop.
+
+    Call it at the end of a run before its event loop is closed; the backend
+    stays installed and opens new connections when used again.
+    """
+    if _search_backend is not None:
+        await _search_backend.aclose()
+
+def set_search_backend(backend: Optional[SearchBackend]) -> None:
+    """Install a search backend for the whole process.
+
+    Args:
+        backend: Backend to use, or None to restore the default Tavily backend
+    """
+    global _search_backend
+    _search_backend = backend
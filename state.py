@@ -1,7 +1,7 @@
 import operator
-from typing_extensions import TypedDict, Annotated, List, Sequence
+from typing_extensions import TypedDict, Annotated, Dict, List, Sequence
 from pydantic import BaseModel, Field
-from langchain_core.messages import BaseMessage
+from langchain_core.messages import BaseMessage, HumanMessage
 from langgraph.graph.message import add_messages
 
 class ResearcherState(TypedDict):
@@ -10,13 +10,40 @@ class ResearcherState(TypedDict):
 
     This state tracks the researcher's conversation, iteration count for limiting
     tool calls, the research topic being investigated, compressed findings,
-    and raw research notes for detailed analysis.
+    raw research notes for detailed analysis, and the URLs already summarized
+    during the run (mapped to their titles) so they are not summarized twice.
+    ``seen_pages`` likewise maps the hex MinHash signatures of summarized
+    pages to their URLs, so near-duplicate pages are not summarized either.
+
+    When the history grows large, ``research_digest`` holds a compact digest of
+    the first ``digest_cursor`` messages, which the research model sees in
+    place of those messages. ``researcher_messages`` always keeps the originals.
+
+    In incremental compression mode, ``compressed_findings`` is the findings
+    document compressed so far from the first ``findings_cursor`` messages,
+    and ``findings_merge`` names the merge of later messages running in the
+    background, if any.
+
+    ``search_calls``, ``tokens_used`` and ``elapsed_seconds`` (the time
+    spent in the research loop's nodes, so a resumed run does not count the
+    time it was interrupted) track the run against its search, token and
+    time budgets.
     """
     researcher_messages: Annotated[Sequence[BaseMessage], add_messages]
     tool_call_iterations: int
     research_topic: str
     compressed_research: str
     raw_notes: Annotated[List[str], operator.add]
+    seen_urls: Dict[str, str]
+    seen_pages: Dict[str, str]
+    research_digest: str
+    digest_cursor: int
+    compressed_findings: str
+    findings_cursor: int
+    findings_merge: str
+    search_calls: int
+    tokens_used: Annotated[int, operator.add]
+    elapsed_seconds: Annotated[float, operator.add]
 
 class ResearcherOutputState(TypedDict):
     """
@@ -24,12 +51,57 @@ class ResearcherOutputState(TypedDict):
 
     This represents the final output of the research process with compressed
     research findings and all raw notes from the research process.
+
+    With the blob store enabled, large tool outputs in ``researcher_messages``
+    are stubs and ``raw_notes`` hold placeholders for them;
+    ``blobs.materialize_messages`` and ``blobs.materialize_notes`` load their
+    full content.
     """
     compressed_research: str
     raw_notes: Annotated[List[str], operator.add]
     researcher_messages: Annotated[Sequence[BaseMessage], add_messages]
     
+class SupervisorState(TypedDict):
+    """
+    State for the research supervisor that splits a broad topic into subtopics.
+
+    The supervisor plans ``subtopics`` from the research topic, researches
+    each of them with its own research agent run, collects their compressed
+    findings in ``subtopic_research`` and merges them into one brief.
+    """
+    research_topic: str
+    subtopics: List[str]
+    subtopic_research: Annotated[List[dict], operator.add]
+    compressed_research: str
+    raw_notes: Annotated[List[str], operator.add]
+
+class SupervisorOutputState(TypedDict):
+    """
+    Output state for the research supervisor containing the merged brief.
+    """
+    subtopics: List[str]
+    compressed_research: str
+    raw_notes: Annotated[List[str], operator.add]
+
+class Subtopics(BaseModel):
+    """Schema for splitting a research topic into independent subtopics."""
+    subtopics: List[str] = Field(description="Self-contained research questions that together cover the topic")
+
 class Summary(BaseModel):
     """Schema for webpage content summarization."""
     summary: str = Field(description="Concise summary of the webpage content")
-    key_excerpts: str = Field(description="Important quotes and excerpts from the content")
\ No newline at end of file
+    key_excerpts: str = Field(description="Important quotes and excerpts from the content")
+
+def initial_researcher_state(topic: str) -> ResearcherState:
+    """Build the initial researcher state for a research topic."""
+    return {
+        "research_topic": topic,
+        "researcher_messages": [HumanMessage(content=f"Please research the following topic: {topic}")],
+        "tool_call_iterations": 0,
+        "search_calls": 0,
+        "tokens_used": 0,
+        "elapsed_seconds": 0.0,
+        "raw_notes": [],
+        "seen_urls": {},
+        "seen_pages": {}
+    }  # type: ignore
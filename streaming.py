@@ -0,0 +1,116 @@
+"""Research Streaming.
+
+This module runs the research agent, or the supervisor when it is enabled,
+and yields its progress as it happens: one event per finished graph node and
+one per token of the final report while ``compress_research`` (or the
+supervisor's ``merge_research``) is still generating it. The CLI prints these events,
+and programmatic callers can consume the same async iterators.
+
+With checkpointing enabled, a run on the thread id of an interrupted run
+resumes it, and a run on the thread id of a finished run only yields its
+stored report.
+
+The iterators can be consumed on any event loop, one ``asyncio.run`` per
+report included. Callers that own the loop should await
+``search_backends.close_search_backend()`` before closing it.
+"""
+
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Optional
+
+from langchain_core.runnables import RunnableConfig
+from typing_extensions import Literal
+
+# Node whose model output is the final report, in the research agent and in the supervisor
+REPORT_NODE = "compress_research"
+SUPERVISOR_REPORT_NODE = "merge_research"
+
+@dataclass
+class ResearchEvent:
+    """A progress event of a streamed research run.
+
+    ``update`` events carry the output of a finished node, ``report_token``
+    events a piece of the report as it is generated, and the final ``report``
+    event the complete report. ``streamed`` tells whether the report tokens
+    already covered the full report.
+    """
+    type: Literal["update", "report_token", "report"]
+    node: Optional[str] = None
+    content: str = ""
+    output: dict[str, Any] = field(default_factory=dict)
+    streamed: bool = False
+
+async def stream_research(topic: str, config: Optional[RunnableConfig] = None) -> AsyncIterator[ResearchEvent]:
+    """Run the research agent on a topic and yield its progress events.
+
+    Args:
+        topic: Research topic to investigate
+        config: Optional runnable config passed to the graph; when
+            checkpointing, ``configurable.thread_id`` names the run and a new
+            one is generated if it is missing
+
+    Yields:
+        ResearchEvent for each finished node and each report token, then the
+        final report
+    """
+    from agent import resumable_input
+    from supervisor import get_research_graph
+
+    graph = get_research_graph(config)
+    report_node = SUPERVISOR_REPORT_NODE if SUPERVISOR_REPORT_NODE in graph.nodes else REPORT_NODE
+    configurable = dict((config or {}).get("configurable") or {})
+    if graph.checkpointer is not None and not configurable.get("thread_id"):
+        config = {**(config or {}), "configurable": {**configurable, "thread_id": str(uuid.uuid4())}}
+
+    graph_input, finished = await resumable_input(graph, topic, config)
+    if finished is not None:
+        yield ResearchEvent(
+            type="report", node=report_node, content=finished.get("compressed_research", ""), output=finished
+        )
+        return
+
+    report_tokens: list[str] = []
+    async for mode, chunk in graph.astream(graph_input, config, stream_mode=["updates", "messages"]):
+        if mode == "messages":
+            message, metadata = chunk
+            if metadata.get("langgraph_node") == report_node and message.text:
+                report_tokens.append(message.text)
+                yield ResearchEvent(type="report_token", node=report_node, content=message.text)
+            continue
+
+        for node_name, output in chunk.items():
+            yield ResearchEvent(type="update", node=node_name, output=output or {})
+            if node_name == report_node:
+                report = output["compressed_research"]
+                yield ResearchEvent(
+                    type="report",
+                    node=report_node,
+                    content=report,
+                    output=output,
+                    streamed="".join(report_tokens) == report,
+                )
+
+async def stream_report(topic: str, config: Optional[RunnableConfig] = None) -> AsyncIterator[str]:
+    """Run the research agent on a topic and yield only the text of its final report.
+
+    Report tokens are yielded as they are generated. When the report was not
+    generated token by token (e.g. it came from incrementally compressed
+    findings without a new model call), it is yielded in one piece.
+
+    Args:
+        topic: Research topic to investigate
+        config: Optional runnable config passed to the graph
+
+    Yields:
+        Consecutive pieces of the report text
+    """
+    streamed = []
+    async for event in stream_research(topic, config):
+        if event.type == "report_token":
+            streamed.append(event.content)
+            yield event.content
+        elif event.type == "report" and not event.streamed:
+            if streamed:
+                yield "\n\n"
+            yield event.content
@@ -0,0 +1,185 @@
+"""Research Supervisor Implementation.
+
+This module implements a supervisor graph for broad research topics. The
+supervisor splits the topic into independent subtopics, researches them with
+concurrent runs of the research agent, and merges their compressed findings
+into one brief. A broad topic then takes about as long as its slowest
+subtopic instead of the sum of all its searches.
+"""
+
+import asyncio
+import hashlib
+from typing import Optional
+
+from langgraph.graph import StateGraph, START, END
+from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.runnables import RunnableConfig
+
+from agent import get_researcher_agent, resumable_input
+from clients import get_chat_model, invoke_model, route_model
+from configuration import Configuration
+from state import SupervisorState, SupervisorOutputState, Subtopics
+from tools import estimate_tokens, get_today_str
+from prompts import compress_research_system_prompt, merge_subtopic_research_prompt, plan_subtopics_prompt
+
+# ===== SUPERVISOR NODES =====
+
+async def plan_subtopics(state: SupervisorState, config: RunnableConfig) -> dict:
+    """Split the research topic into at most ``max_subtopics`` independent subtopics.
+
+    If planning fails, the topic is researched as a single subtopic.
+    """
+    configurable = Configuration.from_runnable_config(config)
+    topic = state["research_topic"]
+    if configurable.max_subtopics <= 1:
+        return {"subtopics": [topic]}
+
+    prompt = plan_subtopics_prompt.format(
+        research_topic=topic, max_subtopics=configurable.max_subtopics, date=get_today_str()
+    )
+    try:
+        tier = route_model("research", "plan_subtopics", input_tokens=estimate_tokens(prompt))
+        plan = await invoke_model(
+            "research",
+            [HumanMessage(content=prompt)],
+            model=get_chat_model("research", tier).with_structured_output(Subtopics),
+            tier=tier,
+        )
+        subtopics = [subtopic.strip() for subtopic in plan.subtopics if subtopic.strip()]
+    except Exception as e:
+        print(f"Failed to plan subtopics, researching the topic as a whole: {str(e)}")
+        subtopics = []
+
+    return {"subtopics": subtopics[:configurable.max_subtopics] or [topic]}
+
+async def research_subtopics(state: SupervisorState, config: RunnableConfig) -> dict:
+    """Research all subtopics concurrently, each with its own research agent run.
+
+    At most ``max_concurrent_subtopics`` runs are in flight at once. With
+    checkpointing, each run is saved on a thread derived from the
+    supervisor's thread, so resuming an interrupted supervisor skips the
+    subtopics that already finished and resumes the others. A failed subtopic
+    is reported and left out of the brief unless all of them fail.
+    """
+    configurable = Configuration.from_runnable_config(config)
+    semaphore = asyncio.Semaphore(configurable.max_concurrent_subtopics)
+    graph = get_researcher_agent()
+
+    async def research(subtopic: str) -> dict:
+        async with semaphore:
+            subtopic_config = make_subtopic_config(config, subtopic, checkpointed=graph.checkpointer is not None)
+            graph_input, output = await resumable_input(graph, subtopic, subtopic_config)
+            if output is None:
+                output = await graph.ainvoke(graph_input, subtopic_config)
+            return output
+
+    outputs = await asyncio.gather(
+        *(research(subtopic) for subtopic in state["subtopics"]), return_exceptions=True
+    )
+
+    subtopic_research, raw_notes, errors = [], [], []
+    for subtopic, output in zip(state["subtopics"], outputs):
+        if isinstance(output, Exception):
+            print(f"Failed to research subtopic '{subtopic}': {str(output)}")
+            errors.append(output)
+            continue
+        subtopic_research.append({"subtopic": subtopic, "compressed_research": output.get("compressed_research", "")})
+        raw_notes.extend(output.get("raw_notes", []))
+    if errors and not subtopic_research:
+        raise errors[0]
+
+    return {"subtopic_research": subtopic_research, "raw_notes": raw_notes}
+
+async def merge_research(state: SupervisorState) -> dict:
+    """Merge the compressed findings of all subtopics into one brief.
+
+    A single subtopic's findings are returned as they are, and no findings at
+    all leave the brief empty rather than asking the model to merge nothing.
+    If merging fails, the findings are concatenated under their subtopics
+    instead.
+    """
+    subtopic_research = [result for result in state["subtopic_research"] if result["compressed_research"]]
+    if not subtopic_research:
+        return {"compressed_research": ""}
+    if len(subtopic_research) == 1:
+        return {"compressed_research": subtopic_research[0]["compressed_research"]}
+
+    formatted_research = "\n\n".join(
+        f"<subtopic_research>\nSUBTOPIC: {result['subtopic']}\n\n{result['compressed_research']}\n</subtopic_research>"
+        for result in subtopic_research
+    )
+    try:
+        tier = route_model("compression", "merge_research", input_tokens=estimate_tokens(formatted_research))
+        response = await invoke_model("compression", [
+            SystemMessage(content=compress_research_system_prompt.format(date=get_today_str())),
+            HumanMessage(content=merge_subtopic_research_prompt.format(
+                research_topic=state["research_topic"], subtopic_research=formatted_research
+            )),
+        ], tier=tier)
+        compressed_research = str(response.content)
+    except Exception as e:
+        print(f"Failed to merge subtopic findings, concatenating them: {str(e)}")
+        compressed_research = "\n\n".join(
+            f"## {result['subtopic']}\n\n{result['compressed_research']}" for result in subtopic_research
+        )
+
+    return {"compressed_research": compressed_research}
+
+def make_subtopic_config(config: RunnableConfig, subtopic: str, checkpointed: bool) -> RunnableConfig:
+    """Build the runnable config of a subtopic's research run.
+
+    The run gets the supervisor's callbacks and configuration values but none
+    of its graph internals, so it runs as an independent graph. When
+    checkpointed, its thread id is derived from the supervisor's thread and
+    the subtopic.
+    """
+    configurable = {
+        name: value for name, value in (config.get("configurable") or {}).items()
+        if name in Configuration.model_fields
+    }
+    thread_id = (config.get("configurable") or {}).get("thread_id")
+    if checkpointed and thread_id:
+        subtopic_digest = hashlib.sha256(subtopic.encode("utf-8")).hexdigest()[:12]
+        configurable["thread_id"] = f"{thread_id}-subtopic-{subtopic_digest}"
+    return {"callbacks": config.get("callbacks"), "configurable": configurable}
+
+# ===== GRAPH CONSTRUCTION =====
+
+# Build the supervisor workflow
+supervisor_builder = StateGraph(SupervisorState, output_schema=SupervisorOutputState)
+
+# Add nodes to the graph
+supervisor_builder.add_node("plan_subtopics", plan_subtopics)
+supervisor_builder.add_node("research_subtopics", research_subtopics)
+supervisor_builder.add_node("merge_research", merge_research)
+
+# Add edges to connect nodes
+supervisor_builder.add_edge(START, "plan_subtopics")
+supervisor_builder.add_edge("plan_subtopics", "research_subtopics")
+supervisor_builder.add_edge("research_subtopics", "merge_research")
+supervisor_builder.add_edge("merge_research", END)
+
+# Compile the supervisor
+supervisor_agent = supervisor_builder.compile()
+
+# ===== CHECKPOINTED RUNS =====
+
+_checkpointed_supervisor = None
+
+def get_supervisor_agent():
+    """Return the supervisor graph, compiled with the durable checkpointer when checkpointing is enabled."""
+    global _checkpointed_supervisor
+    from checkpoints import get_checkpointer
+
+    checkpointer = get_checkpointer()
+    if checkpointer is None:
+        return supervisor_agent
+    if _checkpointed_supervisor is None or _checkpointed_supervisor.checkpointer is not checkpointer:
+        _checkpointed_supervisor = supervisor_builder.compile(checkpointer=checkpointer)
+    return _checkpointed_supervisor
+
+def get_research_graph(config: Optional[RunnableConfig] = None):
+    """Return the graph research runs use: the supervisor when enabled, otherwise the research agent."""
+    if Configuration.from_runnable_config(config).supervisor_enabled:
+        return get_supervisor_agent()
+    return get_researcher_agent()
@@ -0,0 +1,330 @@
+"""Tests for the research agent nodes."""
+
+import asyncio
+import re
+import time
+
+import pytest
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.tools import tool
+
+import agent
+from state import initial_researcher_state
+
+@tool
+async def slow_tool(seconds: float) -> str:
+    """Sleep for a while.
+
+    Args:
+        seconds: Seconds to sleep
+    """
+    await asyncio.sleep(seconds)
+    return "done"
+
+def test_tool_node_time_budget_covers_calls_waiting_for_a_slot(monkeypatch):
+    monkeypatch.setitem(agent.tools_by_name, slow_tool.name, slow_tool)
+    monkeypatch.setattr(agent, "get_blob_store", lambda: None)
+    tool_calls = [
+        {"name": slow_tool.name, "args": {"seconds": 0.3}, "id": f"call-{i}", "type": "tool_call"} for i in range(4)
+    ]
+    state = {"researcher_messages": [AIMessage(content="", tool_calls=tool_calls)], "elapsed_seconds": 0.0}
+    config = {"configurable": {"max_research_seconds": 0.5, "max_concurrent_tool_calls": 2}}
+
+    started = time.monotonic()
+    result = asyncio.run(agent.tool_node(state, config))
+    elapsed = time.monotonic() - started
+
+    # The first two calls finish; the two queued behind them would end at 0.6s
+    assert [m.status for m in result["researcher_messages"]] == ["success", "success", "error", "error"]
+    assert "time budget exhausted" in result["researcher_messages"][2].content
+    assert elapsed < 0.55
+
+def fact_compressor(delay: float = 0.0):
+    """Stand-in for invoke_model whose compression keeps every FACT-* token it is shown, sorted."""
+    async def invoke(role, messages, model=None, tier=None):
+        if role != "compression":
+            return AIMessage(content="Next step.")
+        await asyncio.sleep(delay)
+        text = "\n".join(str(m.content) for m in messages)
+        return AIMessage(content="\n".join(sorted(set(re.findall(r"FACT-\w+", text)))))
+    return invoke
+
+def search_round(index: int, fact: str) -> list:
+    call_id = f"call-{index}"
+    return [
+        AIMessage(content="", tool_calls=[{"name": "tavily_search", "args": {"query": fact}, "id": call_id, "type": "tool_call"}]),
+        ToolMessage(content=f"Result: {fact}", name="tavily_search", tool_call_id=call_id),
+    ]
+
+def test_incremental_findings_match_one_shot_compression(monkeypatch):
+    monkeypatch.setattr(agent, "invoke_model", fact_compressor())
+    monkeypatch.setattr(agent, "get_model_with_tools", lambda tier=None: None)
+    config = {"configurable": {"incremental_compression": True}}
+
+    async def run():
+        state = initial_researcher_state("topic")
+        for index, fact in enumerate(["FACT-b", "FACT-a", "FACT-c"]):
+            state["researcher_messages"] = list(state["researcher_messages"]) + search_round(index, fact)
+            update = await agent.llm_call(state, config)
+            state = {**state, **{k: v for k, v in update.items() if k not in ("researcher_messages", "tokens_used")}}
+            await asyncio.sleep(0)
+        state["researcher_messages"] = list(state["researcher_messages"]) + [AIMessage(content="Done.")]
+
+        incremental = await agent.compress_research(state)
+        one_shot = await agent.compress_research(initial_researcher_state("topic") | {
+            "researcher_messages": state["researcher_messages"],
+        })
+        return state, incremental, one_shot
+
+    state, incremental, one_shot = asyncio.run(run())
+    assert state.get("compressed_findings")  # Some rounds were merged during the loop
+    assert incremental["compressed_research"] == one_shot["compressed_research"] == "FACT-a\nFACT-b\nFACT-c"
+
+def test_llm_call_does_not_wait_for_findings_merge(monkeypatch):
+    monkeypatch.setattr(agent, "invoke_model", fact_compressor(delay=0.3))
+    monkeypatch.setattr(agent, "get_model_with_tools", lambda tier=None: None)
+    config = {"configurable": {"incremental_compression": True}}
+
+    async def run():
+        state = initial_researcher_state("topic")
+        state["researcher_messages"] = list(state["researcher_messages"]) + search_round(0, "FACT-a")
+        started = time.monotonic()
+        update = await agent.llm_call(state, config)
+        elapsed = time.monotonic() - started
+        state = {**state, "findings_merge": update["findings_merge"]}
+        assert "compressed_findings" not in update
+
+        # Nothing new to merge at the end, so the result is the background merge's
+        result = await agent.compress_research(state)
+        return elapsed, update, result
+
+    elapsed, update, result = asyncio.run(run())
+    assert elapsed < 0.2
+    assert update["findings_merge"]
+    assert result["compressed_research"] == "FACT-a"
+
+def test_unknown_findings_merge_leaves_cursor_in_place():
+    state = {"findings_merge": "resumed-from-checkpoint", "findings_cursor": 3}
+    assert agent.take_findings_merge(state) == {"findings_merge": ""}
+
+def multi_search_round(index: int, facts: list[str]) -> list:
+    calls = [
+        {"name": "tavily_search", "args": {"query": fact}, "id": f"call-{index}-{i}", "type": "tool_call"}
+        for i, fact in enumerate(facts)
+    ]
+    return [AIMessage(content="", tool_calls=calls)] + [
+        ToolMessage(content=f"Result: {fact} " + "detail " * 40, name="tavily_search", tool_call_id=call["id"])
+        for fact, call in zip(facts, calls)
+    ]
+
+def research_history(rounds: int) -> list:
+    messages = list(initial_researcher_state("topic")["researcher_messages"])
+    for index in range(rounds):
+        messages += multi_search_round(index, [f"FACT-{index}{letter}" for letter in "ab"[: 1 + index % 2]])
+    return messages
+
+def test_compaction_split_keeps_tool_results_with_their_call():
+    messages = research_history(5) + [AIMessage(content="Done.")]
+    # Cursors are earlier splits: the first message after the request, or a turn start
+    for cursor in (1, 3):
+        for keep in range(7):
+            split = agent.find_compaction_split(messages, cursor, keep)
+            assert split >= cursor
+            assert split == cursor or split == len(messages) or messages[split].type == "ai"
+            call_ids = {c["id"] for m in messages[split:] if m.type == "ai" for c in m.tool_calls}
+            assert all(m.tool_call_id in call_ids for m in messages[split:] if m.type == "tool")
+
+def test_compaction_split_keeps_the_most_recent_turns():
+    messages = research_history(4)
+    turn_starts = [i for i, m in enumerate(messages) if m.type == "ai"]
+
+    assert agent.find_compaction_split(messages, 1, 2) == turn_starts[-2]
+    assert agent.find_compaction_split(messages, 1, 0) == len(messages)
+    # Not enough turns past the cursor to fold any
+    assert agent.find_compaction_split(messages, turn_starts[-2], 2) == turn_starts[-2]
+
+def test_compaction_cursor_advances_over_several_compactions(monkeypatch):
+    prompts = []
+
+    async def invoke(role, messages, model=None, tier=None):
+        prompts.append(str(messages[0].content))
+        return AIMessage(content=f"DIGEST-{len(prompts)}")
+
+    monkeypatch.setattr(agent, "invoke_model", invoke)
+    configurable = agent.Configuration.from_runnable_config(
+        {"configurable": {"context_compaction_tokens": 150, "context_keep_recent_turns": 1}}
+    )
+
+    async def run():
+        state = initial_researcher_state("topic")
+        cursors = []
+        for index in range(4):
+            state["researcher_messages"] = list(state["researcher_messages"]) + multi_search_round(index, [f"FACT-{index}"])
+            state = {**state, **await agent.compact_research_context(state, configurable)}
+            cursors.append(state.get("digest_cursor", 0))
+        return state, cursors
+
+    state, cursors = asyncio.run(run())
+    messages = state["researcher_messages"]
+
+    assert len(prompts) >= 2
+    assert cursors == sorted(cursors) and len(set(c for c in cursors if c)) == len(prompts)
+    assert messages[state["digest_cursor"]].type == "ai"
+    assert state["research_digest"] == f"DIGEST-{len(prompts)}"
+    # Each fold sees the previous digest and only the turns after the previous cursor
+    assert "DIGEST-1" in prompts[1] and "FACT-0" not in prompts[1]
+    assert all("FACT-3" not in prompt for prompt in prompts)
+
+def test_digest_replaces_folded_turns_in_the_prompt(monkeypatch):
+    sent = []
+
+    async def invoke(role, messages, model=None, tier=None):
+        sent.append(messages)
+        return AIMessage(content="Next step.")
+
+    monkeypatch.setattr(agent, "invoke_model", invoke)
+    monkeypatch.setattr(agent, "get_model_with_tools", lambda tier=None: None)
+    messages = research_history(3)
+    cursor = [i for i, m in enumerate(messages) if m.type == "ai"][-1]
+    state = {
+        **initial_researcher_state("topic"),
+        "researcher_messages": messages,
+        "research_digest": "DIGEST of FACT-0 and FACT-1",
+        "digest_cursor": cursor,
+    }
+
+    asyncio.run(agent.llm_call(state, {"configurable": {}}))
+    prompt = sent[0]
+
+    assert prompt[0].type == "system"
+    assert str(messages[0].content) in prompt[1].content and "DIGEST of FACT-0 and FACT-1" in prompt[1].content
+    assert prompt[2:] == messages[cursor:]
+    assert not any("Result: FACT-0" in str(m.content) for m in prompt)
+    assert agent.build_research_context({"researcher_messages": messages}, {}) == messages
+
+@tool("tavily_search")
+async def fake_search(query: str, seen_urls: dict, seen_pages: dict, research_topic: str) -> str:
+    """Search the web.
+
+    Args:
+        query: Search query
+        seen_urls: URLs summarized earlier in the run
+        seen_pages: Fingerprints of pages summarized earlier in the run
+        research_topic: Topic of the run
+    """
+    return f"Results for {query}"
+
+def test_searches_over_the_budget_get_error_results(monkeypatch):
+    monkeypatch.setitem(agent.tools_by_name, "tavily_search", fake_search)
+    monkeypatch.setattr(agent, "get_blob_store", lambda: None)
+    tool_calls = [
+        {"name": "tavily_search", "args": {"query": "first"}, "id": "call-1", "type": "tool_call"},
+        {"name": "think_tool", "args": {"reflection": "Checking gaps."}, "id": "call-2", "type": "tool_call"},
+        {"name": "tavily_search", "args": {"query": "second"}, "id": "call-3", "type": "tool_call"},
+        {"name": "tavily_search", "args": {"query": "third"}, "id": "call-4", "type": "tool_call"},
+    ]
+    state = {
+        **initial_researcher_state("topic"),
+        "researcher_messages": [AIMessage(content="", tool_calls=tool_calls)],
+        "search_calls": 7,
+    }
+    config = {"configurable": {"max_search_calls": 8}}
+
+    result = asyncio.run(agent.tool_node(state, config))
+    messages = result["researcher_messages"]
+
+    assert [m.tool_call_id for m in messages] == ["call-1", "call-2", "call-3", "call-4"]
+    assert [m.status for m in messages] == ["success", "success", "error", "error"]
+    assert messages[0].content == "Results for first"
+    assert all("Search budget exhausted" in m.content for m in messages[2:])
+    assert result["search_calls"] == 8
+    assert agent.route_after_tools({**state, **result}, config) == "compress_research"
+
+def test_research_budgets_stop_the_loop():
+    tool_turn = AIMessage(content="", tool_calls=[{"name": "think_tool", "args": {}, "id": "call-1", "type": "tool_call"}])
+    state = {**initial_researcher_state("topic"), "researcher_messages": [tool_turn]}
+    configs = {
+        "max_tool_call_iterations": ({"tool_call_iterations": 3}, {"max_tool_call_iterations": 3}),
+        "max_search_calls": ({"search_calls": 2}, {"max_search_calls": 2}),
+        "max_research_tokens": ({"tokens_used": 1000}, {"max_research_tokens": 1000}),
+        "max_research_seconds": ({"elapsed_seconds": 30.0}, {"max_research_seconds": 30.0}),
+    }
+
+    for budget, (used, limits) in configs.items():
+        config = {"configurable": limits}
+        assert agent.should_continue({**state, **used}, config) == "compress_research", budget
+        assert agent.route_after_tools({**state, **used}, config) == "compress_research", budget
+        # One unit below the budget the loop goes on
+        below = {key: value - 1 for key, value in used.items()}
+        assert agent.should_continue({**state, **below}, config) == "tool_node", budget
+        assert agent.route_after_tools({**state, **below}, config) == "llm_call", budget
+
+def test_zero_budgets_are_unlimited():
+    configurable = agent.Configuration.from_runnable_config({"configurable": {
+        "max_tool_call_iterations": 0, "max_search_calls": 0, "max_research_tokens": 0, "max_research_seconds": 0,
+    }})
+    state = {"tool_call_iterations": 1000, "search_calls": 1000, "tokens_used": 10 ** 9, "elapsed_seconds": 10 ** 6}
+
+    assert agent.exhausted_research_budget(state, configurable) is None
+    assert agent.remaining_research_seconds(state, configurable) is None
+
+def test_unanswered_tool_calls_are_dropped_before_compression(monkeypatch):
+    compressed = []
+
+    async def invoke(role, messages, model=None, tier=None):
+        compressed.append(messages)
+        return AIMessage(content="Findings.")
+
+    monkeypatch.setattr(agent, "invoke_model", invoke)
+    dangling = AIMessage(content="Let me search once more.", tool_calls=[
+        {"name": "tavily_search", "args": {"query": "more"}, "id": "call-9", "type": "tool_call"}
+    ])
+    messages = research_history(2) + [dangling]
+    state = {**initial_researcher_state("topic"), "researcher_messages": messages}
+
+    asyncio.run(agent.compress_research(state))
+
+    sent = compressed[0][1:-1]
+    assert sent[:-1] == messages[:-1]
+    assert sent[-1].content == dangling.content and not sent[-1].tool_calls
+    assert agent.drop_unanswered_tool_calls(messages[:-1] + [AIMessage(content="", tool_calls=dangling.tool_calls)]) == messages[:-1]
+    assert agent.drop_unanswered_tool_calls(messages[:-1]) == messages[:-1]
+
+class BindingModel:
+    """Stand-in chat model that records the tools bound to it."""
+
+    def __init__(self):
+        self.bound_tools = []
+
+    def bind_tools(self, tools):
+        self.bound_tools.append([tool.name for tool in tools])
+        return self
+
+@pytest.mark.parametrize("fast_mode, prompt", [
+    (False, agent.research_agent_prompt),
+    (True, agent.research_agent_fast_prompt),
+])
+def test_fast_mode_selects_the_prompt_and_keeps_the_tool_set(monkeypatch, fast_mode, prompt):
+    model = BindingModel()
+    calls = []
+
+    async def invoke(role, messages, model=None, tier=None):
+        calls.append((messages, model))
+        return AIMessage(content="Next step.")
+
+    monkeypatch.setattr(agent, "_bound_research_models", {})
+    monkeypatch.setattr(agent, "get_chat_model", lambda role, tier=None: model)
+    monkeypatch.setattr(agent, "invoke_model", invoke)
+    monkeypatch.setattr(agent, "get_today_str", lambda: "Mon Jan 1, 2024")
+    state = {**initial_researcher_state("topic"), "researcher_messages": research_history(1)}
+
+    asyncio.run(agent.llm_call(state, {"configurable": {"fast_mode": fast_mode}}))
+    messages, bound_model = calls[0]
+
+    assert messages[0].content == prompt.format(date="Mon Jan 1, 2024")
+    assert bound_model is model and model.bound_tools == [["tavily_search", "think_tool"]]
+
+def test_only_the_fast_prompt_asks_to_reflect_in_the_search_turn():
+    fused = "in the same response as your next tavily_search"
+    assert fused in agent.research_agent_fast_prompt
+    assert fused not in agent.research_agent_prompt
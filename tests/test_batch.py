@@ -0,0 +1,97 @@
+"""Tests for the batch research runner."""
+
+import asyncio
+import json
+
+import pytest
+
+import batch
+
+def write_jsonl(path, lines):
+    path.write_text("".join(line if isinstance(line, str) else json.dumps(line) + "\n" for line in lines))
+
+def read_jsonl(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+@pytest.fixture
+def fake_research(monkeypatch):
+    """Replace the research runs with stand-ins that finish after the record's ``delay``."""
+    started = []
+
+    async def research_topic(record, config=None):
+        started.append(record["id"])
+        await asyncio.sleep(float(record["topic"].split("delay=")[-1]))
+        return {"id": record["id"], "topic": record["topic"], "status": "ok", "elapsed_seconds": 0.0}
+
+    async def close_search_backend():
+        pass
+
+    monkeypatch.setattr(batch, "research_topic", research_topic)
+    monkeypatch.setattr(batch, "warm_clients", lambda: None)
+    monkeypatch.setattr(batch, "close_search_backend", close_search_backend)
+    return started
+
+def test_topics_are_read_from_topic_or_title_and_body(tmp_path):
+    path = tmp_path / "topics.jsonl"
+    write_jsonl(path, [
+        {"id": "a", "topic": "First topic"},
+        "\n",
+        {"request_id": "b", "title": "Second", "body": "With details"},
+        {"title": "Third"},
+    ])
+
+    assert batch.load_topics(path) == [
+        {"id": "a", "topic": "First topic"},
+        {"id": "b", "topic": "Second\n\nWith details"},
+        {"id": "4", "topic": "Third"},
+    ]
+
+@pytest.mark.parametrize("line, error", [
+    ('{"id": "a", "topic": \n', "Line 2 of .* is not valid JSON"),
+    ('["not", "an", "object"]\n', "Line 2 of .* is not a JSON object"),
+    ('{"id": "a"}\n', "Line 2 of .* has no topic"),
+])
+def test_malformed_topic_lines_are_reported_with_their_line_number(tmp_path, line, error):
+    path = tmp_path / "topics.jsonl"
+    write_jsonl(path, [{"topic": "Valid"}, line])
+
+    with pytest.raises(ValueError, match=error):
+        batch.load_topics(path)
+
+def test_completed_ids_use_the_latest_status_and_skip_partial_lines(tmp_path):
+    path = tmp_path / "results.jsonl"
+    write_jsonl(path, [
+        {"id": "a", "status": "ok"},
+        {"id": "b", "status": "error"},
+        {"id": "c", "status": "error"},
+        {"id": "c", "status": "ok"},
+        '{"id": "d", "status": "o',
+    ])
+
+    assert batch.load_completed_ids(path) == {"a", "c"}
+    assert batch.load_completed_ids(tmp_path / "missing.jsonl") == set()
+
+def test_resumed_batch_only_runs_unfinished_topics(tmp_path, fake_research):
+    input_path, output_path = tmp_path / "topics.jsonl", tmp_path / "results.jsonl"
+    write_jsonl(input_path, [{"id": record_id, "topic": f"{record_id} delay=0"} for record_id in "abcd"])
+    write_jsonl(output_path, [
+        {"id": "a", "status": "ok"},
+        {"id": "b", "status": "error"},
+        '{"id": "c", "status": "o',
+    ])
+
+    counts = asyncio.run(batch.run_batch(input_path, output_path, max_concurrency=2))
+
+    assert counts == {"ok": 3, "error": 0, "skipped": 1}
+    assert sorted(fake_research) == ["b", "c", "d"]
+    assert batch.load_completed_ids(output_path) == {"a", "b", "c", "d"}
+
+def test_results_are_appended_in_completion_order(tmp_path, fake_research):
+    input_path, output_path = tmp_path / "topics.jsonl", tmp_path / "results.jsonl"
+    delays = {"slow": 0.2, "medium": 0.1, "fast": 0.0}
+    write_jsonl(input_path, [{"id": record_id, "topic": f"{record_id} delay={delay}"} for record_id, delay in delays.items()])
+
+    asyncio.run(batch.run_batch(input_path, output_path, max_concurrency=3))
+
+    assert sorted(fake_research) == sorted(delays)
+    assert [result["id"] for result in read_jsonl(output_path)] == ["fast", "medium", "slow"]
@@ -0,0 +1,38 @@
+"""Tests for the out-of-band blob store."""
+
+from langchain_core.messages import ToolMessage
+
+import blobs
+from blobs import BlobStore, materialize_notes, note_content, offload_message
+
+def test_raw_notes_refer_to_blobs_until_materialized(tmp_path, monkeypatch):
+    store = BlobStore(tmp_path)
+    monkeypatch.setattr(blobs, "get_blob_store", lambda: store)
+    page = "Summarized page. " * 100
+    message = offload_message(ToolMessage(content=page, tool_call_id="call-1"), store, min_chars=100)
+
+    note = note_content(message)
+    assert page not in note
+    assert note == f"[[blob:{message.artifact['blob']}]]"
+    assert materialize_notes([f"before\n{note}\nafter"]) == [f"before\n{page}\nafter"]
+
+def test_small_messages_stay_inline_in_raw_notes(tmp_path):
+    store = BlobStore(tmp_path)
+    message = offload_message(ToolMessage(content="short", tool_call_id="call-1"), store, min_chars=100)
+    assert note_content(message) == "short"
+    assert materialize_notes(["short"]) == ["short"]
+
+def test_missing_blob_keeps_its_placeholder(tmp_path, monkeypatch):
+    monkeypatch.setattr(blobs, "get_blob_store", lambda: BlobStore(tmp_path))
+    note = "[[blob:" + "0" * 64 + "]]"
+    assert materialize_notes([note]) == [note]
+
+def test_blob_store_needs_checkpointing(tmp_path, monkeypatch):
+    monkeypatch.setattr(blobs, "_blob_store", None)
+    monkeypatch.setattr(blobs, "_blob_store_initialized", False)
+    monkeypatch.setenv("CACHE_DIR", str(tmp_path))
+    monkeypatch.setenv("BLOB_STORE_ENABLED", "true")
+    monkeypatch.setenv("CHECKPOINT_ENABLED", "false")
+
+    assert blobs.get_blob_store() is None
+    assert not (tmp_path / "blobs").exists()
@@ -0,0 +1,123 @@
+"""Tests for the persistent caches."""
+
+import pytest
+
+import cache
+from cache import SQLiteCache, SearchCache, SummaryCache
+
+class FakeClock:
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(cache.time, "time", fake)
+    return fake
+
+def test_lru_entries_are_evicted_beyond_max_entries(tmp_path, clock):
+    store = SQLiteCache(tmp_path / "cache.sqlite3", table="t", max_entries=2)
+    store.set("a", "1")
+    clock.advance(1)
+    store.set("b", "2")
+    clock.advance(1)
+    assert store.get("a") == "1"  # "b" is now the least recently used
+    clock.advance(1)
+    store.set("c", "3")
+
+    assert store.get("b") is None
+    assert store.get("a") == "1"
+    assert store.get("c") == "3"
+    assert len(store) == 2
+    assert store.stats.evictions == 1
+
+def test_entries_are_evicted_beyond_max_bytes(tmp_path, clock):
+    store = SQLiteCache(tmp_path / "cache.sqlite3", table="t", max_bytes=10)
+    store.set("a", "x" * 6)
+    clock.advance(1)
+    store.set("b", "é" * 3)  # 6 bytes in UTF-8
+
+    assert store.get("a") is None
+    assert store.get("b") == "é" * 3
+
+def test_expired_entries_are_misses(tmp_path, clock):
+    store = SQLiteCache(tmp_path / "cache.sqlite3", table="t", max_age=60)
+    store.set("a", "1")
+    clock.advance(30)
+    assert store.get("a") == "1"
+    assert store.get("a", max_age=10) is None  # per-lookup override, removes the entry
+
+    store.set("b", "2")
+    clock.advance(61)
+    assert store.get("b") is None
+    assert len(store) == 0
+    assert (store.stats.hits, store.stats.misses, store.stats.evictions) == (1, 2, 2)
+
+def test_hit_rate_counts_lookups(tmp_path, clock):
+    store = SQLiteCache(tmp_path / "cache.sqlite3", table="t")
+    assert store.stats.hit_rate == 0.0
+    store.set("a", "1")
+    store.get("a")
+    store.get("a")
+    store.get("missing")
+
+    assert store.stats.hit_rate == pytest.approx(2 / 3)
+    assert store.stats.writes == 1
+
+def test_summary_keys_change_with_content_prompt_and_model():
+    key = SummaryCache.make_key("page", "prompt", "model")
+    assert key == SummaryCache.make_key("page", "prompt", "model")
+    assert len({
+        key,
+        SummaryCache.make_key("other page", "prompt", "model"),
+        SummaryCache.make_key("page", "edited prompt", "model"),
+        SummaryCache.make_key("page", "prompt", "other model"),
+    }) == 4
+
+def test_summary_cache_persists_across_instances(tmp_path):
+    path = tmp_path / "cache.sqlite3"
+    SummaryCache(path).set("key", "summary")
+    assert SummaryCache(path).get("key") == "summary"
+
+def test_search_keys_normalize_case_and_whitespace():
+    key = SearchCache.make_key("Solid  State\tBatteries ", 3, "general", True)
+    assert key == SearchCache.make_key("solid state batteries", 3, "general", True)
+    assert key != SearchCache.make_key("solid state batteries", 3, "news", True)
+    assert key != SearchCache.make_key("solid state batteries", 5, "general", True)
+
+def test_search_entries_expire_per_topic(tmp_path, clock):
+    search_cache = SearchCache(tmp_path / "cache.sqlite3", ttls={"news": 60, "general": 3600})
+    search_cache.set("general-key", {"results": ["g"]})
+    search_cache.set("news-key", {"results": ["n"]})
+    clock.advance(120)
+
+    assert search_cache.get("news-key", "news") is None
+    assert search_cache.get("general-key", "general") == {"results": ["g"]}
+    assert (search_cache.stats.hits, search_cache.stats.misses) == (1, 1)
+
+def test_search_disk_hits_are_promoted_with_their_original_age(tmp_path, clock):
+    path = tmp_path / "cache.sqlite3"
+    SearchCache(path, ttls={"news": 60}).set("key", {"results": ["n"]})
+    clock.advance(50)
+
+    fresh_process = SearchCache(path, ttls={"news": 60}, memory_entries=1)
+    assert fresh_process.get("key", "news") == {"results": ["n"]}
+    assert "key" in fresh_process._memory
+    clock.advance(20)
+    assert fresh_process.get("key", "news") is None
+
+def test_search_memory_tier_is_bounded(tmp_path, clock):
+    search_cache = SearchCache(tmp_path / "cache.sqlite3", ttls={}, memory_entries=2)
+    for key in ("a", "b", "c"):
+        search_cache.set(key, {"results": [key]})
+
+    assert list(search_cache._memory) == ["b", "c"]
+    assert search_cache.stats.evictions == 1
+    # The disk tier still answers for the entry dropped from memory
+    assert search_cache.get("a", "general") == {"results": ["a"]}
@@ -0,0 +1,108 @@
+"""Tests for the SQLite checkpointer."""
+
+import operator
+from contextlib import closing
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.base import ERROR, empty_checkpoint
+from langgraph.graph import END, START, StateGraph
+from langgraph.graph.message import add_messages
+from typing_extensions import Annotated, TypedDict
+
+from checkpoints import SQLiteCheckpointSaver
+
+class ResumeState(TypedDict):
+    messages: Annotated[list, add_messages]
+    steps: Annotated[list[str], operator.add]
+
+def test_put_and_get_tuple_round_trips_values_and_pending_writes(tmp_path):
+    saver = SQLiteCheckpointSaver(tmp_path / "checkpoints.sqlite3")
+    messages = [HumanMessage(content="topic"), AIMessage(content="x" * 2000)]
+    checkpoint = empty_checkpoint()
+    checkpoint["channel_values"] = {"messages": messages, "notes": "short"}
+    checkpoint["channel_versions"] = {"messages": saver.get_next_version(None), "notes": saver.get_next_version(None)}
+
+    config = saver.put(
+        {"configurable": {"thread_id": "t1", "checkpoint_ns": ""}},
+        checkpoint,
+        {"source": "loop", "step": 1},
+        checkpoint["channel_versions"],
+    )
+    saver.put_writes(config, [("notes", "b1"), ("messages", [AIMessage(content="b2")])], task_id="task-b")
+    saver.put_writes(config, [("notes", "a1"), (ERROR, ValueError("boom"))], task_id="task-a")
+
+    loaded = saver.get_tuple({"configurable": {"thread_id": "t1"}})
+
+    assert loaded.config["configurable"]["checkpoint_id"] == checkpoint["id"]
+    assert loaded.metadata["step"] == 1
+    assert loaded.checkpoint["channel_values"]["notes"] == "short"
+    assert [m.content for m in loaded.checkpoint["channel_values"]["messages"]] == ["topic", "x" * 2000]
+    assert [(task_id, channel) for task_id, channel, _ in loaded.pending_writes] == [
+        ("task-a", ERROR), ("task-a", "notes"), ("task-b", "notes"), ("task-b", "messages"),
+    ]
+    assert loaded.pending_writes[3][2][0].content == "b2"
+
+def test_unchanged_messages_are_stored_once_per_thread(tmp_path):
+    saver = SQLiteCheckpointSaver(tmp_path / "checkpoints.sqlite3")
+    messages = [HumanMessage(content="topic")]
+    config = {"configurable": {"thread_id": "t1", "checkpoint_ns": ""}}
+    for step in range(3):
+        messages = messages + [AIMessage(content=f"turn {step}")]
+        checkpoint = empty_checkpoint()
+        checkpoint["channel_values"] = {"messages": messages}
+        checkpoint["channel_versions"] = {"messages": saver.get_next_version(str(step))}
+        config = saver.put(config, checkpoint, {"step": step}, checkpoint["channel_versions"])
+
+    with closing(saver._connect()) as conn:
+        stored = conn.execute("SELECT COUNT(*) FROM checkpoint_messages").fetchone()[0]
+    assert stored == 4
+    assert len(list(saver.list({"configurable": {"thread_id": "t1"}}))) == 3
+
+def test_interrupted_run_resumes_from_last_completed_node(tmp_path):
+    saver = SQLiteCheckpointSaver(tmp_path / "checkpoints.sqlite3")
+    calls = {"search": 0, "summarize": 0}
+
+    def search(state: ResumeState):
+        calls["search"] += 1
+        return {"messages": [AIMessage(content="results")], "steps": ["search"]}
+
+    def summarize(state: ResumeState):
+        calls["summarize"] += 1
+        if calls["summarize"] == 1:
+            raise RuntimeError("crash")
+        return {"messages": [AIMessage(content="summary")], "steps": ["summarize"]}
+
+    builder = StateGraph(ResumeState)
+    builder.add_node("search", search)
+    builder.add_node("summarize", summarize)
+    builder.add_edge(START, "search")
+    builder.add_edge("search", "summarize")
+    builder.add_edge("summarize", END)
+    config = {"configurable": {"thread_id": "run-1"}}
+
+    with pytest.raises(RuntimeError):
+        builder.compile(checkpointer=saver).invoke({"messages": [HumanMessage(content="topic")]}, config)
+
+    # A fresh saver over the same file stands in for a restarted process
+    graph = builder.compile(checkpointer=SQLiteCheckpointSaver(tmp_path / "checkpoints.sqlite3"))
+    assert graph.get_state(config).next == ("summarize",)
+    result = graph.invoke(None, config)
+
+    assert calls == {"search": 1, "summarize": 2}
+    assert result["steps"] == ["search", "summarize"]
+    assert [m.content for m in result["messages"]] == ["topic", "results", "summary"]
+    assert graph.get_state(config).next == ()
+
+def test_delete_thread_removes_only_that_thread(tmp_path):
+    saver = SQLiteCheckpointSaver(tmp_path / "checkpoints.sqlite3")
+    for thread_id in ("keep", "drop"):
+        checkpoint = empty_checkpoint()
+        checkpoint["channel_values"] = {"messages": [HumanMessage(content=thread_id)]}
+        checkpoint["channel_versions"] = {"messages": saver.get_next_version(None)}
+        saver.put({"configurable": {"thread_id": thread_id}}, checkpoint, {}, checkpoint["channel_versions"])
+
+    saver.delete_thread("drop")
+
+    assert saver.get_tuple({"configurable": {"thread_id": "drop"}}) is None
+    assert saver.get_tuple({"configurable": {"thread_id": "keep"}}) is not None
@@ -0,0 +1,99 @@
+"""Tests for call deadlines and hedged requests."""
+
+import asyncio
+import time
+
+import pytest
+
+from deadlines import DeadlineExceeded, LatencyTracker, call_with_deadline, get_latency_tracker, set_latency_tracker
+
+@pytest.fixture
+def tracker():
+    """Install a latency tracker for the ``test`` kind of call that hedges after 0.05s."""
+    tracker = LatencyTracker(min_samples=5)
+    for _ in range(5):
+        tracker.record(0.05)
+    set_latency_tracker("test", tracker)
+    yield tracker
+    set_latency_tracker("test", None)
+
+def make_call(latencies: list[float], attempts: list[int], error: Exception | None = None):
+    """Return a call whose n-th attempt takes ``latencies[n]`` seconds."""
+    async def call():
+        attempt = len(attempts)
+        attempts.append(attempt)
+        await asyncio.sleep(latencies[attempt])
+        if error is not None:
+            raise error
+        return attempt
+    return call
+
+def test_percentile_needs_min_samples():
+    tracker = LatencyTracker(min_samples=3)
+    tracker.record(1.0)
+    tracker.record(2.0)
+    assert tracker.percentile(0.95) is None
+
+    tracker.record(3.0)
+    assert tracker.percentile(0.95) == 3.0
+    assert tracker.percentile(0.0) == 1.0
+
+def test_latency_window_keeps_recent_calls():
+    tracker = LatencyTracker(window=3, min_samples=1)
+    for seconds in (10.0, 1.0, 2.0, 3.0):
+        tracker.record(seconds)
+
+    assert tracker.percentile(1.0) == 3.0
+
+def test_slow_call_raises_deadline_exceeded_and_is_cancelled(tracker):
+    attempts = []
+    started = time.monotonic()
+
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(call_with_deadline("test", make_call([1.0], attempts), deadline=0.05))
+
+    assert time.monotonic() - started < 0.5
+    assert attempts == [0]
+
+def test_fast_call_is_not_hedged_and_records_its_latency(tracker):
+    attempts = []
+
+    assert asyncio.run(call_with_deadline("test", make_call([0.0], attempts), deadline=1.0, hedge=True)) == 0
+    assert attempts == [0]
+    assert len(tracker._samples) == 6
+
+def test_slow_call_is_hedged_after_the_p95_latency(tracker):
+    attempts = []
+
+    result = asyncio.run(call_with_deadline("test", make_call([1.0, 0.01], attempts), deadline=2.0, hedge=True))
+
+    assert result == 1
+    assert attempts == [0, 1]
+
+def test_no_hedge_without_enough_samples():
+    set_latency_tracker("unseen", None)
+    attempts = []
+
+    asyncio.run(call_with_deadline("unseen", make_call([0.1], attempts), hedge=True))
+
+    assert attempts == [0]
+    assert get_latency_tracker("unseen").percentile(0.95) is None
+
+def test_no_hedge_when_the_deadline_comes_first(tracker):
+    attempts = []
+
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(call_with_deadline("test", make_call([1.0, 0.0], attempts), deadline=0.04, hedge=True))
+    assert attempts == [0]
+
+def test_call_failing_before_the_hedge_is_not_retried(tracker):
+    attempts = []
+
+    with pytest.raises(ValueError):
+        asyncio.run(call_with_deadline("test", make_call([0.0, 0.0], attempts, ValueError("boom")), hedge=True))
+    assert attempts == [0]
+
+def test_untracked_calls_leave_the_latency_window_alone(tracker):
+    asyncio.run(call_with_deadline("test", make_call([0.0], []), deadline=1.0, track_latency=False))
+
+    assert len(tracker._samples) == 5
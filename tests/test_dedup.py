@@ -0,0 +1,114 @@
+"""Tests for URL canonicalization and near-duplicate page detection."""
+
+import random
+
+import pytest
+
+from dedup import (
+    NUM_PERMUTATIONS,
+    NearDuplicateIndex,
+    band_rows,
+    canonicalize_url,
+    estimate_similarity,
+    minhash,
+    shingles,
+    signature_from_hex,
+    signature_to_hex,
+)
+
+def make_text(seed: int, words: int = 400) -> str:
+    rng = random.Random(seed)
+    vocabulary = [f"word{i}" for i in range(2000)]
+    return " ".join(rng.choice(vocabulary) for _ in range(words))
+
+def edit_words(text: str, every: int) -> str:
+    """Replace every ``every``-th word, as a byline or timestamp change would."""
+    return " ".join(f"edited{i}" if i % every == 0 else word for i, word in enumerate(text.split()))
+
+def jaccard(a: str, b: str) -> float:
+    sa, sb = shingles(a), shingles(b)
+    return len(sa & sb) / len(sa | sb)
+
+@pytest.mark.parametrize("url", [
+    "http://www.example.com/article/",
+    "https://m.example.com/article?utm_source=feed&fbclid=abc",
+    "https://amp.example.com/article/amp#comments",
+    "https://EXAMPLE.com:443//article",
+])
+def test_url_variants_share_a_canonical_form(url):
+    assert canonicalize_url(url) == "https://example.com/article"
+
+def test_canonical_urls_keep_meaningful_query_parameters_sorted():
+    assert canonicalize_url("https://example.com/search?q=x&page=2&utm_medium=y") == "https://example.com/search?page=2&q=x"
+    assert canonicalize_url("https://example.com:8080/a") == "https://example.com:8080/a"
+    assert canonicalize_url("not a url") == "not a url"
+
+def test_minhash_estimates_jaccard_similarity():
+    text = make_text(1)
+    near = edit_words(text, every=40)
+    other = make_text(2)
+
+    assert len(minhash(text)) == NUM_PERMUTATIONS
+    assert estimate_similarity(minhash(text), minhash(text)) == 1.0
+    assert estimate_similarity(minhash(text), minhash(near)) == pytest.approx(jaccard(text, near), abs=0.12)
+    assert estimate_similarity(minhash(text), minhash(other)) < 0.1
+
+def test_signatures_round_trip_through_hex():
+    signature = minhash(make_text(3))
+    assert signature_from_hex(signature_to_hex(signature)) == signature
+
+@pytest.mark.parametrize("threshold", [0.5, 0.8, 0.9, 0.95])
+def test_band_rows_keep_texts_at_the_threshold_detectable(threshold):
+    rows = band_rows(threshold)
+    bands = NUM_PERMUTATIONS // rows
+
+    assert NUM_PERMUTATIONS % rows == 0
+    assert 1 - (1 - threshold ** rows) ** bands >= 0.99
+    # The next larger divisor would miss texts at the threshold too often
+    larger = [r for r in range(rows + 1, NUM_PERMUTATIONS + 1) if NUM_PERMUTATIONS % r == 0]
+    if larger:
+        assert 1 - (1 - threshold ** larger[0]) ** (NUM_PERMUTATIONS // larger[0]) < 0.99
+
+def test_index_finds_near_duplicates_above_the_threshold_only():
+    text = make_text(4)
+    index = NearDuplicateIndex(threshold=0.8)
+    index.add(minhash(text), "https://example.com/original")
+
+    assert index.find(minhash(edit_words(text, every=100))) == "https://example.com/original"
+    assert index.find(minhash(edit_words(text, every=3))) is None
+    assert index.find(minhash(make_text(5))) is None
+
+def test_index_returns_the_most_similar_match():
+    text = make_text(6)
+    index = NearDuplicateIndex(threshold=0.7)
+    index.add(minhash(edit_words(text, every=15)), "further")
+    index.add(minhash(edit_words(text, every=200)), "closer")
+
+    assert index.find(minhash(text)) == "closer"
+
+def test_index_drops_the_oldest_entries_beyond_max_entries():
+    texts = [make_text(seed) for seed in (7, 8, 9)]
+    index = NearDuplicateIndex(threshold=0.9, max_entries=2)
+    for i, text in enumerate(texts):
+        index.add(minhash(text), i)
+
+    assert len(index) == 2
+    assert index.find(minhash(texts[0])) is None
+    assert index.find(minhash(texts[2])) == 2
+
+def test_index_only_finds_entries_of_the_same_namespace():
+    text = make_text(11)
+    index = NearDuplicateIndex(threshold=0.9)
+    index.add(minhash(text), "fast summary", namespace="fast")
+    index.add(minhash(text), "strong summary", namespace="strong")
+
+    assert index.find(minhash(text), namespace="fast") == "fast summary"
+    assert index.find(minhash(text), namespace="strong") == "strong summary"
+    assert index.find(minhash(text), namespace="other") is None
+    assert index.find(minhash(text)) is None
+
+def test_index_rebuilds_from_hex_signatures():
+    text = make_text(10)
+    index = NearDuplicateIndex.from_hex({signature_to_hex(minhash(text)): "url"}, threshold=0.9)
+
+    assert index.find(minhash(text)) == "url"
@@ -0,0 +1,92 @@
+"""Tests for the local content extraction."""
+
+from extraction import extract_main_content, html_to_text, is_boilerplate, is_navigation
+
+CODE_PAGE = """# Checking signs
+
+Two helpers from the tutorial:
+
+```python
+def is_positive(x):
+    if x > 0:
+        return 1
+    return 0
+
+def is_negative(x):
+    if x < 0:
+        return 1
+    return 0
+```
+
+The same check in an indented block:
+
+    if x > 0:
+        return 1
+    return 0
+
+That is all."""
+
+def test_fenced_and_indented_code_is_kept_verbatim():
+    cleaned = extract_main_content(CODE_PAGE)
+
+    assert cleaned == CODE_PAGE
+
+def test_code_comments_are_not_dropped_as_empty_headings():
+    page = "Intro text.\n\n```\n# comment\n## another\n```"
+
+    assert extract_main_content(page) == page
+
+def test_html_pre_blocks_become_fenced_code():
+    html = (
+        "<html><body><div><p>Example:</p><pre>for i in range(3):\n    print(i)\n    print(i)</pre>"
+        "<p>Done.</p></div></body></html>"
+    )
+
+    cleaned = extract_main_content(html)
+
+    assert "```\nfor i in range(3):\n    print(i)\n    print(i)\n```" in cleaned
+    assert "print(i)" in html_to_text(html)
+
+def test_repeated_chrome_is_dropped_but_repeated_content_is_kept():
+    page = "\n".join([
+        "[Home](/) [Docs](/docs)",
+        "By Jane Doe",
+        "Mix the flour and water.",
+        "Step two",
+        "Mix the flour and water.",
+        "[Home](/) [Docs](/docs)",
+        "By Jane Doe",
+    ])
+
+    cleaned = extract_main_content(page).split("\n")
+
+    assert cleaned.count("Mix the flour and water.") == 2
+    assert cleaned.count("By Jane Doe") == 1
+    assert cleaned.count("Home Docs") == 0  # link-only line
+
+def test_slashes_in_content_are_not_navigation():
+    assert not is_navigation("input / output / error")
+    assert is_navigation("Home | Products | About us | Contact")
+    assert "input / output / error" in extract_main_content("Streams:\ninput / output / error")
+
+def test_boilerplate_phrases_only_drop_short_or_mostly_chrome_lines():
+    assert is_boilerplate("Accept all cookies")
+    assert is_boilerplate("© 2026 Example Corp")
+    assert not is_boilerplate("Users must sign in with a hardware key before they can read more than ten records per day.")
+
+def test_html_chrome_elements_and_links_are_reduced_to_text():
+    html = (
+        "<html><body><nav><a href='/'>Home</a></nav><article><h1>Battery news</h1>"
+        "<p>Solid state cells reached <a href='/x'>500 Wh/kg</a> in tests.</p>"
+        "<table><tr><td>Cell</td><td>Density</td></tr><tr><td>A</td><td>500</td></tr></table></article>"
+        "<footer>All rights reserved</footer></body></html>"
+    )
+
+    cleaned = extract_main_content(html)
+
+    assert cleaned == "# Battery news\n\nSolid state cells reached 500 Wh/kg in tests.\n\nCell | Density\n\nA | 500"
+
+def test_headings_without_content_are_dropped():
+    page = "# Title\n## Empty section\n## Section\nBody text.\n## Trailing"
+
+    assert extract_main_content(page) == "# Title\n\n## Section\nBody text."
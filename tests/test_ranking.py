@@ -0,0 +1,45 @@
+"""Tests for the local BM25 relevance ranking."""
+
+import pytest
+
+from ranking import bm25_scores, tokenize
+
+def test_tokenize_drops_stopwords_and_plural_endings():
+    assert tokenize("The batteries of electric cars and their rates") == ["battery", "electric", "car", "rate"]
+    assert tokenize("glass class") == ["glass", "class"]
+
+def test_tokenize_keeps_non_latin_words_and_pairs_unspaced_scripts():
+    assert tokenize("Энергия солнца") == ["энергия", "солнца"]
+    assert tokenize("固体電池") == ["固体", "体電", "電池"]
+
+def test_bm25_ranks_matching_documents_first():
+    documents = [
+        "Recipes for sourdough bread and pastries.",
+        "Solid state battery research improves electric vehicle range.",
+        "Battery recycling plants open in Europe.",
+    ]
+
+    scores = bm25_scores("solid state battery", documents)
+
+    assert scores[0] == 0
+    assert scores[1] > scores[2] > 0
+
+def test_bm25_weighs_rare_terms_above_common_ones():
+    documents = ["battery cathode", "battery anode", "battery electrolyte"]
+
+    scores = bm25_scores("battery cathode", documents)
+
+    assert scores[0] > scores[1] == scores[2] > 0
+
+def test_bm25_normalizes_for_document_length():
+    padding = " ".join(f"filler{i}" for i in range(200))
+    documents = ["lithium supply", f"lithium supply {padding}"]
+
+    scores = bm25_scores("lithium", documents)
+
+    assert scores[0] > scores[1]
+
+def test_bm25_handles_empty_input():
+    assert bm25_scores("query", []) == []
+    assert bm25_scores("the and of", ["some document"]) == [0.0]
+    assert bm25_scores("query", [""]) == pytest.approx([0.0])
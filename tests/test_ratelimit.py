@@ -0,0 +1,164 @@
+"""Tests for the adaptive provider rate limiter."""
+
+import asyncio
+
+import pytest
+
+import ratelimit
+from ratelimit import AdaptiveRateLimiter, is_throttling_error, retry_after_seconds
+
+class ResourceExhausted(Exception):
+    pass
+
+class HTTPError(Exception):
+    def __init__(self, status_code: int, headers: dict | None = None):
+        super().__init__(f"HTTP {status_code}")
+        self.response = type("Response", (), {"status_code": status_code, "headers": headers or {}})()
+
+def make_limiter(**kwargs) -> AdaptiveRateLimiter:
+    options = {"requests_per_minute": 60_000, "max_concurrency": 8, "base_backoff": 0.001, "max_backoff": 0.01}
+    return AdaptiveRateLimiter("test", **{**options, **kwargs})
+
+def test_throttling_errors_are_recognized():
+    assert is_throttling_error(HTTPError(429))
+    assert is_throttling_error(HTTPError(503))
+    assert is_throttling_error(ResourceExhausted("quota"))
+    assert is_throttling_error(RuntimeError("Too Many Requests, slow down"))
+    assert not is_throttling_error(HTTPError(400))
+    assert not is_throttling_error(ValueError("bad argument"))
+
+class QuotaError(ResourceExhausted):
+    pass
+
+@pytest.mark.parametrize("error", [
+    QuotaError("daily quota"),
+    RuntimeError("429 Resource has been exhausted (e.g. check quota)."),
+    RuntimeError("Error code: 429 - rate limit exceeded"),
+    RuntimeError("Rate limited by the provider, retry later"),
+    RuntimeError("The model is overloaded. Please try again later."),
+    RuntimeError("{'type': 'overloaded_error'}"),
+])
+def test_throttling_messages_are_recognized_without_a_status(error):
+    assert is_throttling_error(error)
+
+@pytest.mark.parametrize("error", [
+    ValueError("Processed 429 documents before the parser failed"),
+    ValueError("Page https://example.com/item/4290 could not be parsed"),
+    TypeError("overloaded function signature does not match"),
+    ValueError("Invalid rate limit configuration: requests_per_minute must be positive"),
+    HTTPError(400),
+])
+def test_other_errors_mentioning_throttling_words_are_not_throttling(error):
+    assert not is_throttling_error(error)
+
+def test_status_code_wins_over_the_message():
+    error = HTTPError(500)
+    error.args = ("Too many requests in the internal queue",)
+    assert not is_throttling_error(error)
+
+def test_retry_after_header_is_read():
+    assert retry_after_seconds(HTTPError(429, {"retry-after": "2.5"})) == 2.5
+    assert retry_after_seconds(HTTPError(429)) is None
+    assert retry_after_seconds(ValueError()) is None
+
+def test_token_bucket_spaces_requests_beyond_the_burst():
+    limiter = make_limiter(requests_per_minute=60, max_concurrency=2)
+
+    assert limiter._reserve_token() == 0.0
+    assert limiter._reserve_token() == 0.0
+    assert limiter._reserve_token() == pytest.approx(1.0, abs=0.05)
+
+def test_throttling_halves_the_concurrency_limit_once_per_event():
+    limiter = make_limiter(max_concurrency=8)
+
+    limiter._on_throttled(started_at=1.0)
+    assert limiter.concurrency_limit == 4
+    # A call that was already in flight when the limit was cut does not cut it again
+    limiter._on_throttled(started_at=1.0)
+    assert limiter.concurrency_limit == 4
+    assert limiter.throttled == 2
+
+def test_concurrency_limit_never_drops_below_the_minimum():
+    limiter = make_limiter(max_concurrency=2, min_concurrency=1)
+    for _ in range(3):
+        limiter._on_throttled(started_at=float("inf"))
+
+    assert limiter.concurrency_limit == 1
+
+def test_success_grows_the_limit_by_about_one_per_round():
+    limiter = make_limiter(max_concurrency=8)
+    limiter.concurrency_limit = 4.0
+    for _ in range(4):
+        limiter._on_success()
+    assert 4.9 < limiter.concurrency_limit < 5.0
+
+    for _ in range(100):
+        limiter._on_success()
+    assert limiter.concurrency_limit == 8
+
+def test_backoff_honours_retry_after(monkeypatch):
+    limiter = make_limiter(base_backoff=1.0, max_backoff=60.0)
+    monkeypatch.setattr(ratelimit.random, "uniform", lambda low, high: high)
+
+    assert limiter._backoff(3, HTTPError(429)) == 8.0
+    assert limiter._backoff(10, HTTPError(429)) == 60.0
+    assert limiter._backoff(0, HTTPError(429, {"retry-after": "5"})) == 5.0
+
+def test_throttled_calls_are_retried_until_they_succeed():
+    limiter = make_limiter(max_concurrency=8)
+    attempts = []
+
+    async def call():
+        attempts.append(len(attempts))
+        if len(attempts) < 3:
+            raise HTTPError(429)
+        return "ok"
+
+    assert asyncio.run(limiter.run(call)) == "ok"
+    assert len(attempts) == 3
+    assert limiter.throttled == 2
+    assert limiter.in_flight == 0
+
+def test_throttling_error_is_raised_once_retries_are_used_up():
+    limiter = make_limiter(max_retries=2)
+    attempts = []
+
+    async def call():
+        attempts.append(1)
+        raise HTTPError(429)
+
+    with pytest.raises(HTTPError):
+        asyncio.run(limiter.run(call))
+    assert len(attempts) == 3
+
+def test_other_errors_are_not_retried():
+    limiter = make_limiter()
+    attempts = []
+
+    async def call():
+        attempts.append(1)
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        asyncio.run(limiter.run(call))
+    assert len(attempts) == 1
+    assert limiter.concurrency_limit == 8
+
+def test_calls_in_flight_stay_within_the_concurrency_limit():
+    limiter = make_limiter(max_concurrency=2)
+    in_flight, peak = 0, 0
+
+    async def call():
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return "ok"
+
+    async def run_all():
+        return await asyncio.gather(*(limiter.run(call) for _ in range(6)))
+
+    assert asyncio.run(run_all()) == ["ok"] * 6
+    assert peak == 2
+    assert limiter.in_flight == 0
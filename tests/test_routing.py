@@ -0,0 +1,84 @@
+"""Tests for the per-node model routing."""
+
+import json
+
+import pytest
+
+from routing import DEFAULT_ROUTING, ModelRouting
+
+TIERS = {
+    "small": {"model": "provider:small"},
+    "medium": {"model": "provider:medium"},
+    "large": {"model": "provider:large"},
+}
+
+def make_routing(**routes) -> ModelRouting:
+    defaults = {"research": [{"tier": "large"}], "summarization": [{"tier": "medium"}], "compression": [{"tier": "medium"}]}
+    return ModelRouting(TIERS, {**defaults, **routes})
+
+def test_first_matching_rule_wins():
+    routing = make_routing(research=[
+        {"when": {"max_iteration": 1}, "tier": "small"},
+        {"when": {"max_iteration": 3}, "tier": "medium"},
+        {"tier": "large"},
+    ])
+
+    assert routing.select("research", iteration=0) == "small"
+    assert routing.select("research", iteration=1) == "small"
+    assert routing.select("research", iteration=2) == "medium"
+    assert routing.select("research", iteration=4) == "large"
+
+def test_node_rules_are_tried_before_the_role_rules():
+    routing = make_routing(llm_call=[{"when": {"max_iteration": 1}, "tier": "small"}])
+
+    assert routing.select("research", "llm_call", iteration=0) == "small"
+    # No node rule matches, so the role's route decides
+    assert routing.select("research", "llm_call", iteration=2) == "large"
+    # Nodes without a route of their own use the role's route
+    assert routing.select("research", "other_node", iteration=0) == "large"
+    assert routing.select("research", iteration=0) == "large"
+
+def test_min_and_max_bounds_are_inclusive():
+    routing = make_routing(summarization=[
+        {"when": {"min_input_tokens": 100, "max_input_tokens": 200}, "tier": "small"},
+        {"tier": "medium"},
+    ])
+
+    assert routing.select("summarization", input_tokens=99) == "medium"
+    assert routing.select("summarization", input_tokens=100) == "small"
+    assert routing.select("summarization", input_tokens=200) == "small"
+    assert routing.select("summarization", input_tokens=201) == "medium"
+
+def test_condition_on_a_missing_attribute_does_not_match():
+    routing = make_routing(compression=[{"when": {"max_input_tokens": 1000}, "tier": "small"}, {"tier": "medium"}])
+
+    assert routing.select("compression") == "medium"
+    assert routing.select("compression", iteration=0) == "medium"
+
+def test_unknown_tier_is_rejected():
+    with pytest.raises(ValueError, match="unknown model tier 'huge'"):
+        make_routing(llm_call=[{"tier": "huge"}])
+
+def test_unknown_condition_is_rejected():
+    with pytest.raises(ValueError, match="unknown conditions: max_pages"):
+        make_routing(llm_call=[{"when": {"max_pages": 3}, "tier": "small"}])
+
+def test_role_without_an_unconditional_rule_is_rejected():
+    with pytest.raises(ValueError, match="Route 'summarization' needs a rule without conditions"):
+        make_routing(summarization=[{"when": {"max_input_tokens": 1000}, "tier": "small"}])
+
+def test_override_is_merged_over_the_defaults(tmp_path):
+    override = {
+        "tiers": {"flash-lite": {"model": "google_genai:gemini-2.5-flash-lite"}},
+        "routes": {"summarize_webpage": [{"when": {"max_input_tokens": 2000}, "tier": "flash-lite"}]},
+    }
+    path = tmp_path / "routing.json"
+    path.write_text(json.dumps(override))
+
+    for source in (json.dumps(override), str(path)):
+        routing = ModelRouting.from_config(source)
+        assert set(routing.tiers) == set(DEFAULT_ROUTING["tiers"]) | {"flash-lite"}
+        assert routing.select("summarization", "summarize_webpage", input_tokens=500) == "flash-lite"
+        assert routing.select("summarization", "summarize_webpage", input_tokens=5000) == "flash"
+
+    assert ModelRouting.from_config("").routes == DEFAULT_ROUTING["routes"]
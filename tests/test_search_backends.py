@@ -0,0 +1,67 @@
+"""Tests for the search backends."""
+
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from search_backends import FixtureSearchBackend, TavilySearchBackend
+
+@pytest.fixture
+def stand_in_server():
+    """Run a local server speaking the Tavily search protocol, recording each request."""
+    requests = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            requests.append({"path": self.path, "auth": self.headers.get("Authorization"), "port": self.client_address[1], "body": body})
+            data = json.dumps({"query": body["query"], "results": [{"url": f"https://example.com/{body['query']}"}]}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}", requests
+    server.shutdown()
+    server.server_close()
+
+def test_tavily_backend_reuses_one_connection_pool(stand_in_server):
+    base_url, requests = stand_in_server
+    backend = TavilySearchBackend(api_key="test-key", base_url=base_url, max_concurrency=2)
+
+    async def run():
+        responses = [await backend.search(query, max_results=2) for query in ("a", "b", "c")]
+        await backend.aclose()
+        return responses
+
+    responses = asyncio.run(run())
+
+    assert [r["results"][0]["url"] for r in responses] == [f"https://example.com/{q}" for q in "abc"]
+    assert {r["path"] for r in requests} == {"/search"}
+    assert {r["auth"] for r in requests} == {"Bearer test-key"}
+    assert requests[0]["body"]["max_results"] == 2
+    # Sequential requests go over the same keep-alive connection
+    assert len({r["port"] for r in requests}) == 1
+
+def test_fixture_backend_trims_results_and_raw_content():
+    backend = FixtureSearchBackend({
+        "q": {"results": [{"url": "a", "raw_content": "A"}, {"url": "b", "raw_content": "B"}]},
+    })
+
+    response = asyncio.run(backend.search("q", max_results=1, include_raw_content=False))
+    missing = asyncio.run(backend.search("unknown"))
+
+    assert response["results"] == [{"url": "a"}]
+    assert missing["results"] == []
+    assert backend.calls == ["q", "unknown"]
@@ -0,0 +1,109 @@
+"""Tests for streaming research progress and reports."""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from langchain_core.messages import AIMessageChunk
+
+import supervisor
+from streaming import stream_report, stream_research
+
+class StubGraph:
+    """Stand-in for a compiled research graph that replays scripted stream chunks."""
+
+    checkpointer = None
+
+    def __init__(self, chunks: list, nodes=("llm_call", "tool_node", "compress_research")):
+        self.chunks = chunks
+        self.nodes = dict.fromkeys(nodes)
+        self.inputs = []
+
+    async def astream(self, graph_input, config=None, stream_mode=None):
+        self.inputs.append(graph_input)
+        for chunk in self.chunks:
+            yield chunk
+
+def token(text: str, node: str = "compress_research") -> tuple:
+    return "messages", (AIMessageChunk(content=text), {"langgraph_node": node})
+
+def update(node: str, output: dict) -> tuple:
+    return "updates", {node: output}
+
+@pytest.fixture
+def use_graph(monkeypatch):
+    def install(graph):
+        monkeypatch.setattr(supervisor, "get_research_graph", lambda config=None: graph)
+        return graph
+    return install
+
+async def collect(iterator) -> list:
+    return [item async for item in iterator]
+
+def test_report_generated_token_by_token_is_marked_streamed(use_graph):
+    graph = use_graph(StubGraph([
+        token("Planning.", node="llm_call"),
+        update("llm_call", {"researcher_messages": []}),
+        token("Final "),
+        token("report."),
+        update("compress_research", {"compressed_research": "Final report."}),
+    ]))
+
+    events = asyncio.run(collect(stream_research("topic")))
+
+    assert [(event.type, event.node) for event in events] == [
+        ("update", "llm_call"),
+        ("report_token", "compress_research"),
+        ("report_token", "compress_research"),
+        ("update", "compress_research"),
+        ("report", "compress_research"),
+    ]
+    assert events[-1].content == "Final report." and events[-1].streamed
+    assert graph.inputs[0]["research_topic"] == "topic"
+    # The report was fully streamed, so it is not repeated
+    assert asyncio.run(collect(stream_report("topic"))) == ["Final ", "report."]
+
+def test_report_without_tokens_is_yielded_in_one_piece(use_graph):
+    use_graph(StubGraph([update("compress_research", {"compressed_research": "Merged findings."})]))
+
+    events = asyncio.run(collect(stream_research("topic")))
+
+    assert events[-1].type == "report" and not events[-1].streamed
+    assert asyncio.run(collect(stream_report("topic"))) == ["Merged findings."]
+
+def test_report_differing_from_its_tokens_is_yielded_after_them(use_graph):
+    use_graph(StubGraph([
+        token("Partial answer"),
+        update("compress_research", {"compressed_research": "Complete report."}),
+    ]))
+
+    assert asyncio.run(collect(stream_report("topic"))) == ["Partial answer", "\n\n", "Complete report."]
+
+def test_supervisor_report_node_is_streamed(use_graph):
+    use_graph(StubGraph([
+        token("Subtopic findings."),
+        update("compress_research", {"compressed_research": "Subtopic findings."}),
+        token("Merged "),
+        token("report.", node="merge_research"),
+        update("merge_research", {"compressed_research": "report."}),
+    ], nodes=("plan_subtopics", "research_subtopics", "merge_research")))
+
+    events = asyncio.run(collect(stream_research("topic")))
+
+    assert [event.content for event in events if event.type == "report_token"] == ["report."]
+    assert [event.node for event in events if event.type == "report"] == ["merge_research"]
+    assert events[-1].streamed
+
+def test_finished_thread_only_yields_its_stored_report(use_graph):
+    class FinishedGraph(StubGraph):
+        checkpointer = object()
+
+        async def aget_state(self, config):
+            return SimpleNamespace(values={"compressed_research": "Stored report."}, next=())
+
+    graph = use_graph(FinishedGraph([token("never streamed")]))
+
+    events = asyncio.run(collect(stream_research("topic", {"configurable": {"thread_id": "done"}})))
+
+    assert [(event.type, event.content) for event in events] == [("report", "Stored report.")]
+    assert not graph.inputs
@@ -0,0 +1,32 @@
+"""Tests for the research supervisor nodes."""
+
+import asyncio
+
+import supervisor
+
+def test_merge_research_without_findings_makes_no_model_call(monkeypatch):
+    async def fail_invoke_model(*args, **kwargs):
+        raise AssertionError("merge_research called the model without findings")
+
+    monkeypatch.setattr(supervisor, "invoke_model", fail_invoke_model)
+    state = {
+        "research_topic": "topic",
+        "subtopic_research": [
+            {"subtopic": "a", "compressed_research": ""},
+            {"subtopic": "b", "compressed_research": ""},
+        ],
+    }
+
+    assert asyncio.run(supervisor.merge_research(state)) == {"compressed_research": ""}
+
+def test_merge_research_returns_a_single_subtopic_as_is(monkeypatch):
+    monkeypatch.setattr(supervisor, "invoke_model", None)
+    state = {
+        "research_topic": "topic",
+        "subtopic_research": [
+            {"subtopic": "a", "compressed_research": "findings of a"},
+            {"subtopic": "b", "compressed_research": ""},
+        ],
+    }
+
+    assert asyncio.run(supervisor.merge_research(state)) == {"compressed_research": "findings of a"}
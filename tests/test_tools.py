@@ -0,0 +1,188 @@
+"""Tests for the search result processing in tools.py."""
+
+import asyncio
+
+import tools
+from dedup import NearDuplicateIndex, get_dedup_stats, minhash
+from state import Summary
+from tools import deduplicate_search_results, select_relevant_results, split_seen_results
+
+def test_seen_urls_only_count_pages_that_would_be_summarized():
+    before = get_dedup_stats().url_duplicates
+    results = {
+        "https://example.com/a": {"url": "https://example.com/a", "raw_content": "page a"},
+        "https://example.com/b": {"url": "https://example.com/b", "raw_content": None},
+        "https://example.com/c": {"url": "https://example.com/c", "raw_content": "page c"},
+    }
+    seen_urls = {"https://example.com/a": "A", "https://example.com/b": "B"}
+
+    new_results, seen_results = split_seen_results(results, seen_urls)
+
+    assert list(new_results) == ["https://example.com/c"]
+    assert list(seen_results) == ["https://example.com/a", "https://example.com/b"]
+    assert get_dedup_stats().url_duplicates - before == 1
+
+def test_duplicate_urls_only_count_pages_that_would_be_summarized():
+    before = get_dedup_stats().url_duplicates
+    search_results = [
+        {"results": [{"url": "https://example.com/a", "raw_content": "page a"}, {"url": "https://example.com/b"}]},
+        {"results": [{"url": "https://www.example.com/a/?utm_source=x", "raw_content": "page a"}, {"url": "https://example.com/b#top"}]},
+    ]
+
+    unique_results = deduplicate_search_results(search_results)
+
+    assert list(unique_results) == ["https://example.com/a", "https://example.com/b"]
+    assert get_dedup_stats().url_duplicates - before == 1
+
+def make_results(pages: dict) -> dict:
+    return {url: {"url": url, "title": url, "content": f"snippet of {url}", "raw_content": text} for url, text in pages.items()}
+
+def test_relevance_cutoff_keeps_snippets_of_weak_and_unmatched_pages():
+    results = make_results({
+        "strong": "solid state battery electrolyte battery research " * 3,
+        "weak": "battery mentioned once in a long article about cooking recipes bread pastry dough oven baking",
+        "unrelated": "gardening tips for tomatoes",
+    })
+
+    relevant, snippets = select_relevant_results(results, results, "solid state battery", top_k=0, min_relevance=0.5)
+
+    assert list(relevant) == ["strong"]
+    assert list(snippets) == ["weak", "unrelated"]
+
+def test_relevance_top_k_limits_summaries_but_not_pages_without_raw_content():
+    results = make_results({f"page{i}": "battery " * (i + 1) + "research" for i in range(4)})
+    results["snippet-only"] = {"url": "snippet-only", "title": "t", "content": "battery", "raw_content": None}
+
+    relevant, snippets = select_relevant_results(results, results, "battery", top_k=2, min_relevance=0.0)
+
+    assert set(relevant) == {"page3", "page2", "snippet-only"}
+    assert list(snippets) == ["page0", "page1"]
+
+def test_relevance_cutoff_is_relative_to_all_results_of_the_search():
+    results = make_results({"seen": "battery battery battery", "new": "battery and many other unrelated words here"})
+    new_results = {"new": results["new"]}
+
+    relevant, snippets = select_relevant_results(results, new_results, "battery", top_k=0, min_relevance=0.9)
+
+    assert relevant == {}
+    assert list(snippets) == ["new"]
+
+def test_all_new_pages_are_summarized_when_nothing_matches_the_query():
+    results = make_results({"a": "alpha", "b": "beta"})
+
+    relevant, snippets = select_relevant_results(results, results, "the of and", top_k=1, min_relevance=0.5)
+
+    assert list(relevant) == ["a", "b"]
+    assert snippets == {}
+
+def test_page_index_only_reuses_summaries_of_the_same_model_tier(monkeypatch):
+    tiers = iter(["fast", "strong", "fast"])
+    summarized = []
+
+    async def summarize_text(content):
+        summarized.append(content)
+        return Summary(summary=f"summary {len(summarized)}", key_excerpts="")
+
+    monkeypatch.setattr(tools, "route_model", lambda role, node=None, **situation: next(tiers))
+    monkeypatch.setattr(tools, "model_name", lambda role, tier=None: f"model-{tier}")
+    monkeypatch.setattr(tools, "get_summary_cache", lambda: None)
+    monkeypatch.setattr(tools, "get_page_index", lambda: index)
+    monkeypatch.setattr(tools, "summarize_text", summarize_text)
+    index = NearDuplicateIndex(threshold=0.9)
+    page = " ".join(f"word{i}" for i in range(300))
+    fingerprint = minhash(page)
+
+    summaries = [asyncio.run(tools.summarize_webpage_content(page, fingerprint)) for _ in range(3)]
+
+    assert len(summarized) == 2
+    assert "summary 1" in summaries[0] and "summary 2" in summaries[1]
+    assert summaries[2] == summaries[0]
+
+def test_over_long_line_is_cut_into_chunks():
+    text = "".join(f"{i:05d}" for i in range(400))
+
+    chunks = tools.split_into_chunks(text, max_tokens=100)
+
+    assert all(len(chunk) <= 400 for chunk in chunks)
+    assert "".join(chunks) == text
+
+def test_paragraphs_are_packed_without_being_split():
+    paragraphs = [f"Paragraph {i}. " + "word " * 28 for i in range(5)]
+
+    chunks = tools.split_into_chunks("\n\n".join(paragraphs), max_tokens=100)
+
+    assert all(len(chunk) <= 400 for chunk in chunks)
+    assert [chunk.split("\n\n") for chunk in chunks] == [paragraphs[0:2], paragraphs[2:4], paragraphs[4:5]]
+
+def test_long_paragraph_breaks_on_lines():
+    lines = [f"Line {i}: " + "text " * 20 for i in range(10)]
+
+    chunks = tools.split_into_chunks("\n".join(lines), max_tokens=100)
+
+    assert all(len(chunk) <= 400 for chunk in chunks)
+    assert [line for chunk in chunks for line in chunk.split("\n\n")] == lines
+
+class StructuredModel:
+    def with_structured_output(self, schema):
+        return self
+
+def test_large_page_is_summarized_by_map_and_reduce(monkeypatch):
+    merged = []
+
+    async def summarize_text(chunk):
+        return Summary(summary=f"summary of {chunk.split()[0]}", key_excerpts=chunk.split()[0])
+
+    async def invoke_model(role, messages, model=None, tier=None):
+        merged.append(str(messages[0].content))
+        return Summary(summary="merged summary", key_excerpts="merged excerpts")
+
+    monkeypatch.setattr(tools, "summarize_text", summarize_text)
+    monkeypatch.setattr(tools, "get_chat_model", lambda role, tier=None: StructuredModel())
+    monkeypatch.setattr(tools, "invoke_model", invoke_model)
+    page = "\n\n".join(f"Part{i} " + "word " * 70 for i in range(3))
+
+    summary = asyncio.run(tools.summarize_large_webpage(page, chunk_tokens=100, max_concurrency=2))
+
+    assert summary.summary == "merged summary"
+    assert all(f"summary of Part{i}" in merged[0] for i in range(3))
+
+def test_failed_chunk_and_merge_fall_back_to_the_page_text(monkeypatch):
+    async def summarize_text(chunk):
+        if chunk.startswith("Part1"):
+            raise RuntimeError("model error")
+        return Summary(summary=f"summary of {chunk.split()[0]}", key_excerpts=chunk.split()[0])
+
+    def get_chat_model(role, tier=None):
+        raise RuntimeError("merge model unavailable")
+
+    monkeypatch.setattr(tools, "summarize_text", summarize_text)
+    monkeypatch.setattr(tools, "get_chat_model", get_chat_model)
+    parts = [f"Part{i} " + "word " * 70 for i in range(3)]
+
+    summary = asyncio.run(tools.summarize_large_webpage("\n\n".join(parts), chunk_tokens=100, max_concurrency=2))
+
+    assert summary.summary.split("\n\n") == ["summary of Part0", parts[1], "summary of Part2"]
+    assert summary.key_excerpts == "Part0, Part2"
+
+def test_back_references_name_the_earlier_source():
+    unique_results = {
+        "https://example.com/new": {"title": "New page"},
+        "https://www.example.com/old/?utm_source=feed": {"title": "Old page again"},
+        "https://mirror.example.org/new": {"title": "Mirror of the new page"},
+        "https://mirror.example.org/old": {"title": "Mirror of an old page"},
+    }
+    processed_results = {"https://example.com/new": {"title": "New page", "content": "Summary."}}
+    near_duplicates = {
+        "https://mirror.example.org/new": "https://example.com/new",
+        "https://mirror.example.org/old": "https://example.com/older",
+    }
+    seen_urls = {"https://example.com/old": "Old page", "https://example.com/older": "Older page"}
+
+    results = tools.refer_to_earlier_results(unique_results, processed_results, near_duplicates, seen_urls)
+
+    assert list(results) == list(unique_results)
+    assert results["https://example.com/new"]["content"] == "Summary."
+    assert 'as "Old page" (https://example.com/old)' in results["https://www.example.com/old/?utm_source=feed"]["content"]
+    assert 'Near-duplicate of "New page" (https://example.com/new)' in results["https://mirror.example.org/new"]["content"]
+    assert 'Near-duplicate of "Older page" (https://example.com/older)' in results["https://mirror.example.org/old"]["content"]
+    assert results["https://mirror.example.org/old"]["title"] == "Mirror of an old page"
@@ -5,18 +5,28 @@ This module provides search and content processing utilities for the research ag
 including web search capabilities and content summarization tools.
 """
 
+import asyncio
+import re
 from pathlib import Path
 from datetime import datetime
-from typing_extensions import Annotated, List, Literal
+from typing import Optional
+from typing_extensions import Annotated, Dict, List, Literal
 
-from langchain.chat_models import init_chat_model 
 from langchain_core.messages import HumanMessage
-from langchain_core.runnables import RunnableConfig
+from langchain_core.runnables import RunnableConfig, ensure_config
 from langchain_core.tools import tool, InjectedToolArg
-from tavily import TavilyClient
 
+from cache import SearchCache, SummaryCache, get_search_cache, get_summary_cache
+from clients import get_chat_model, invoke_model, model_name, route_model
+from configuration import Configuration
+from deadlines import DeadlineExceeded, call_with_deadline
+from dedup import NearDuplicateIndex, canonicalize_url, get_page_index, minhash, record_duplicates, signature_to_hex
+from extraction import extract_main_content, record_extraction
+from search_backends import get_search_backend
 from state import Summary
-from prompts import summarize_webpage_prompt
+from tracing import annotate_span, span
+from prompts import summarize_webpage_prompt, merge_webpage_summaries_prompt
+from ranking import bm25_scores
 
 # ===== UTILITY FUNCTIONS =====
 
@@ -37,20 +47,21 @@ def get_current_dir() -> Path:
     except NameError:  # __file__ is not defined
         return Path.cwd()
 
-# ===== CONFIGURATION =====
-
-summarization_model = init_chat_model(model="google_genai:gemini-2.5-flash")
-tavily_client = TavilyClient()
-
 # ===== SEARCH FUNCTIONS =====
 
-def tavily_search_multiple(
+async def tavily_search_multiple(
     search_queries: List[str], 
     max_results: int = 3, 
     topic: Literal["general", "news", "finance"] = "general", 
     include_raw_content: bool = True, 
 ) -> List[dict]:
-    """Perform search using Tavily API for multiple queries.
+    """Perform search using the configured search backend for multiple queries.
+
+    Queries are issued concurrently; the backend enforces its own concurrency
+    limit and per-request timeout. A query that does not answer within
+    ``search_deadline`` returns no results, and with ``hedge_requests`` a slow
+    query is sent a second time. Responses are served from the search cache
+    when an equivalent query ran within the TTL of its topic.
 
     Args:
         search_queries: List of search queries to execute
@@ -59,57 +70,243 @@ def tavily_search_multiple(
         include_raw_content: Whether to include raw webpage content
 
     Returns:
-        List of search result dictionaries
+        List of search result dictionaries, one per query in the input order
     """
+    configurable = Configuration.from_runnable_config(ensure_config())
+    backend = get_search_backend()
+    cache = get_search_cache()
+
+    async def run_query(query: str) -> dict:
+        with span("tavily_search_multiple", "search", query=query, topic=topic):
+            cache_key = SearchCache.make_key(query, max_results, topic, include_raw_content)
+            if cache is not None:
+                cached_response = await asyncio.to_thread(cache.get, cache_key, topic)
+                if cached_response is not None:
+                    annotate_span(cache_hit=True, results=len(cached_response.get("results", [])))
+                    return cached_response
+
+            try:
+                response = await call_with_deadline(
+                    "search",
+                    lambda: backend.search(
+                        query,
+                        max_results=max_results,
+                        topic=topic,
+                        include_raw_content=include_raw_content,
+                    ),
+                    deadline=configurable.search_deadline,
+                    hedge=configurable.hedge_requests,
+                )
+            except Exception as e:
+                print(f"Search failed for query '{query}': {str(e) or type(e).__name__}")
+                annotate_span(error=str(e) or type(e).__name__, results=0, fallback="no_results")
+                return {"query": query, "results": []}
+
+            annotate_span(cache_hit=False, results=len(response.get("results", [])))
+            if cache is not None:
+                await asyncio.to_thread(cache.set, cache_key, response)
+            return response
+
+    return list(await asyncio.gather(*(run_query(query) for query in search_queries)))
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of tokens in a text, assuming about four characters per token."""
+    return (len(text) + 3) // 4
+
+def split_into_chunks(text: str, max_tokens: int) -> List[str]:
+    """Split text into chunks of at most ``max_tokens`` estimated tokens.
+
+    Chunks break on paragraph boundaries where possible, then on line
+    boundaries, and only cut inside a line when a single line is too long.
 
-    # Execute searches sequentially. Note: yon can use AsyncTavilyClient to parallelize this step.
-    search_docs = []
-    for query in search_queries:
-        result = tavily_client.search(
-            query,
-            max_results=max_results,
-            include_raw_content=include_raw_content,
-            topic=topic
-        )
-        search_docs.append(result)
+    Args:
+        text: Text to split
+        max_tokens: Maximum estimated tokens per chunk
+
+    Returns:
+        List of text chunks in document order
+    """
+    max_chars = max_tokens * 4
+
+    # Break the text into pieces that each fit into a chunk on their own
+    pieces = []
+    for paragraph in re.split(r"\n\s*\n", text):
+        if len(paragraph) <= max_chars:
+            pieces.append(paragraph)
+            continue
+        for line in paragraph.splitlines():
+            pieces.extend(line[i:i + max_chars] for i in range(0, len(line), max_chars))
+
+    # Greedily pack pieces into chunks
+    chunks, current = [], ""
+    for piece in pieces:
+        if not piece.strip():
+            continue
+        if current and len(current) + len(piece) + 2 > max_chars:
+            chunks.append(current)
+            current = piece
+        else:
+            current = f"{current}\n\n{piece}" if current else piece
+    if current:
+        chunks.append(current)
 
-    return search_docs
+    return chunks
 
-def summarize_webpage_content(webpage_content: str) -> str:
-    """Summarize webpage content using the configured summarization model.
+def format_summary(summary: Summary) -> str:
+    """Format a structured summary with clear summary and excerpt sections."""
+    return (
+        f"<summary>\n{summary.summary}\n</summary>\n\n"
+        f"<key_excerpts>\n{summary.key_excerpts}\n</key_excerpts>"
+    )
+
+async def summarize_text(webpage_content: str) -> Summary:
+    """Summarize a page, or a chunk of a page, in a single model call.
+
+    The model is chosen by the ``summarize_webpage`` route from the size of
+    the content. With ``hedge_requests``, a slow call is sent a second time.
+
+    Args:
+        webpage_content: Content to summarize
+
+    Returns:
+        Structured summary of the content
+    """
+    # Set up structured output model for summarization
+    tier = route_model("summarization", "summarize_webpage", input_tokens=estimate_tokens(webpage_content))
+    structured_model = get_chat_model("summarization", tier).with_structured_output(Summary)
+
+    # Generate summary
+    messages = [
+        HumanMessage(content=summarize_webpage_prompt.format(
+            webpage_content=webpage_content, 
+            date=get_today_str()
+        ))
+    ]
+    configurable = Configuration.from_runnable_config(ensure_config())
+    return await call_with_deadline(
+        "summarization",
+        lambda: invoke_model("summarization", messages, model=structured_model, tier=tier),
+        hedge=configurable.hedge_requests,
+    )  # type: ignore
+
+async def summarize_large_webpage(webpage_content: str, chunk_tokens: int, max_concurrency: int) -> Summary:
+    """Summarize an oversized page by map-reduce over its chunks.
+
+    Chunks are summarized concurrently and the partial summaries are merged
+    into a single Summary. A chunk whose summary fails contributes its leading
+    text instead, and a failed merge falls back to concatenating the partial
+    summaries, so no part of the page is silently dropped.
 
     Args:
         webpage_content: Raw webpage content to summarize
+        chunk_tokens: Maximum estimated tokens per chunk
+        max_concurrency: Maximum number of chunk summaries in flight
 
     Returns:
-        Formatted summary with key excerpts
+        Structured summary of the whole page
     """
+    chunks = split_into_chunks(webpage_content, chunk_tokens)
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def summarize_chunk(chunk: str) -> Summary:
+        async with semaphore:
+            try:
+                return await summarize_text(chunk)
+            except Exception as e:
+                print(f"Failed to summarize webpage chunk: {str(e)}")
+                return Summary(summary=chunk[:1000], key_excerpts="")
+
+    chunk_summaries = await asyncio.gather(*(summarize_chunk(chunk) for chunk in chunks))
+    if len(chunk_summaries) == 1:
+        return chunk_summaries[0]
+
+    partial_summaries = "\n\n".join(
+        f"<part index=\"{i}\">\n{format_summary(summary)}\n</part>"
+        for i, summary in enumerate(chunk_summaries, 1)
+    )
     try:
-        # Set up structured output model for summarization
-        structured_model = summarization_model.with_structured_output(Summary)
-
-        # Generate summary
-        summary = structured_model.invoke([
-            HumanMessage(content=summarize_webpage_prompt.format(
-                webpage_content=webpage_content, 
+        tier = route_model("summarization", "merge_webpage_summaries", input_tokens=estimate_tokens(partial_summaries))
+        structured_model = get_chat_model("summarization", tier).with_structured_output(Summary)
+        return await invoke_model("summarization", [
+            HumanMessage(content=merge_webpage_summaries_prompt.format(
+                partial_summaries=partial_summaries,
                 date=get_today_str()
             ))
-        ])
-
-        # Format summary with clear structure
-        formatted_summary = (
-            f"<summary>\n{summary.summary}\n</summary>\n\n" # type: ignore
-            f"<key_excerpts>\n{summary.key_excerpts}\n</key_excerpts>" # type: ignore
+        ], model=structured_model, tier=tier)  # type: ignore
+    except Exception as e:
+        print(f"Failed to merge webpage chunk summaries: {str(e)}")
+        return Summary(
+            summary="\n\n".join(summary.summary for summary in chunk_summaries),
+            key_excerpts=", ".join(s.key_excerpts for s in chunk_summaries if s.key_excerpts),
         )
 
-        return formatted_summary
+async def summarize_webpage_content(webpage_content: str, fingerprint: Optional[tuple] = None) -> str:
+    """Summarize webpage content using the configured summarization model.
+
+    Summaries are served from the persistent summary cache when the same
+    content was already summarized with the current prompt and model, and
+    from the process-wide page index when a near-duplicate page was, by the
+    same model tier. Pages larger than ``summarization_chunk_tokens`` are
+    summarized chunk by chunk and merged.
+
+    Args:
+        webpage_content: Raw webpage content to summarize
+        fingerprint: Optional MinHash signature of the content
+
+    Returns:
+        Formatted summary with key excerpts
+    """
+    configurable = Configuration.from_runnable_config(ensure_config())
+    cache = get_summary_cache()
+    # Key by the model the page routes to, so a routing change does not serve stale summaries,
+    # nor a near-duplicate summarized by another tier
+    tier = route_model("summarization", "summarize_webpage", input_tokens=estimate_tokens(webpage_content))
+    cache_key = SummaryCache.make_key(webpage_content, summarize_webpage_prompt, model_name("summarization", tier))
+    if cache is not None:
+        cached_summary = await asyncio.to_thread(cache.get, cache_key)
+        if cached_summary is not None:
+            annotate_span(cache_hit=True)
+            return cached_summary
+
+    page_index = get_page_index() if fingerprint is not None else None
+    if page_index is not None:
+        near_duplicate_summary = page_index.find(fingerprint, namespace=tier)
+        if near_duplicate_summary is not None:
+            record_duplicates(reused_summaries=1)
+            annotate_span(near_duplicate=True)
+            return near_duplicate_summary
+
+    try:
+        if estimate_tokens(webpage_content) <= configurable.summarization_chunk_tokens:
+            summary = await summarize_text(webpage_content)
+        else:
+            summary = await summarize_large_webpage(
+                webpage_content,
+                chunk_tokens=configurable.summarization_chunk_tokens,
+                max_concurrency=configurable.max_concurrent_chunk_summaries,
+            )
+
+        # Format summary with clear structure
+        formatted_summary = format_summary(summary)
 
     except Exception as e:
         print(f"Failed to summarize webpage: {str(e)}")
+        annotate_span(error=str(e), fallback="truncated_content")
         return webpage_content[:1000] + "..." if len(webpage_content) > 1000 else webpage_content
 
+    # Only successful summaries are cached, fallbacks are retried next time
+    if cache is not None:
+        await asyncio.to_thread(cache.set, cache_key, formatted_summary)
+    if page_index is not None:
+        page_index.add(fingerprint, formatted_summary, namespace=tier)
+
+    return formatted_summary
+
 def deduplicate_search_results(search_results: List[dict]) -> dict:
-    """Deduplicate search results by URL to avoid processing duplicate content.
+    """Deduplicate search results by canonical URL to avoid processing duplicate content.
+
+    URLs that only differ in tracking parameters, ``www.``, fragments or
+    trailing slashes count as the same page; the first URL seen is kept.
 
     Args:
         search_results: List of search result dictionaries
@@ -117,40 +314,307 @@ def deduplicate_search_results(search_results: List[dict]) -> dict:
     Returns:
         Dictionary mapping URLs to unique results
     """
-    unique_results = {}
+    unique_results, canonical_urls = {}, set()
+    duplicates = 0
 
     for response in search_results:
         for result in response['results']:
-            url = result['url']
-            if url not in unique_results:
-                unique_results[url] = result
-
+            canonical_url = canonicalize_url(result['url'])
+            if canonical_url in canonical_urls:
+                # Only pages with raw content would have been summarized
+                duplicates += bool(result.get('raw_content'))
+                continue
+            canonical_urls.add(canonical_url)
+            unique_results[result['url']] = result
+
+    record_duplicates(url_duplicates=duplicates)
     return unique_results
 
-def process_search_results(unique_results: dict) -> dict:
+async def process_search_results(
+    unique_results: dict,
+    max_concurrency: int = 5,
+    fingerprints: Optional[Dict[str, tuple]] = None,
+    deadline: Optional[float] = None,
+) -> dict:
     """Process search results by summarizing content where available.
 
+    All pages are summarized concurrently, with at most ``max_concurrency``
+    summarization requests in flight at once. The tokens content extraction
+    removed from each summarized page are recorded on its span. A page whose
+    summary misses the deadline keeps the snippet returned by the search
+    backend, so one slow call cannot hold up the whole search.
+
     Args:
         unique_results: Dictionary of unique search results
+        max_concurrency: Maximum number of concurrent summarization calls
+        fingerprints: Optional content signatures by URL, used to reuse
+            summaries of near-duplicate pages
+        deadline: Seconds a page summary may take once started, or None for no deadline
 
     Returns:
-        Dictionary of processed results with summaries
+        Dictionary of processed results with summaries, in the input order;
+        ``summarized`` tells whether a result got a summary or kept its snippet
     """
-    summarized_results = {}
+    semaphore = asyncio.Semaphore(max_concurrency)
 
-    for url, result in unique_results.items():
+    async def process_result(url: str, result: dict) -> tuple[str, bool]:
         # Use existing content if no raw content for summarization
         if not result.get("raw_content"):
-            content = result['content']
-        else:
-            # Summarize raw content for better processing
-            content = summarize_webpage_content(result['raw_content'])
+            return result['content'], False
+
+        # Record what content extraction saved on the pages actually summarized
+        tokens_saved = 0
+        if result.get('raw_tokens') is not None:
+            tokens = estimate_tokens(result['raw_content'])
+            tokens_saved = result['raw_tokens'] - tokens
+            record_extraction(pages=1, input_tokens=result['raw_tokens'], output_tokens=tokens)
+
+        # Summarize raw content for better processing
+        async with semaphore:
+            with span(
+                "summarize_webpage_content", "summarization",
+                url=url, input_chars=len(result['raw_content']), tokens_saved=tokens_saved,
+            ):
+                try:
+                    summary = await call_with_deadline(
+                        "summarize_webpage_content",
+                        lambda: summarize_webpage_content(result['raw_content'], (fingerprints or {}).get(url)),
+                        deadline=deadline,
+                        # Page summaries mix cache hits and map-reduce over chunks, so
+                        # only the model calls inside them are timed and hedged
+                        track_latency=False,
+                    )
+                    return summary, True
+                except DeadlineExceeded as e:
+                    print(f"Summary of {url} missed its deadline, using the search snippet: {str(e)}")
+                    annotate_span(error=str(e), fallback="snippet")
+                    return result['content'], False
+
+    contents = await asyncio.gather(
+        *(process_result(url, result) for url, result in unique_results.items())
+    )
 
-        summarized_results[url] = {
+    return {
+        url: {
             'title': result['title'],
-            'content': content
+            'content': content,
+            'summarized': summarized,
         }
+        for (url, result), (content, summarized) in zip(unique_results.items(), contents)
+    }
+
+def split_seen_results(unique_results: dict, seen_urls: Dict[str, str]) -> tuple[dict, dict]:
+    """Split search results into new pages and pages already summarized in this run.
 
+    Args:
+        unique_results: Dictionary of unique search results
+        seen_urls: Run-wide mapping of already summarized URLs to their titles
+
+    Returns:
+        Tuple of (new results, previously seen results)
+    """
+    new_results, seen_results = {}, {}
+    for url, result in unique_results.items():
+        canonical_url = canonicalize_url(url)
+        if canonical_url in seen_urls:
+            seen_results[url] = result
+        else:
+            new_results[url] = result
+
+    # Only pages with raw content would have been summarized
+    record_duplicates(url_duplicates=sum(1 for result in seen_results.values() if result.get('raw_content')))
+    return new_results, seen_results
+
+def extract_results(unique_results: dict) -> dict:
+    """Replace the raw content of search results with its extracted main content.
+
+    Args:
+        unique_results: Dictionary of unique search results
+
+    Returns:
+        Dictionary of the same results with cleaned ``raw_content`` and the
+        estimated tokens of the original content as ``raw_tokens``
+    """
+    return {
+        url: {
+            **result,
+            'raw_content': extract_main_content(result['raw_content']),
+            'raw_tokens': estimate_tokens(result['raw_content']),
+        } if result.get('raw_content') else result
+        for url, result in unique_results.items()
+    }
+
+def fingerprint_results(unique_results: dict, min_chars: int) -> Dict[str, tuple]:
+    """Compute MinHash signatures of the raw content of search results.
+
+    Args:
+        unique_results: Dictionary of unique search results
+        min_chars: Pages with shorter raw content are not fingerprinted
+
+    Returns:
+        Dictionary mapping URLs to content signatures
+    """
+    return {
+        url: minhash(result['raw_content'])
+        for url, result in unique_results.items()
+        if len(result.get('raw_content') or "") >= min_chars
+    }
+
+def split_near_duplicates(
+    unique_results: dict, fingerprints: Dict[str, tuple], seen_pages: Dict[str, str], threshold: float
+) -> tuple[dict, dict]:
+    """Split search results into new pages and near-duplicates of pages already summarized in this run.
+
+    Near-duplicates within the same results are collapsed onto their first
+    page as well.
+
+    Args:
+        unique_results: Dictionary of unique search results
+        fingerprints: Content signatures by URL
+        seen_pages: Run-wide mapping of hex signatures to the URL of the page summarized
+        threshold: Minimum estimated Jaccard similarity of near-duplicates
+
+    Returns:
+        Tuple of (new results, mapping of near-duplicate URLs to the URL of the page they duplicate)
+    """
+    index = NearDuplicateIndex.from_hex(seen_pages, threshold=threshold)
+    new_results, near_duplicates = {}, {}
+    for url, result in unique_results.items():
+        fingerprint = fingerprints.get(url)
+        original_url = index.find(fingerprint) if fingerprint is not None else None
+        if original_url is not None:
+            near_duplicates[url] = original_url
+            continue
+        if fingerprint is not None:
+            index.add(fingerprint, url)
+        new_results[url] = result
+
+    record_duplicates(near_duplicates=len(near_duplicates))
+    return new_results, near_duplicates
+
+def record_summarized_results(
+    results: dict,
+    fingerprints: Dict[str, tuple],
+    seen_urls: Optional[Dict[str, str]],
+    seen_pages: Optional[Dict[str, str]],
+    summarized: bool = True,
+) -> None:
+    """Add search results to, or remove them from, the run-wide indexes of summarized pages.
+
+    Only results with raw content are recorded, since the others keep their
+    snippet. Pages are recorded before they are summarized, so concurrent
+    searches sharing the indexes do not summarize them twice, and removed
+    again if their summary does not come through.
+
+    Args:
+        results: Dictionary of search results
+        fingerprints: Content signatures by URL
+        seen_urls: Run-wide mapping of summarized URLs to their titles, or None
+        seen_pages: Run-wide mapping of hex signatures to the URL of the page summarized, or None
+        summarized: Whether to record the results, or to remove them
+    """
+    for url, result in results.items():
+        if not result.get('raw_content'):
+            continue
+        canonical_url = canonicalize_url(url)
+        signature = signature_to_hex(fingerprints[url]) if url in fingerprints else None
+        if summarized:
+            if seen_urls is not None:
+                seen_urls[canonical_url] = result['title']
+            if seen_pages is not None and signature is not None:
+                seen_pages[signature] = url
+        else:
+            if seen_urls is not None:
+                seen_urls.pop(canonical_url, None)
+            if seen_pages is not None and signature is not None and seen_pages.get(signature) == url:
+                del seen_pages[signature]
+
+def select_relevant_results(
+    unique_results: dict, new_results: dict, query: str, top_k: int, min_relevance: float
+) -> tuple[dict, dict]:
+    """Split new search results into pages worth summarizing and pages that keep their snippet.
+
+    All results of the search are scored with BM25 against ``query``. A new
+    page is summarized if it matches the query at all, scores at least
+    ``min_relevance`` times the best page, and is among the ``top_k`` best
+    new pages. If no page matches the query, as with a query the tokenizer
+    cannot split into terms, all new pages are summarized.
+
+    Args:
+        unique_results: Dictionary of all unique results of the search
+        new_results: Dictionary of the results that would be summarized
+        query: Search query, optionally extended with the research topic
+        top_k: Maximum number of pages to summarize (0 disables)
+        min_relevance: Minimum score relative to the best page of the search
+
+    Returns:
+        Tuple of (results to summarize, results to keep as snippets), both in input order
+    """
+    scores = dict(zip(
+        unique_results,
+        bm25_scores(query, [result.get('raw_content') or result['content'] for result in unique_results.values()]),
+    ))
+    best_score = max(scores.values(), default=0.0)
+    if best_score <= 0:
+        return dict(new_results), {}
+    cutoff = best_score * min_relevance
+    ranked = sorted(
+        (url for url in new_results if scores[url] > 0 and scores[url] >= cutoff),
+        key=lambda url: scores[url],
+        reverse=True,
+    )
+    selected = set(ranked[:top_k] if top_k else ranked)
+
+    relevant_results, snippet_results = {}, {}
+    for url, result in new_results.items():
+        if url in selected or not result.get('raw_content'):
+            relevant_results[url] = result
+        else:
+            snippet_results[url] = result
+    return relevant_results, snippet_results
+
+def earlier_source(url: str, seen_urls: Optional[Dict[str, str]], unique_results: dict) -> str:
+    """Describe a summarized page by its title and URL, for back-references to its summary."""
+    title = (seen_urls or {}).get(canonicalize_url(url)) or unique_results.get(url, {}).get('title')
+    return f'"{title}" ({url})' if title else url
+
+def refer_to_earlier_results(
+    unique_results: dict,
+    processed_results: dict,
+    near_duplicates: Dict[str, str],
+    seen_urls: Optional[Dict[str, str]],
+) -> dict:
+    """Combine the processed results with back-references for the pages that were not summarized again.
+
+    Pages seen earlier in the run and near-duplicates name the source whose
+    summary they share by title and URL, so the model can find it among the
+    earlier results.
+
+    Args:
+        unique_results: Dictionary of unique search results, in output order
+        processed_results: Dictionary of the results summarized or kept as snippets
+        near_duplicates: Mapping of near-duplicate URLs to the URL of the page they duplicate
+        seen_urls: Run-wide mapping of summarized URLs to their titles, or None
+
+    Returns:
+        Dictionary of results ready for ``format_search_output``
+    """
+    summarized_results = {}
+    for url, result in unique_results.items():
+        if url in processed_results:
+            summarized_results[url] = processed_results[url]
+        elif url in near_duplicates:
+            source = earlier_source(near_duplicates[url], seen_urls, unique_results)
+            summarized_results[url] = {
+                'title': result['title'],
+                'content': f"Near-duplicate of {source}, which is summarized in this or an earlier search result of this session; see that SOURCE.",
+            }
+        else:
+            source = earlier_source(canonicalize_url(url), seen_urls, unique_results)
+            summarized_results[url] = {
+                'title': result['title'],
+                'content': f"Already summarized as {source} in an earlier search result of this session (same URL); see that SOURCE.",
+            }
     return summarized_results
 
 def format_search_output(summarized_results: dict) -> str:
@@ -178,10 +642,14 @@ def format_search_output(summarized_results: dict) -> str:
 # ===== RESEARCH TOOLS =====
 
 @tool(parse_docstring=True)
-def tavily_search(
+async def tavily_search(
     query: str,
     max_results: Annotated[int, InjectedToolArg] = 3,
     topic: Annotated[Literal["general", "news", "finance"], InjectedToolArg] = "general",
+    seen_urls: Annotated[Optional[Dict[str, str]], InjectedToolArg] = None,
+    seen_pages: Annotated[Optional[Dict[str, str]], InjectedToolArg] = None,
+    research_topic: Annotated[Optional[str], InjectedToolArg] = None,
+    config: RunnableConfig = None,
 ) -> str:
     """Fetch results from Tavily search API with content summarization.
 
@@ -189,12 +657,19 @@ def tavily_search(
         query: A single search query to execute
         max_results: Maximum number of results to return
         topic: Topic to filter results by ('general', 'news', 'finance')
+        seen_urls: Run-wide index of URLs already summarized, updated in place
+            with the pages this search summarizes
+        seen_pages: Run-wide index of content signatures already summarized, updated in place
+            with the pages this search summarizes
+        research_topic: Research topic of the run, used to rank the results
 
     Returns:
         Formatted string of search results with summaries
     """
+    configurable = Configuration.from_runnable_config(config)
+
     # Execute search for single query
-    search_results = tavily_search_multiple(
+    search_results = await tavily_search_multiple(
         [query],  # Convert single query to list for the internal function
         max_results=max_results,
         topic=topic,
@@ -204,8 +679,71 @@ def tavily_search(
     # Deduplicate results by URL to avoid processing duplicate content
     unique_results = deduplicate_search_results(search_results)
 
-    # Process results with summarization
-    summarized_results = process_search_results(unique_results)
+    # Strip page chrome before anything reads the content
+    if configurable.content_extraction_enabled:
+        unique_results = await asyncio.to_thread(extract_results, unique_results)
+
+    fingerprints = {}
+    if configurable.near_duplicate_enabled:
+        fingerprints = await asyncio.to_thread(
+            fingerprint_results, unique_results, configurable.near_duplicate_min_chars
+        )
+
+    # From here until the pages to summarize are recorded there is no await,
+    # so concurrent searches of the run see each other's pages
+
+    # Skip pages already summarized earlier in this run
+    new_results, seen_results = unique_results, {}
+    if seen_urls is not None:
+        new_results, seen_results = split_seen_results(unique_results, seen_urls)
+
+    # Collapse pages whose content nearly matches a page already summarized
+    near_duplicates = {}
+    if configurable.near_duplicate_enabled:
+        new_results, near_duplicates = split_near_duplicates(
+            new_results,
+            fingerprints,
+            seen_pages if seen_pages is not None else {},
+            threshold=configurable.near_duplicate_threshold,
+        )
+
+    # Only summarize the pages relevant to the query, the others keep their snippet
+    if configurable.relevance_ranking_enabled:
+        new_results, snippet_results = select_relevant_results(
+            unique_results,
+            new_results,
+            f"{query} {research_topic or ''}",
+            top_k=configurable.summarize_top_k,
+            min_relevance=configurable.summarize_min_relevance,
+        )
+        # Near-duplicates of a page that keeps its snippet keep their own snippet too
+        for url in [url for url, original_url in near_duplicates.items() if original_url in snippet_results]:
+            snippet_results[url] = unique_results[url]
+            del near_duplicates[url]
+        new_results.update({url: {**result, 'raw_content': None} for url, result in snippet_results.items()})
+
+    # Process results with concurrent summarization
+    record_summarized_results(new_results, fingerprints, seen_urls, seen_pages)
+    processed_results = {}
+    try:
+        processed_results = await process_search_results(
+            new_results,
+            max_concurrency=configurable.max_concurrent_summaries,
+            fingerprints=fingerprints,
+            deadline=configurable.summarization_deadline,
+        )
+    finally:
+        # Pages that kept their snippet, or whose search was cancelled, were not summarized
+        record_summarized_results(
+            {url: result for url, result in new_results.items() if not processed_results.get(url, {}).get('summarized')},
+            fingerprints,
+            seen_urls,
+            seen_pages,
+            summarized=False,
+        )
+
+    # Refer back to earlier summaries instead of repeating them
+    summarized_results = refer_to_earlier_results(unique_results, processed_results, near_duplicates, seen_urls)
 
     # Format output for consumption
     return format_search_output(summarized_results)
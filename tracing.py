@@ -0,0 +1,259 @@
+"""Run Instrumentation.
+
+This module records trace-style spans for a research run: one span per graph
+node, per model call, per search request and per webpage summarization. Each
+span carries its duration and attributes such as token counts, cache hits and
+the URL or query involved. At the end of a run the tracer writes a JSON summary
+that aggregates the spans by name.
+
+Spans are collected by the tracer installed with ``use_tracer``; without one,
+instrumented code runs unchanged and records nothing.
+"""
+
+import json
+import re
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterator, Optional, Union
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+# ===== SPANS =====
+
+@dataclass
+class Span:
+    """A timed operation within a research run."""
+    name: str
+    kind: str
+    start: float
+    end: Optional[float] = None
+    attributes: dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def duration(self) -> float:
+        """Duration in seconds, up to now if the span is still open."""
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+
+    def add(self, **counts: float) -> None:
+        """Add numeric values to attributes, e.g. token counts of nested model calls."""
+        for key, value in counts.items():
+            self.attributes[key] = self.attributes.get(key, 0) + value
+
+class Tracer:
+    """Collector of the spans of one research run."""
+
+    def __init__(self, name: str = "research"):
+        self.name = name
+        self.run_id = str(uuid.uuid4())
+        self.started_at = datetime.now(timezone.utc)
+        self.start = time.perf_counter()
+        self.spans: list[Span] = []
+
+    def start_span(self, name: str, kind: str, **attributes: Any) -> Span:
+        """Open and record a span; the caller sets ``end`` when it finishes."""
+        span = Span(name=name, kind=kind, start=time.perf_counter(), attributes=attributes)
+        self.spans.append(span)
+        return span
+
+    def callback_handler(self) -> "TracingCallbackHandler":
+        """Return a callback handler that records node and model call spans."""
+        return TracingCallbackHandler(self)
+
+    def summary(self) -> dict:
+        """Aggregate the recorded spans into a JSON-serializable run summary."""
+        by_name: dict[str, dict] = defaultdict(lambda: {
+            "kind": None, "count": 0, "total_seconds": 0.0, "max_seconds": 0.0,
+            "input_tokens": 0, "output_tokens": 0, "tokens_saved": 0, "cache_hits": 0, "errors": 0,
+            "fallbacks": 0, "hedged": 0,
+        })
+        for span in self.spans:
+            stats = by_name[span.name]
+            stats["kind"] = span.kind
+            stats["count"] += 1
+            stats["total_seconds"] += span.duration
+            stats["max_seconds"] = max(stats["max_seconds"], span.duration)
+            stats["input_tokens"] += span.attributes.get("input_tokens", 0)
+            stats["output_tokens"] += span.attributes.get("output_tokens", 0)
+            stats["tokens_saved"] += span.attributes.get("tokens_saved", 0)
+            stats["cache_hits"] += 1 if span.attributes.get("cache_hit") else 0
+            stats["errors"] += 1 if span.attributes.get("error") else 0
+            stats["fallbacks"] += 1 if span.attributes.get("fallback") else 0
+            stats["hedged"] += 1 if span.attributes.get("hedged") else 0
+
+        # Attribute model call tokens to the graph node that made the call
+        model_spans = [span for span in self.spans if span.kind == "llm"]
+        for span in model_spans:
+            node = span.attributes.get("node")
+            if node in by_name and by_name[node]["kind"] == "node":
+                by_name[node]["input_tokens"] += span.attributes.get("input_tokens", 0)
+                by_name[node]["output_tokens"] += span.attributes.get("output_tokens", 0)
+
+        for stats in by_name.values():
+            stats["total_seconds"] = round(stats["total_seconds"], 4)
+            stats["max_seconds"] = round(stats["max_seconds"], 4)
+
+        return {
+            "run_id": self.run_id,
+            "name": self.name,
+            "started_at": self.started_at.isoformat(),
+            "wall_seconds": round(time.perf_counter() - self.start, 4),
+            "totals": {
+                "llm_calls": len(model_spans),
+                "input_tokens": sum(s.attributes.get("input_tokens", 0) for s in model_spans),
+                "output_tokens": sum(s.attributes.get("output_tokens", 0) for s in model_spans),
+                "search_calls": sum(1 for s in self.spans if s.kind == "search"),
+                "tokens_saved": sum(s.attributes.get("tokens_saved", 0) for s in self.spans),
+                "fallbacks": sum(1 for s in self.spans if s.attributes.get("fallback")),
+                "hedged_calls": sum(1 for s in self.spans if s.attributes.get("hedged")),
+                "cache_hits": sum(1 for s in self.spans if s.attributes.get("cache_hit")),
+            },
+            "by_name": dict(by_name),
+            "spans": [
+                {
+                    "name": span.name,
+                    "kind": span.kind,
+                    "start_offset": round(span.start - self.start, 4),
+                    "duration": round(span.duration, 4),
+                    "attributes": span.attributes,
+                }
+                for span in self.spans
+            ],
+        }
+
+    def write_summary(self, directory: Union[str, Path]) -> Path:
+        """Write the run summary as JSON into a directory.
+
+        Args:
+            directory: Directory the summary file is created in
+
+        Returns:
+            Path of the written summary file
+        """
+        slug = re.sub(r"[^a-z0-9]+", "-", self.name.lower()).strip("-")[:48] or "run"
+        timestamp = self.started_at.strftime("%Y%m%dT%H%M%S")
+        path = Path(directory) / f"{timestamp}-{slug}-{self.run_id[:8]}.json"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.summary(), indent=2, default=str))
+        return path
+
+# ===== CONTEXT =====
+
+_current_tracer: ContextVar[Optional[Tracer]] = ContextVar("current_tracer", default=None)
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+def get_tracer() -> Optional[Tracer]:
+    """Return the tracer of the current run, if any."""
+    return _current_tracer.get()
+
+@contextmanager
+def use_tracer(tracer: Tracer) -> Iterator[Tracer]:
+    """Install a tracer for the code run inside the block, including spawned tasks."""
+    token = _current_tracer.set(tracer)
+    try:
+        yield tracer
+    finally:
+        _current_tracer.reset(token)
+
+@contextmanager
+def span(name: str, kind: str, **attributes: Any) -> Iterator[Optional[Span]]:
+    """Record a span around the block when a tracer is installed.
+
+    Errors raised in the block are recorded on the span and re-raised.
+
+    Args:
+        name: Span name, usually the function or node being measured
+        kind: Span category such as ``search`` or ``summarization``
+        **attributes: Initial span attributes, e.g. ``url`` or ``query``
+
+    Yields:
+        The open span, or None when no tracer is installed
+    """
+    tracer = _current_tracer.get()
+    if tracer is None:
+        yield None
+        return
+
+    current = tracer.start_span(name, kind, **attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.attributes["error"] = f"{type(e).__name__}: {str(e)}"
+        raise
+    finally:
+        current.end = time.perf_counter()
+        _current_span.reset(token)
+
+def annotate_span(**attributes: Any) -> None:
+    """Set attributes on the innermost open span, if any."""
+    current = _current_span.get()
+    if current is not None:
+        current.attributes.update(attributes)
+
+# ===== CALLBACKS =====
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """Callback handler recording graph node and model call spans.
+
+    Token counts of a model call are also added to the enclosing explicit span,
+    so for example a summarization span reports the tokens it consumed.
+    """
+
+    run_inline = True
+
+    def __init__(self, tracer: Tracer):
+        self.tracer = tracer
+        self.open_spans: dict[Any, tuple[Span, Optional[Span]]] = {}
+
+    def on_chain_start(self, serialized, inputs, *, run_id, metadata=None, **kwargs):
+        node = (metadata or {}).get("langgraph_node")
+        if node is not None and kwargs.get("name") == node:
+            self.open_spans[run_id] = (self.tracer.start_span(node, "node"), None)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._close(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._close(run_id, error=error)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs):
+        metadata = metadata or {}
+        model = metadata.get("ls_model_name") or kwargs.get("name") or "chat_model"
+        model_span = self.tracer.start_span(model, "llm", node=metadata.get("langgraph_node"))
+        self.open_spans[run_id] = (model_span, _current_span.get())
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        if run_id not in self.open_spans:
+            return
+        model_span, parent = self.open_spans[run_id]
+        usage: dict = {}
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                usage = getattr(message, "usage_metadata", None) or usage
+        tokens = {
+            "input_tokens": usage.get("input_tokens", 0),
+            "output_tokens": usage.get("output_tokens", 0),
+        }
+        model_span.add(**tokens)
+        if parent is not None:
+            parent.add(**tokens)
+        self._close(run_id)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._close(run_id, error=error)
+
+    def _close(self, run_id, error: Optional[BaseException] = None) -> None:
+        entry = self.open_spans.pop(run_id, None)
+        if entry is None:
+            return
+        closed_span = entry[0]
+        closed_span.end = time.perf_counter()
+        if error is not None:
+            closed_span.attributes["error"] = f"{type(error).__name__}: {str(error)}"